@@ -1,9 +1,8 @@
 """Aggregation of all loads "downstream" to some other node.
 """
 
-import objects.timeseries as ts
+import objects.load_points as load_points
 import objects.network as network
-import numpy as np
 
 def aggregate_load_of_node(str_load_ID, dict_loads_ts, g_network):
     """Finds timeseries of total load experienced by a node.
@@ -24,23 +23,43 @@ def aggregate_load_of_node(str_load_ID, dict_loads_ts, g_network):
 
     Notes:
     ----------
-    Will calculate recursively, stopping at nodes which have no children which
-    are then treated as customers.
+    Will collect loads recursively, stopping at nodes which have no children
+    which are then treated as customers. All collected loads are then summed
+    in a single pass.
 
+    """
+    list_IDs = list_load_IDs_below_node(str_load_ID, dict_loads_ts, g_network)
+    ts_sum = load_points.aggregate_loads(dict_loads_ts, list_IDs)
+    return ts_sum
+
+
+def list_load_IDs_below_node(str_load_ID, dict_loads_ts, g_network):
+    """Lists ID's of a node and every node downstream of it that has a load.
+
+    Parameters:
+    ----------
+    str_load_ID : node-name
+        Node which to start listing loads from.
+    dict_loads_ts : nodes
+        Container indexable by node-names of load-timeseries at that node.
+    g_network : graph
+        Directed graph of network-topology of loads.
+
+    Returns:
+    ----------
+    list_IDs : list(str)
+        ID's of all load-points at or below str_load_ID.
     """
     if not network.node_in_network(str_load_ID, g_network):
         raise Exception("Error: Node \"" + str_load_ID + "\" missing from network")
     list_children = network.list_children_of_node(str_load_ID, g_network)
 
-    ts_sum = np.empty((0))
+    list_IDs = []
     if str(str_load_ID) in dict_loads_ts:
-        ts_sum = dict_loads_ts[str(str_load_ID)]
+        list_IDs.append(str(str_load_ID))
     else:
         print("Warning: Load-point", str_load_ID, "is missing timeseries!")
-        ts_sum = np.empty((0))
-    if list_children:
-        for str_child in list_children:
-            ts_child = aggregate_load_of_node(
-                str_child, dict_loads_ts, g_network)
-            ts_sum = ts.add_timeseries(ts_sum, ts_child)
-    return ts_sum
\ No newline at end of file
+    for str_child in list_children:
+        list_IDs += list_load_IDs_below_node(
+            str_child, dict_loads_ts, g_network)
+    return list_IDs
@@ -2,11 +2,24 @@
 Modify path-parameters at the 
 """
 import os.path
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 
+# Characters an ID is made of, ID's are only replaced as whole tokens of these
+STR_ID_TOKEN_PATTERN = r"[\w.]+"
 
-def split_txt_by_ID(str_path_txt, str_separator, int_column_IDs, dict_ID_encoding):
+
+def split_txt_by_ID(
+        str_path_txt,
+        str_separator,
+        int_column_IDs,
+        dict_ID_encoding,
+        int_max_open_files=256,
+        int_buffer_bytes=1 << 16):
     """Splits rows of txt into multiple files based on ID-field.
 
     Parameters
@@ -20,50 +33,151 @@ def split_txt_by_ID(str_path_txt, str_separator, int_column_IDs, dict_ID_encodin
         are stored together in a new file with ID as the name. Zero-indexed.
     dict_ID_encoding : dict
         Pair of old_ID and new_ID, for anonymizing customer-data.
+    int_max_open_files : int, default=256
+        Maximum number of split files kept open at once.
+    int_buffer_bytes : int, default=65536
+        Size of the write-buffer of every open split file.
 
     Notes
     ----------
     Function creates a directory in the same folder as str_path_txt where all
     split files are put.
-    """
-    with open(str_path_txt, 'r') as fp:
-        arr_contents = fp.readlines()
-
-    dict_uniques = {}
-    str_header = arr_contents[0]
-    list_skipped = []
-    for i in range(1, len(arr_contents)):
-        arr_cur_line = str.split(str.strip(arr_contents[i]), str_separator)
-        old_ID = arr_cur_line[int_column_IDs]
-        if old_ID in dict_ID_encoding:
-            new_ID = dict_ID_encoding[arr_cur_line[int_column_IDs]]
-            arr_cur_line[int_column_IDs] = new_ID
-            arr_lines_so_far = dict_uniques.get(new_ID, [str_header])
-            arr_lines_so_far.append(str_separator.join(arr_cur_line) + '\n')
-            dict_uniques[new_ID] = arr_lines_so_far
-        else:
-            if not (old_ID in list_skipped): list_skipped.append(old_ID)
-    print("Skipped the following customers missing from encoding:")
-    #for id in list_skipped: print(id)
-    print(list_skipped)
-
 
+    The file is streamed line by line, and every line is written to its split
+    file immediately. Split files are kept open in a pool, where the least
+    recently used file is closed once int_max_open_files are open, and
+    reopened for appending if its ID appears again. Memory usage is thus
+    bounded regardless of the size of the file.
+    """
     str_input_filename, _str_data_filetype = os.path.splitext(str_path_txt)
     str_folder = str_input_filename + "_split\\"
     if not os.path.exists(str_folder):
         os.mkdir(str_folder)
-    for key in dict_uniques:
-        str_new_path = str_folder + str(key) + ".txt"
-        if not os.path.exists(str_new_path):
-            with open(str_new_path, 'w') as fp:
-                fp.writelines(dict_uniques[key])
-        else:
-            print(
-                "WARNING! Duplicate split load-file! Delete all old files before continuing.")
+
+    dict_open_files = OrderedDict()
+    set_created = set()
+    set_duplicates = set()
+    set_skipped = set()
+    int_num_lines = 0
+    fl_time_start = time.perf_counter()
+    try:
+        with open(str_path_txt, 'r') as fp_input:
+            str_header = fp_input.readline()
+            for str_line in fp_input:
+                int_num_lines += 1
+                arr_cur_line = str.split(str.strip(str_line), str_separator)
+                old_ID = arr_cur_line[int_column_IDs]
+                if old_ID not in dict_ID_encoding:
+                    set_skipped.add(old_ID)
+                    continue
+                new_ID = dict_ID_encoding[old_ID]
+                arr_cur_line[int_column_IDs] = new_ID
+
+                fp = dict_open_files.get(new_ID)
+                if fp is not None:
+                    dict_open_files.move_to_end(new_ID)
+                else:
+                    if new_ID in set_duplicates:
+                        continue
+                    str_new_path = str_folder + str(new_ID) + ".txt"
+                    if new_ID in set_created:
+                        fp = open(str_new_path, 'a', buffering=int_buffer_bytes)
+                    elif os.path.exists(str_new_path):
+                        print(
+                            "WARNING! Duplicate split load-file! Delete all old files before continuing.")
+                        set_duplicates.add(new_ID)
+                        continue
+                    else:
+                        fp = open(str_new_path, 'w', buffering=int_buffer_bytes)
+                        fp.write(str_header)
+                        set_created.add(new_ID)
+                    if len(dict_open_files) >= int_max_open_files:
+                        _old_ID, fp_evicted = dict_open_files.popitem(last=False)
+                        fp_evicted.close()
+                    dict_open_files[new_ID] = fp
+                fp.write(str_separator.join(arr_cur_line) + '\n')
+    finally:
+        for fp in dict_open_files.values():
+            fp.close()
+
+    fl_elapsed = max(time.perf_counter() - fl_time_start, 1e-9)
+    # The whole file is read, so its size is the number of bytes read
+    int_num_bytes = os.path.getsize(str_path_txt)
+    print("Split", int_num_lines, "lines into", len(set_created), "files in",
+          round(fl_elapsed, 1), "s,", round(int_num_lines / fl_elapsed),
+          "lines/s,", round(int_num_bytes / fl_elapsed / 2**20, 1), "MB/s")
+    print("Skipped the following customers missing from encoding:")
+    print(sorted(set_skipped))
+    return
+
+
+def compile_ID_encoder(dict_encoding):
+    """Returns function replacing all ID's in a string by their encoding.
+
+    Parameters
+    ----------
+    dict_encoding : dict
+        Dictionary of old_ID, new_ID-encoding.
+
+    Returns
+    ----------
+    encode_text : function(str) -> str
+        Replaces every appearance of an old_ID in a single pass.
+
+    Notes
+    ----------
+    ID's are only replaced as whole tokens, i.e. not directly preceded or
+    followed by a letter, digit, '_' or '.'. ID's which are part of a longer
+    ID or a number are thus left unchanged. The text is split into tokens by
+    a single regex, and every token is looked up in dict_encoding, such that
+    the time taken does not depend on the number of ID's. ID's containing
+    other characters are matched by an alternation placed before the general
+    token, longest first.
+    """
+    list_special_IDs = sorted(
+        (str_ID for str_ID in dict_encoding
+         if not re.fullmatch(STR_ID_TOKEN_PATTERN, str_ID)),
+        key=len, reverse=True)
+    if list_special_IDs:
+        str_pattern = ("(?<![\\w.])(?:"
+                       + "|".join(re.escape(str_ID) for str_ID in list_special_IDs)
+                       + "|" + STR_ID_TOKEN_PATTERN + ")(?![\\w.])")
+    else:
+        str_pattern = STR_ID_TOKEN_PATTERN
+    re_IDs = re.compile(str_pattern)
+
+    def replace_match(match):
+        str_token = match.group(0)
+        return dict_encoding.get(str_token, str_token)
+
+    def encode_text(str_text):
+        return re_IDs.sub(replace_match, str_text)
+    return encode_text
+
+
+def encode_file(str_path, str_new_path, encode_text, int_chunk_bytes=1 << 22):
+    """Writes copy of a txt-like file with all ID's encoded.
+
+    Notes
+    ----------
+    The file is processed in chunks of whole lines of about int_chunk_bytes.
+    """
+    with open(str_path, 'r') as fp_input, open(str_new_path, 'w') as fp:
+        for list_lines in iter(lambda: fp_input.readlines(int_chunk_bytes), []):
+            fp.write(encode_text("".join(list_lines)))
     return
 
 
-def encode_directory_contents(str_dir_path, dict_encoding):
+def _initialize_encoding_worker(dict_encoding):
+    global _encode_text_of_worker
+    _encode_text_of_worker = compile_ID_encoder(dict_encoding)
+
+
+def _encode_file_in_worker(str_path, str_new_path):
+    encode_file(str_path, str_new_path, _encode_text_of_worker)
+
+
+def encode_directory_contents(str_dir_path, dict_encoding, int_workers=1):
     """Encodes all apperances of ID's in directory of txt-like files.
 
     Parameters:
@@ -72,33 +186,44 @@ def encode_directory_contents(str_dir_path, dict_encoding):
         Path of directory to encode.
     dict_encoding : dict
         Dictionary of old_ID, new_ID-encoding.
+    int_workers : int, default=1
+        Number of processes encoding files in parallel.
 
     Notes
     ----------
     Works with .txt, .csv-files stored in str_dir_path.
 
+    See compile_ID_encoder for how ID's are matched.
     """
     str_new_dir_path = str_dir_path[:-1] + \
         "_encoded\\"  # To remove \ from old path
     if not os.path.exists(str_new_dir_path):
         os.mkdir(str_new_dir_path)
 
+    list_paths = []
     for str_file_path in os.listdir(str_dir_path):
-        with open(str_dir_path + str_file_path, 'r') as fp:
-            arr_contents = fp.readlines()
-        for i in range(len(arr_contents)):
-            for old_ID in dict_encoding:
-                new_ID = dict_encoding[old_ID]
-                arr_contents[i] = arr_contents[i].replace(old_ID, new_ID)
-
         str_new_file_path = str_new_dir_path + str_file_path
         if not os.path.exists(str_new_file_path):
-            with open(str_new_file_path, 'w') as fp:
-                fp.writelines(arr_contents)
+            list_paths.append((str_dir_path + str_file_path, str_new_file_path))
         else:
             print(
                 "WARNING! Duplicate network-file! Delete all old files before continuing.")
 
+    if int_workers > 1:
+        with ProcessPoolExecutor(
+                max_workers=int_workers,
+                initializer=_initialize_encoding_worker,
+                initargs=(dict_encoding,)) as executor:
+            list_futures = [
+                executor.submit(_encode_file_in_worker, str_path, str_new_path)
+                for str_path, str_new_path in list_paths]
+            for future in list_futures:
+                future.result()
+    else:
+        encode_text = compile_ID_encoder(dict_encoding)
+        for str_path, str_new_path in list_paths:
+            encode_file(str_path, str_new_path, encode_text)
+
     return
 
 
@@ -120,8 +245,8 @@ def format_data_files(dict_data_unsplit, dict_network, str_path_encoding):
 
     print("Encoding network-data...")
     str_path = dict_network["path"]
-    str_separator = dict_network["separator"]
-    encode_directory_contents(str_path, dict_encoding)
+    int_workers = dict_network.get("workers", 1)
+    encode_directory_contents(str_path, dict_encoding, int_workers)
 
     print("Successfully performed all data-operations")
     return
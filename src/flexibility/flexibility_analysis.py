@@ -9,11 +9,11 @@ def find_branch_closest_to_overload(loads, network):
     for i in range(len(network["branch"]["F_BUS"])):
         print(i)
         fbus = network["branch"]["F_BUS"][i]
-        rate_A = float(network["branch"]["RATE_A"][i])*1000
+        rate_A = network["branch"]["RATE_A"][i]*1000
         
         ts_agg = load_aggregation.aggregate_load_of_node(
                 fbus, loads, network)
-        if ts_agg != np.array([]): 
+        if len(ts_agg) > 0:
             fl_max = float(np.max(ts_agg[:,1]))
             maxs.append((i, rate_A - fl_max, fbus, rate_A))
     return sorted(maxs,key=lambda x: x[1], reverse=False)[0]
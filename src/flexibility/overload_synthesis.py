@@ -1,4 +1,3 @@
-import copy
 import numpy as np
 import plotting
 import analysis.methods.load_aggregation as load_aggregation
@@ -10,7 +9,7 @@ import objects.timeseries as ts
 def add_N_random_loads(loads, network, agg_index, num_iterations, 
                                     plot_aggregate=True, plot_histogram=True, plot_clustering=True):
     str_agg_id = network["branch"]["F_BUS"][agg_index]
-    fl_limit_kW = float(network["branch"]["RATE_A"][agg_index])*1000
+    fl_limit_kW = network["branch"]["RATE_A"][agg_index]*1000
 
     all_load_ids = [load_id for load_id in loads]
     l_loads_added = []
@@ -19,7 +18,7 @@ def add_N_random_loads(loads, network, agg_index, num_iterations,
         if i != 0:
             print("Adding new load to network...")
             id_to_copy_from = np.random.choice(all_load_ids)
-            ts_new_load_data = copy.deepcopy(loads[id_to_copy_from])
+            ts_new_load_data = loads[id_to_copy_from]
             net_modification.add_new_load_to_net(
                 "5000" + str(i), ts_new_load_data, str_agg_id, loads, network)
             l_loads_added.append(id_to_copy_from)
@@ -46,14 +45,14 @@ def increase_single_load(loads, network, customer_index, aggregation_index, fl_i
     # Customer to increase
     str_customer_id = network["bus"]["BUS_I"][customer_index]
     # Line-limit at aggregation point
-    fl_limit_kW = float(network["branch"]["RATE_A"][aggregation_index])*1000
+    fl_limit_kW = network["branch"]["RATE_A"][aggregation_index]*1000
 
     ts_agg_before = load_aggregation.aggregate_load_of_node(
                 str_agg_id, loads, network)
 
     # Increasing load of customer to induce overloads
     ts_customer = loads[str_customer_id]
-    ts_customer = ts.normalize_timeseries(ts_customer, (fl_increase + np.max(ts_customer[:,1])/2))
+    ts_customer = ts.normalize_timeseries(ts_customer, (fl_increase + ts_customer.max()/2))
     ts_customer = ts.offset_timeseries(ts_customer, fl_increase/2)
     loads[str_customer_id] = ts_customer
 
@@ -0,0 +1,275 @@
+"""Module for caching parsed data-files on disk between runs.
+
+Notes
+----------
+Configured by the optional [cache]-section of config.toml:
+
+    [cache]
+    path = "out_data/cache/"    # Directory of cached files
+    max_size_mb = 1024          # Least recently used files are evicted above this
+    hash_contents = false       # Fingerprint files by contents, not only mtime
+
+Every entry is keyed by a fingerprint of the source-file (path, size and
+modification time, optionally a hash of its contents) together with the
+configuration used to parse it. Changing either thus leads to a new key, and
+stale entries are left to be evicted.
+
+Timeseries are stored as npz-files of the datetime64 time-axis and the float
+data-values. Networks are stored as npz-files of every column of every
+MATPOWER-struct. Other intermediate results, such as the outputs of
+preprocessing-steps, are pickled.
+"""
+import os
+import json
+import hashlib
+import pickle
+import numpy as np
+from objects import timeseries as ts
+from objects import network
+
+INT_CACHE_FORMAT_VERSION = 1
+
+# Config-fields not affecting the result of loading a set of files
+LIST_IGNORED_CONFIG_FIELDS = ["path", "workers", "chunk_rows"]
+
+# Config-fields affecting the parsed result of a single data-file
+LIST_PARSING_CONFIG_FIELDS = [
+    "date_format", "first_date_iso", "separator", "decimal", "sheet",
+    "time_column", "data_column", "vertical_data", "resample_frequency",
+    "resample_method"]
+
+# Separates struct- and column-name in the array-names of cached networks
+STR_NETWORK_KEY_SEPARATOR = "/"
+
+
+def hash_file_contents(str_path, int_block_size=1 << 20):
+    """Returns sha256-digest of the contents of a file.
+    """
+    hash_contents = hashlib.sha256()
+    with open(str_path, 'rb') as fp:
+        for block in iter(lambda: fp.read(int_block_size), b""):
+            hash_contents.update(block)
+    return hash_contents.hexdigest()
+
+
+def cache_key(str_path, dict_data_config, dict_cache_config):
+    """Returns key identifying a data-file parsed with a given configuration.
+
+    Parameters
+    ----------
+    str_path : str
+        Path of the source data-file.
+    dict_data_config : dict
+        Configuration used to parse the file.
+    dict_cache_config : dict
+        Configuration of the cache.
+
+    Returns
+    ----------
+    str_key : str
+        Hexadecimal digest, usable as filename.
+
+    Notes
+    ----------
+    Only the fields of LIST_PARSING_CONFIG_FIELDS are part of the key, such
+    that changing e.g. "last_date_iso" does not invalidate parsed files.
+    """
+    dict_parsing_config = {key: dict_data_config[key]
+                           for key in LIST_PARSING_CONFIG_FIELDS
+                           if key in dict_data_config}
+    return files_cache_key([str_path], dict_parsing_config, dict_cache_config)
+
+
+def files_cache_key(list_paths, dict_data_config, dict_cache_config):
+    """Returns key identifying data-files parsed together with a given
+    configuration, see cache_key.
+    """
+    list_file_fingerprints = []
+    for str_path in list_paths:
+        stat_file = os.stat(str_path)
+        dict_file_fingerprint = {
+            "path": os.path.abspath(str_path),
+            "size": stat_file.st_size,
+            "mtime_ns": stat_file.st_mtime_ns
+        }
+        if dict_cache_config.get("hash_contents", False):
+            dict_file_fingerprint["contents"] = hash_file_contents(str_path)
+        list_file_fingerprints.append(dict_file_fingerprint)
+    dict_fingerprint = {
+        "version": INT_CACHE_FORMAT_VERSION,
+        "files": list_file_fingerprints,
+        "config": {key: dict_data_config[key] for key in dict_data_config
+                   if key not in LIST_IGNORED_CONFIG_FIELDS}
+    }
+    str_fingerprint = json.dumps(dict_fingerprint, sort_keys=True, default=str)
+    return hashlib.sha256(str_fingerprint.encode()).hexdigest()
+
+
+def derived_timeseries_cache_key(str_fingerprint, list_ts):
+    """Returns key identifying timeseries derived from other timeseries.
+
+    Parameters
+    ----------
+    str_fingerprint : str
+        Description of how the timeseries is derived, e.g. configuration.
+    list_ts : list(timeseries)
+        Timeseries the result is derived from, fingerprinted by contents.
+
+    Returns
+    ----------
+    str_key : str
+        Hexadecimal digest, usable as filename.
+    """
+    hash_key = hashlib.sha256(str(INT_CACHE_FORMAT_VERSION).encode())
+    hash_key.update(str_fingerprint.encode())
+    for ts_i in list_ts:
+        hash_key.update(np.ascontiguousarray(ts_i.arr_time).tobytes())
+        hash_key.update(np.ascontiguousarray(ts_i.arr_data).tobytes())
+    return hash_key.hexdigest()
+
+
+def cache_entry_path(dict_cache_config, str_key):
+    return os.path.join(dict_cache_config["path"], str_key + ".npz")
+
+
+def load_cached_timeseries(dict_cache_config, str_key):
+    """Returns cached timeseries, or None if not cached.
+
+    Notes
+    ----------
+    Marks the entry as recently used.
+    """
+    str_entry_path = cache_entry_path(dict_cache_config, str_key)
+    try:
+        with np.load(str_entry_path) as npz_entry:
+            ts_data = ts.create_standard_time_series(
+                npz_entry["arr_time"], npz_entry["arr_data"],
+                dtype=npz_entry["arr_data"].dtype)
+    except (FileNotFoundError, OSError, KeyError, ValueError):
+        return None
+    os.utime(str_entry_path)
+    return ts_data
+
+
+def store_cached_timeseries(dict_cache_config, str_key, ts_data):
+    """Stores timeseries in cache.
+
+    Notes
+    ----------
+    Written to a temporary file first, such that concurrent readers never see
+    partially written entries.
+    """
+    str_dir_path = dict_cache_config["path"]
+    if not os.path.exists(str_dir_path):
+        os.makedirs(str_dir_path, exist_ok=True)
+    str_entry_path = cache_entry_path(dict_cache_config, str_key)
+    str_temporary_path = str_entry_path + "." + str(os.getpid()) + ".tmp"
+    with open(str_temporary_path, 'wb') as fp:
+        np.savez(fp, arr_time=ts_data.arr_time, arr_data=ts_data.arr_data)
+    os.replace(str_temporary_path, str_entry_path)
+    return
+
+
+def load_cached_network(dict_cache_config, str_key):
+    """Returns cached network-dictionary, or None if not cached.
+
+    Notes
+    ----------
+    Columns stored as strings are returned as object-arrays of interned
+    strings, see objects.network.create_ID_array.
+    """
+    str_entry_path = cache_entry_path(dict_cache_config, str_key)
+    try:
+        with np.load(str_entry_path) as npz_entry:
+            dict_network = {}
+            for str_name in npz_entry.files:
+                str_table, str_column = str_name.split(STR_NETWORK_KEY_SEPARATOR)
+                arr_column = npz_entry[str_name]
+                if arr_column.dtype.kind == "U":
+                    arr_column = network.create_ID_array(arr_column)
+                dict_network.setdefault(str_table, {})[str_column] = arr_column
+    except (FileNotFoundError, OSError, KeyError, ValueError):
+        return None
+    os.utime(str_entry_path)
+    return dict_network
+
+
+def store_cached_network(dict_cache_config, str_key, dict_network):
+    """Stores network-dictionary in cache, without pickling.
+    """
+    dict_arrays = {}
+    for str_table in dict_network:
+        for str_column, arr_column in dict_network[str_table].items():
+            if arr_column.dtype == object:
+                arr_column = arr_column.astype(str)
+            dict_arrays[str_table + STR_NETWORK_KEY_SEPARATOR + str_column] = \
+                arr_column
+    str_dir_path = dict_cache_config["path"]
+    if not os.path.exists(str_dir_path):
+        os.makedirs(str_dir_path, exist_ok=True)
+    str_entry_path = cache_entry_path(dict_cache_config, str_key)
+    str_temporary_path = str_entry_path + "." + str(os.getpid()) + ".tmp"
+    with open(str_temporary_path, 'wb') as fp:
+        np.savez(fp, **dict_arrays)
+    os.replace(str_temporary_path, str_entry_path)
+    return
+
+
+def load_cached_object(dict_cache_config, str_key):
+    """Returns cached python-object, or None if not cached.
+
+    Notes
+    ----------
+    Intended for intermediate results of any type, such as the outputs of
+    preprocessing-steps. Marks the entry as recently used.
+    """
+    str_entry_path = os.path.join(dict_cache_config["path"], str_key + ".pkl")
+    try:
+        with open(str_entry_path, 'rb') as fp:
+            obj = pickle.load(fp)
+    except (FileNotFoundError, OSError, EOFError, pickle.UnpicklingError):
+        return None
+    os.utime(str_entry_path)
+    return obj
+
+
+def store_cached_object(dict_cache_config, str_key, obj):
+    """Stores python-object in cache, see load_cached_object.
+    """
+    str_dir_path = dict_cache_config["path"]
+    if not os.path.exists(str_dir_path):
+        os.makedirs(str_dir_path, exist_ok=True)
+    str_entry_path = os.path.join(str_dir_path, str_key + ".pkl")
+    str_temporary_path = str_entry_path + "." + str(os.getpid()) + ".tmp"
+    with open(str_temporary_path, 'wb') as fp:
+        pickle.dump(obj, fp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(str_temporary_path, str_entry_path)
+    return
+
+
+def evict_cache(dict_cache_config):
+    """Deletes least recently used entries until cache is within size-limit.
+    """
+    str_dir_path = dict_cache_config["path"]
+    if not os.path.isdir(str_dir_path):
+        return
+    int_max_bytes = int(dict_cache_config.get("max_size_mb", 1024) * 2**20)
+
+    list_entries = []
+    for dir_entry in os.scandir(str_dir_path):
+        if dir_entry.is_file() and dir_entry.name.endswith((".npz", ".pkl")):
+            stat_entry = dir_entry.stat()
+            list_entries.append(
+                (stat_entry.st_mtime, stat_entry.st_size, dir_entry.path))
+    int_total_bytes = sum(entry[1] for entry in list_entries)
+
+    int_num_evicted = 0
+    for _fl_mtime, int_size, str_entry_path in sorted(list_entries):
+        if int_total_bytes <= int_max_bytes:
+            break
+        os.remove(str_entry_path)
+        int_total_bytes -= int_size
+        int_num_evicted += 1
+    if int_num_evicted:
+        print("Evicted", int_num_evicted, "entries from cache")
+    return
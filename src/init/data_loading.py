@@ -1,9 +1,16 @@
 import os
-import datetime as dt
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import toml
 from objects import timeseries as ts
+from objects import resampling
+from objects import load_store
+from objects import network
+from objects.load_points import LoadMatrix
+from init import data_cache
+from init import incremental
 from utilities import print_dictionary_recursive
 
 
@@ -82,8 +89,10 @@ def load_time_and_data_from_txt(
         str_separator,
         int_time_column,
         int_data_column,
-        vertical_data=True):
-    """Loads time and data-fields from structured txt-file
+        vertical_data=True,
+        str_decimal=".",
+        int_start_byte=0):
+    """Loads time and data-fields from structured txt- or csv-file
 
     Parameters
     ----------
@@ -95,16 +104,24 @@ def load_time_and_data_from_txt(
         Column (row) the relevant information occupies. Zero-indexed.
     vertical_data, bool, default=True
         Whether the time/data-values occupy rows downwards ("vertical") or not.
+    str_decimal : str, default="."
+        Decimal separator of the data-values, e.g. ','.
+    int_start_byte : int, default=0
+        Offset in the file of the first row to load, which must start a row.
+        Only supported for vertical files. The first row of the file is
+        only skipped as a label if it is 0.
 
     Returns
     ----------
     arr_time : np.array
-        Array of time-values.
+        Array of time-values, as strings.
     arr_data : np.array
-        Array of data-values.
+        Array of data-values, as floats unless some values are not numerical.
 
     Notes
     ----------
+    Requires pandas as dependency.
+
     A structured txt-file will resemble a spreadsheet where str_separator
     delimits columns and newline delimits rows.
 
@@ -113,68 +130,245 @@ def load_time_and_data_from_txt(
 
     The returned arrays are coordinated in the sense that the ith element of
     each array correspond to the same row in the loaded txt-file.
+
+    Vertical files are parsed by the C-engine of pandas, which only
+    materializes the two selected columns.
     """
-    with open(str_path_txt, 'r') as fp:
-        arr_contents = fp.readlines()
-    for i in range(len(arr_contents)):
-        arr_contents[i] = str.split(str.strip(arr_contents[i]), str_separator)
-    arr_contents = np.array(arr_contents)
     if not vertical_data:
-        arr_contents = np.transpose(arr_contents)
-    arr_contents = arr_contents[1:,:]
-    arr_time = arr_contents[:, int_time_column]
-    arr_data = arr_contents[:, int_data_column]
+        df_contents = pd.read_csv(str_path_txt, sep=str_separator,
+                                  header=None, dtype=str, engine="c")
+        arr_contents = np.transpose(np.array(df_contents))[1:, :]
+        return arr_contents[:, int_time_column], arr_contents[:, int_data_column]
+
+    if int_start_byte:
+        with open(str_path_txt, 'rb') as fp:
+            fp.seek(int_start_byte)
+            df_contents = read_time_and_data_columns(
+                fp, str_separator, int_time_column, int_data_column,
+                str_decimal, int_skip_rows=0)
+    else:
+        df_contents = read_time_and_data_columns(
+            str_path_txt, str_separator, int_time_column, int_data_column,
+            str_decimal)
+    arr_time = df_contents[int_time_column].to_numpy()
+    arr_data = df_contents[int_data_column].to_numpy()
     return arr_time, arr_data
 
 
+def iterate_time_and_data_chunks_from_txt(
+        str_path_txt,
+        str_separator,
+        int_time_column,
+        int_data_column,
+        int_chunk_rows,
+        str_decimal=".",
+        list_extra_columns=(),
+        int_start_byte=0):
+    """Iterates over time and data-fields of a vertical txt-file in chunks.
+
+    Parameters
+    ----------
+    str_path_txt : str
+        Relative path of txt-file to be loaded.
+    str_separator : str
+        Character or string separating each column.
+    int_time_column, int_data_column : int
+        Column the relevant information occupies. Zero-indexed.
+    int_chunk_rows : int
+        Maximum number of rows held in memory at once.
+    str_decimal : str, default="."
+        Decimal separator of the data-values, e.g. ','.
+    list_extra_columns : list(int), default=()
+        Additional columns to load as strings, e.g. customer-ID's.
+    int_start_byte : int, default=0
+        Offset in the file of the first row to load, see
+        load_time_and_data_from_txt.
+
+    Yields
+    ----------
+    arr_time : np.array
+        Array of time-values of a chunk, as strings.
+    arr_data : np.array
+        Array of data-values of a chunk.
+    list_arr_extra : list(np.array)
+        Arrays of the extra columns of a chunk, as strings.
+
+    Notes
+    ----------
+    Intended for files larger than available memory.
+    """
+    with open(str_path_txt, 'rb') as fp:
+        fp.seek(int_start_byte)
+        for df_chunk in read_time_and_data_columns(
+                fp, str_separator, int_time_column, int_data_column,
+                str_decimal, int_chunk_rows, list_extra_columns,
+                int_skip_rows=0 if int_start_byte else 1):
+            yield (df_chunk[int_time_column].to_numpy(),
+                   df_chunk[int_data_column].to_numpy(),
+                   [df_chunk[int_col].to_numpy()
+                    for int_col in list_extra_columns])
+
+
+def read_time_and_data_columns(
+        str_path_txt,
+        str_separator,
+        int_time_column,
+        int_data_column,
+        str_decimal=".",
+        int_chunk_rows=None,
+        list_extra_columns=(),
+        int_skip_rows=1):
+    """Reads selected columns of a delimited text-file with the C-engine.
+
+    Returns
+    ----------
+    df_contents : pd.DataFrame or iterator(pd.DataFrame)
+        Columns labeled by their zero-indexed position in the file. An
+        iterator of chunks if int_chunk_rows is given.
+
+    Notes
+    ----------
+    str_path_txt may also be a binary file-object, read from its position.
+    The first int_skip_rows rows are skipped as labels.
+    """
+    dict_dtypes = {int_time_column: str}
+    for int_col in list_extra_columns:
+        dict_dtypes[int_col] = str
+    return pd.read_csv(
+        str_path_txt, sep=str_separator, header=None, skiprows=int_skip_rows,
+        usecols=[int_time_column, int_data_column] + list(list_extra_columns),
+        dtype=dict_dtypes, decimal=str_decimal, engine="c",
+        chunksize=int_chunk_rows)
+
+
 def convert_general_time_array_to_datetime_array(
         arr_time_general,
         list_time_format,
         str_first_date_iso=""):
-    """Converts array of any time-format to python datetime.
+    """Converts array of any time-format to datetime64.
 
     Parameters
     ----------
     arr_time_general : np.arrary
         Array of timestamps on any format.
     list_time_format : list(string)
-        List of possible formats the timestamps are on.
+        List of possible formats the timestamps are on. A format of hours
+        only, e.g. "%H" or "H", means hours since str_first_date_iso, see
+        is_hour_offset_format.
     str_first_date_iso, str, default=""
         Date of first timestamp, iso format.
 
     Returns
     ----------
-    arr_time_dt : np.array(datetime)
-        Array of timestamps on datetime-format.
+    arr_time_dt : np.array(datetime64)
+        Array of timestamps on datetime64-format.
+
+    Raises
+    ----------
+    Exception
+        If list_time_format is a list and some timestamps match none of the
+        formats. All unparseable rows are reported at once.
+
+    Notes
+    ----------
+    The whole column is parsed at once. Hour-offsets are added to the first
+    date as an array, timestamps already loaded as dates (e.g. from excel)
+    are converted directly, and otherwise the format is detected once on a
+    sample of the column before being applied to every row. Rows not matching
+    the detected format are retried with the remaining formats.
+
+    If list_time_format is a single format, unparseable timestamps are
+    returned as NaT.
     """
-    arr_time_dt = [None] * len(arr_time_general)
-    for i in range(len(arr_time_general)):
-        if 'H' in list_time_format:
-            arr_time_dt[i] = (dt.datetime.fromisoformat(str_first_date_iso)
-                              + dt.timedelta(hours=int(arr_time_general[i])))
-        else:
-            if isinstance(list_time_format, list):
-                for str_format in list_time_format:
-                    try:
-                        arr_time_dt[i] = dt.datetime.strptime(
-                            str(arr_time_general[i]), str_format)
-                        bool_success = True
-                        break
-                    except:
-                        bool_success = False
-                        continue
-                if not bool_success:
-                    raise Exception(
-                        "Unable to apply any of the given date-formats")
-            else:
-                try:
-                    arr_time_dt[i] = dt.datetime.strptime(
-                        str(arr_time_general[i]), list_time_format)
-                except:
-                    pass
+    arr_time_general = np.asarray(arr_time_general)
+    if isinstance(list_time_format, list):
+        bool_hour_offsets = any(is_hour_offset_format(str_format)
+                                for str_format in list_time_format)
+    else:
+        bool_hour_offsets = is_hour_offset_format(list_time_format)
+    if bool_hour_offsets:
+        arr_hours = arr_time_general.astype(np.int64)
+        return (np.datetime64(str_first_date_iso, 's')
+                + arr_hours * np.timedelta64(1, 'h'))
+
+    if pd.api.types.infer_dtype(arr_time_general, skipna=True) in (
+            "datetime64", "datetime", "date"):
+        return np.asarray(pd.to_datetime(arr_time_general),
+                          dtype=ts.STR_TIME_DTYPE)
+
+    if isinstance(list_time_format, list):
+        list_formats = list_time_format
+    else:
+        list_formats = [list_time_format]
+    ser_time_str = pd.Series(arr_time_general, dtype=object).astype(str)
+    list_formats = sort_time_formats_by_sample(ser_time_str, list_formats)
+
+    arr_time_dt = np.full(len(ser_time_str), np.datetime64("NaT"),
+                          dtype=ts.STR_TIME_DTYPE)
+    arr_unparsed = np.ones(len(ser_time_str), dtype=bool)
+    for str_format in list_formats:
+        ser_parsed = pd.to_datetime(ser_time_str[arr_unparsed],
+                                    format=str_format, errors="coerce")
+        arr_parsed = np.asarray(ser_parsed, dtype=ts.STR_TIME_DTYPE)
+        arr_success = ~np.isnat(arr_parsed)
+        arr_indices = np.flatnonzero(arr_unparsed)[arr_success]
+        arr_time_dt[arr_indices] = arr_parsed[arr_success]
+        arr_unparsed[arr_indices] = False
+        if not arr_unparsed.any():
+            break
+
+    int_num_unparsed = np.count_nonzero(arr_unparsed)
+    if int_num_unparsed > 0:
+        arr_unparsed_indices = np.flatnonzero(arr_unparsed)
+        str_report = (str(int_num_unparsed) + " timestamps matched none of the"
+                      + " date-formats " + str(list_formats)
+                      + ", e.g. rows " + str(arr_unparsed_indices[:5].tolist())
+                      + ": " + str(list(ser_time_str.iloc[arr_unparsed_indices[:5]])))
+        if isinstance(list_time_format, list):
+            raise Exception("Unable to apply any of the given date-formats. "
+                            + str_report)
+        print("Warning:", str_report)
     return arr_time_dt
 
 
+def is_hour_offset_format(str_format):
+    """Returns whether a date-format means hours since the first date.
+
+    Notes
+    ----------
+    Any format containing 'H' and no other strptime-directive, such as "%H"
+    or "H", gives timestamps as whole hours since the first date.
+    """
+    return "H" in str_format and "%" not in str_format.replace("%H", "")
+
+
+def sort_time_formats_by_sample(ser_time_str, list_formats, int_sample_size=100):
+    """Orders date-formats by how many timestamps of a sample they match.
+
+    Parameters
+    ----------
+    ser_time_str : pd.Series(str)
+        Timestamps as strings.
+    list_formats : list(str)
+        Date-formats to order.
+    int_sample_size : int, default=100
+        Number of timestamps from the start of the column to test on.
+
+    Returns
+    ----------
+    list_formats_sorted : list(str)
+        Date-formats, best matching first.
+    """
+    if len(list_formats) < 2:
+        return list_formats
+    ser_sample = ser_time_str.iloc[:int_sample_size]
+    list_matches = [
+        pd.to_datetime(ser_sample, format=str_format, errors="coerce").notna().sum()
+        for str_format in list_formats]
+    arr_order = np.argsort(list_matches, kind="stable")[::-1]
+    return [list_formats[i] for i in arr_order]
+
+
 def convert_general_data_array_to_float_array(arr_data):
     """Converts array of selected data-formats to floats.
 
@@ -191,23 +385,122 @@ def convert_general_data_array_to_float_array(arr_data):
     ----------
     Also compensates for use of ',' instead of '.' as decimal separator.
 
+    The representation of the array is detected once, after which the whole
+    array is converted in a single operation. Entries which can not be
+    converted become NaN, and are counted in a warning.
     """
-    arr_data_float = [None] * len(arr_data)
-    for i in range(len(arr_data)):
-        data_i = arr_data[i]
-        if isinstance(data_i, float):
-            arr_data_float[i] = data_i
-        elif isinstance(data_i, str):
-            if ',' in data_i:
-                arr_data_float[i] = float(str.replace(data_i, ',', '.'))
-            else:
-                arr_data_float[i] = float(data_i)
-        else:
-            arr_data_float[i] = data_i
+    arr_data = np.asarray(arr_data)
+    if arr_data.dtype.kind in "biuf":
+        return arr_data.astype(np.float64)
+
+    ser_data = pd.Series(arr_data.astype(object))
+    str_representation = pd.api.types.infer_dtype(ser_data, skipna=True)
+    ser_missing = ser_data.isna()
+    if str_representation in ("string", "mixed", "mixed-integer"):
+        ser_replaced = ser_data.str.replace(',', '.', regex=False)
+        ser_missing |= (ser_replaced.str.strip().str.lower() == "nan")
+        ser_data = ser_replaced.where(ser_replaced.notna(), ser_data)
+
+    arr_data_float = pd.to_numeric(ser_data, errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan)
+    int_num_unconvertible = int(np.count_nonzero(
+        np.isnan(arr_data_float) & ~ser_missing.to_numpy()))
+    if int_num_unconvertible:
+        print("Warning: Could not convert", int_num_unconvertible,
+              "data-values to float, set to NaN")
     return arr_data_float
 
 
-def load_data_and_create_timeseries(dict_data_config):
+def load_file_and_create_timeseries(
+        str_path,
+        dict_data_config,
+        dict_cache_config=None,
+        int_start_byte=0):
+    """Loads a single data-file and creates timeseries.
+
+    Parameters
+    ----------
+    str_path : str
+        Path of the file to be loaded.
+    dict_data_config : dict
+        Structured dictionary containing at least how the timestamps are
+        formatted and the date of the first timestamp.
+    dict_cache_config : dict, default=None
+        Configuration of cache of parsed files, see init.data_cache. No
+        caching if None.
+    int_start_byte : int, default=0
+        Offset of the first row to load of a vertical txt- or csv-file, see
+        load_time_and_data_from_txt. Partially loaded files are not cached.
+
+    Returns
+    ----------
+    ts_data : timeseries
+        Timeseries of loaded data.
+    """
+    if int_start_byte:
+        dict_cache_config = None
+    if dict_cache_config is not None:
+        str_cache_key = data_cache.cache_key(
+            str_path, dict_data_config, dict_cache_config)
+        ts_data = data_cache.load_cached_timeseries(
+            dict_cache_config, str_cache_key)
+        if ts_data is not None:
+            print("Loaded", str_path, "from cache")
+            return ts_data
+
+    print("Loading", str_path + "...")
+    str_data_date_format = dict_data_config["date_format"]
+    str_data_first_date_iso = dict_data_config["first_date_iso"]
+    _str_data_filename, str_data_filetype = os.path.splitext(str_path)
+
+    if str_data_filetype == ".xlsx" or str_data_filetype == ".xls":
+        int_sheet = dict_data_config["sheet"]
+        int_time_column = dict_data_config["time_column"]
+        int_data_column = dict_data_config["data_column"]
+        bool_vertical_data = dict_data_config["vertical_data"]
+
+        arr_time, arr_data = load_time_and_data_from_excel(
+            str_path, int_sheet,
+            int_time_column, int_data_column, bool_vertical_data)
+
+    elif str_data_filetype == ".txt" or str_data_filetype == ".csv":
+        if str_data_filetype == ".csv":
+            str_separator = dict_data_config.get("separator", ",")
+        else:
+            str_separator = dict_data_config["separator"]
+        int_time_column = dict_data_config["time_column"]
+        int_data_column = dict_data_config["data_column"]
+        bool_vertical_data = dict_data_config["vertical_data"]
+        str_decimal = dict_data_config.get("decimal", ".")
+
+        arr_time, arr_data = load_time_and_data_from_txt(
+            str_path, str_separator,
+            int_time_column, int_data_column, bool_vertical_data,
+            str_decimal, int_start_byte)
+
+    # elif str_data_filetype == ".example"
+    #   Code for additional formats
+
+    else:
+        raise Exception("Unsupported file-type \"" + str_data_filetype + "\"")
+
+    arr_time_dt = convert_general_time_array_to_datetime_array(
+        arr_time, str_data_date_format, str_data_first_date_iso)
+    arr_data = convert_general_data_array_to_float_array(arr_data)
+
+    ts_data = ts.create_standard_time_series(arr_time_dt, arr_data)
+    if "resample_frequency" in dict_data_config:
+        ts_data = resampling.resample_timeseries(
+            ts_data, dict_data_config["resample_frequency"],
+            dict_data_config.get("resample_method", "mean"))
+
+    if dict_cache_config is not None:
+        data_cache.store_cached_timeseries(
+            dict_cache_config, str_cache_key, ts_data)
+    return ts_data
+
+
+def load_data_and_create_timeseries(dict_data_config, dict_cache_config=None):
     """Loads data based on structured dictionary and creates timeseries.
 
     Parameters
@@ -215,23 +508,43 @@ def load_data_and_create_timeseries(dict_data_config):
     dict_data_config : dict
         Structured dictionary containing at least the path of the data, 
         how the timestamps are formatted and the date of the first timestamp.
+    dict_cache_config : dict, default=None
+        Configuration of cache of parsed files, see init.data_cache. No
+        caching if None.
 
     Returns
     ----------
-    ts_data : timeseries = np.array([datetime, float])
-        Timeseries of loaded data.
+    dict_loaded_ts : dict(timeseries)
+        Timeseries of loaded data, keyed by filename without extension.
+
+    Raises
+    ----------
+    Exception
+        If any file fails to load, listing every failed file.
 
     Notes
     ----------
     Main functionality of this module.
+
+    If dict_data_config contains "resample_frequency" ("15min", "h" or "D"),
+    the data is resampled with "resample_method" (default "mean") after
+    loading, see objects.resampling.
+
+    If dict_data_config contains "workers" larger than 1, files are loaded in
+    parallel by that many processes. Keys are ordered by filename regardless.
+
+    If dict_data_config contains "ID_column", "path" is instead a single file
+    containing many load-points, which is loaded by load_data_grouped_by_ID.
     """
+    if "ID_column" in dict_data_config:
+        return load_data_grouped_by_ID(dict_data_config)
+
     str_data_path = dict_data_config["path"]
-    str_data_date_format = dict_data_config["date_format"]
-    str_data_first_date_iso = dict_data_config["first_date_iso"]
+    int_workers = dict_data_config.get("workers", 1)
 
     list_paths_to_be_loaded = []
     if os.path.isdir(str_data_path):
-        for str_file_path in os.listdir(str_data_path):
+        for str_file_path in sorted(os.listdir(str_data_path)):
             list_paths_to_be_loaded.append(str_data_path + str_file_path)
     else:
         raise(Exception("Directory \"" + str_data_path +"\" does not exist!"))
@@ -242,85 +555,406 @@ def load_data_and_create_timeseries(dict_data_config):
         # This change means temperature-data now must be stored in a directory.
 
     dict_loaded_ts = {}
-    for str_path in list_paths_to_be_loaded:
-        print("Loading", str_path + "...")
-        _str_data_filename, str_data_filetype = os.path.splitext(str_path)
+    list_errors = []
+    if int_workers > 1:
+        print("Loading", len(list_paths_to_be_loaded), "files using",
+              int_workers, "processes...")
+        with ProcessPoolExecutor(max_workers=int_workers) as executor:
+            list_futures = [
+                executor.submit(load_file_and_create_timeseries,
+                                str_path, dict_data_config, dict_cache_config)
+                for str_path in list_paths_to_be_loaded]
+            for str_path, future in zip(list_paths_to_be_loaded, list_futures):
+                try:
+                    dict_loaded_ts[data_file_key(str_path, str_data_path)] = \
+                        future.result()
+                except Exception as e:
+                    list_errors.append((str_path, e))
+    else:
+        for str_path in list_paths_to_be_loaded:
+            try:
+                dict_loaded_ts[data_file_key(str_path, str_data_path)] = \
+                    load_file_and_create_timeseries(
+                        str_path, dict_data_config, dict_cache_config)
+            except Exception as e:
+                list_errors.append((str_path, e))
 
-        if str_data_filetype == ".xlsx" or str_data_filetype == ".xls":
-            int_sheet = dict_data_config["sheet"]
-            int_time_column = dict_data_config["time_column"]
-            int_data_column = dict_data_config["data_column"]
-            bool_vertical_data = dict_data_config["vertical_data"]
+    if dict_cache_config is not None:
+        data_cache.evict_cache(dict_cache_config)
 
-            arr_time, arr_data = load_time_and_data_from_excel(
-                str_path, int_sheet,
-                int_time_column, int_data_column, bool_vertical_data)
+    if list_errors:
+        raise Exception(
+            "Failed to load " + str(len(list_errors)) + " file(s):\n"
+            + "\n".join(str_path + ": " + repr(e) for str_path, e in list_errors))
+    return dict_loaded_ts
 
-        elif str_data_filetype == ".txt":
-            str_separator = dict_data_config["separator"]
-            int_time_column = dict_data_config["time_column"]
-            int_data_column = dict_data_config["data_column"]
-            bool_vertical_data = dict_data_config["vertical_data"]
 
-            arr_time, arr_data = load_time_and_data_from_txt(
-                str_path, str_separator,
-                int_time_column, int_data_column, bool_vertical_data)
+def load_data_grouped_by_ID(
+        dict_data_config, int_start_byte=0, dt64_first_time=None,
+        str_store_path=""):
+    """Streams a single file of many load-points into a LoadMatrix.
+
+    Parameters
+    ----------
+    dict_data_config : dict
+        Structured dictionary as for load_data_and_create_timeseries, where
+        "path" is a single vertical txt- or csv-file and "ID_column" is the
+        zero-indexed column of node-ID's. Also requires "last_date_iso".
+    int_start_byte : int, default=0
+        Offset of the first row to load, see load_time_and_data_from_txt.
+    dt64_first_time : np.datetime64, default=None
+        First timestamp of the time-axis, if other than "first_date_iso".
+    str_store_path : str, default=""
+        Directory of a load-store to stream the load-points into instead of
+        memory, see objects.load_store.
+
+    Returns
+    ----------
+    load_matrix : LoadMatrix
+        Load-points of loaded data, keyed by node-ID. Memory-mapped from the
+        load-store if str_store_path is given.
+
+    Notes
+    ----------
+    Replaces splitting the file by ID with data_formatting.split_txt_by_ID
+    and loading the resulting directory. The file is read once, in chunks of
+    "chunk_rows" rows (default 1 000 000), and every chunk is written directly
+    into the rows of its load-points. Memory usage is thus bounded by the
+    size of a chunk and the resulting load-points, not the size of the file.
+    If str_store_path is given, the rows are written to the memory-mapped
+    load-store, growing it as new load-points appear, and memory usage is
+    bounded by the size of a chunk alone.
 
-        elif str_data_filetype == ".csv":
-            raise Exception("Not yet implemented")
+    The time-axis spans "first_date_iso" to "last_date_iso" in steps of
+    "frequency" ("15min", "h" or "D", default "h"). Datapoints outside it
+    are left out and reported. If a datapoint occurs several times, the last
+    one is kept. Data is resampled after loading if "resample_frequency" is
+    given.
+    """
+    str_path = dict_data_config["path"]
+    _str_data_filename, str_data_filetype = os.path.splitext(str_path)
+    if str_data_filetype == ".csv":
+        str_separator = dict_data_config.get("separator", ",")
+    elif str_data_filetype == ".txt":
+        str_separator = dict_data_config["separator"]
+    else:
+        raise Exception("Unsupported file-type \"" + str_data_filetype
+                        + "\" for data grouped by ID")
+    str_data_date_format = dict_data_config["date_format"]
+    str_data_first_date_iso = dict_data_config["first_date_iso"]
+    int_ID_column = dict_data_config["ID_column"]
+    int_chunk_rows = dict_data_config.get("chunk_rows", 1000000)
 
-        # elif str_data_filetype == ".example"
-        #   Code for additional formats
+    int_step = resampling.frequency_to_seconds(
+        dict_data_config.get("frequency", "h"))
+    if dt64_first_time is None:
+        dt64_first_time = np.datetime64(str_data_first_date_iso, 's')
+    arr_time = np.arange(
+        np.datetime64(dt64_first_time, 's'),
+        np.datetime64(dict_data_config["last_date_iso"], 'D')
+        + np.timedelta64(1, 'D'),
+        np.timedelta64(int_step, 's'))
+    if str_store_path:
+        load_store.create_load_store(
+            str_store_path, arr_time, load_store.INT_MIN_ROWS)
+        dict_rows = {}
+    else:
+        load_matrix = LoadMatrix(arr_time)
 
+    print("Loading", str_path, "grouped by ID...")
+    fl_time_start = time.perf_counter()
+    int_num_rows = 0
+    int_num_skipped = 0
+    for arr_time_chunk, arr_data_chunk, [arr_IDs] in \
+            iterate_time_and_data_chunks_from_txt(
+                str_path, str_separator,
+                dict_data_config["time_column"],
+                dict_data_config["data_column"],
+                int_chunk_rows, dict_data_config.get("decimal", "."),
+                [int_ID_column], int_start_byte):
         arr_time_dt = convert_general_time_array_to_datetime_array(
-            arr_time, str_data_date_format, str_data_first_date_iso)
-        arr_data = convert_general_data_array_to_float_array(arr_data)
+            arr_time_chunk, str_data_date_format, str_data_first_date_iso)
+        arr_data_chunk = convert_general_data_array_to_float_array(
+            arr_data_chunk)
+
+        arr_offset = (arr_time_dt.view(np.int64)
+                      - np.datetime64(dt64_first_time, 's').view(np.int64))
+        arr_on_axis = (~np.isnat(arr_time_dt) & (arr_offset >= 0)
+                       & (arr_offset % int_step == 0)
+                       & (arr_offset < len(arr_time) * int_step)
+                       & ~pd.isna(arr_IDs))
+        if str_store_path:
+            load_store.write_datapoints_to_load_store(
+                str_store_path, dict_rows, arr_IDs[arr_on_axis],
+                arr_offset[arr_on_axis] // int_step,
+                arr_data_chunk[arr_on_axis])
+            int_num_IDs = len(dict_rows)
+        else:
+            load_matrix.write_datapoints(
+                arr_IDs[arr_on_axis], arr_time_dt[arr_on_axis],
+                arr_data_chunk[arr_on_axis])
+            int_num_IDs = len(load_matrix)
+
+        int_num_rows += len(arr_time_chunk)
+        int_num_skipped += len(arr_time_chunk) - np.count_nonzero(arr_on_axis)
+        print("Loaded", int_num_rows, "rows of", int_num_IDs, "load-points")
+
+    fl_elapsed = time.perf_counter() - fl_time_start
+    print("Loaded", int_num_rows, "rows in", round(fl_elapsed, 1), "s,",
+          round(int_num_rows / max(fl_elapsed, 1e-9)), "rows/s")
+    if int_num_skipped:
+        print("Warning: Left out", int_num_skipped,
+              "datapoints without ID or outside the time-axis")
+
+    if str_store_path:
+        load_store.complete_load_store(str_store_path, list(dict_rows))
+        if "resample_frequency" in dict_data_config:
+            load_store.resample_load_store(
+                str_store_path, dict_data_config["resample_frequency"],
+                dict_data_config.get("resample_method", "mean"))
+        return load_store.open_load_store(str_store_path)
+
+    if "resample_frequency" in dict_data_config:
+        arr_time_new, arr_data_new = resampling.resample_arrays(
+            load_matrix.arr_time, load_matrix.arr_data,
+            dict_data_config["resample_frequency"],
+            dict_data_config.get("resample_method", "mean"))
+        load_matrix = LoadMatrix.from_arrays(
+            arr_time_new, load_matrix.list_IDs, arr_data_new)
+    return load_matrix
+
+
+def load_new_data_and_create_timeseries(
+        dict_data_config, dict_ingested, dict_cache_config=None):
+    """Loads only data added to data-files since they were last ingested.
+
+    Parameters
+    ----------
+    dict_data_config : dict
+        Structured dictionary as for load_data_and_create_timeseries.
+    dict_ingested : dict
+        Record of ingested data-files, as returned by an earlier call. Empty
+        if no data is ingested yet.
+    dict_cache_config : dict, default=None
+        Configuration of cache of parsed files, see init.data_cache. No
+        caching if None.
+
+    Returns
+    ----------
+    data_new : dict(timeseries) or LoadMatrix
+        Datapoints after the last ingested datapoint of every file, as
+        returned by load_data_and_create_timeseries. Files without new
+        datapoints are left out.
+    dict_ingested_new : dict
+        Updated record of ingested data-files.
+
+    Raises
+    ----------
+    Exception
+        If an ingested data-file has shrunk.
+
+    Notes
+    ----------
+    Files are fingerprinted by size and modification time, and unchanged
+    files are not read at all. Data is assumed to only be appended to files,
+    so vertical txt- and csv-files that have grown are read from the end of
+    their ingested part. Other changed files are read whole, and datapoints
+    up to the last ingested timestamp are left out.
 
-        ts_data = ts.create_standard_time_series(arr_time_dt, arr_data)
+    If resampling, updates should start at the start of a resampling-period,
+    as periods are not merged across updates.
+    """
+    str_data_path = dict_data_config["path"]
+    bool_grouped_by_ID = "ID_column" in dict_data_config
+    list_paths = list_data_file_paths(dict_data_config)
 
-        if os.path.isdir(str_data_path):
-            str_key_name, _temp = os.path.splitext(
-                str_path.replace(str_data_path, ""))
+    dict_files_ingested = dict_ingested.get("files", {})
+    dict_files_new = dict(dict_files_ingested)
+    if bool_grouped_by_ID:
+        data_new = LoadMatrix()
+    else:
+        data_new = {}
+    for str_path in list_paths:
+        stat_file = os.stat(str_path)
+        dict_file = dict_files_ingested.get(str_path)
+        if dict_file is not None:
+            if (stat_file.st_size == dict_file["size"]
+                    and stat_file.st_mtime_ns == dict_file["mtime_ns"]):
+                continue
+            if stat_file.st_size < dict_file["size"]:
+                raise Exception("Data-file \"" + str_path + "\" has shrunk "
+                                "since it was ingested")
+
+        _str_filename, str_filetype = os.path.splitext(str_path)
+        bool_appendable = (str_filetype in (".txt", ".csv") and (
+            bool_grouped_by_ID or bool(dict_data_config.get("vertical_data"))))
+        if dict_file is not None and bool_appendable:
+            int_start_byte = dict_file["size"]
+        else:
+            int_start_byte = 0
+        if dict_file is not None and dict_file["last_time"] is not None:
+            dt64_last_time = np.datetime64(dict_file["last_time"], 's')
         else:
-            str_key_name = str_data_path
-        dict_loaded_ts[str_key_name] = ts_data
+            dt64_last_time = None
 
-    return dict_loaded_ts
+        if bool_grouped_by_ID:
+            if dt64_last_time is None:
+                dt64_first_time = None
+            else:
+                dt64_first_time = dt64_last_time + np.timedelta64(
+                    resampling.frequency_to_seconds(
+                        dict_data_config.get("frequency", "h")), 's')
+            data_new = load_data_grouped_by_ID(
+                dict_data_config, int_start_byte, dt64_first_time)
+            arr_time_new = data_new.arr_time
+        else:
+            ts_data = load_file_and_create_timeseries(
+                str_path, dict_data_config, dict_cache_config, int_start_byte)
+            arr_new = ~np.isnat(ts_data.arr_time)
+            if dt64_last_time is not None:
+                arr_new &= ts_data.arr_time > dt64_last_time
+            ts_data = ts_data[arr_new]
+            arr_time_new = ts_data.arr_time
+            if len(ts_data):
+                data_new[data_file_key(str_path, str_data_path)] = ts_data
+
+        if len(arr_time_new):
+            dt64_last_time = arr_time_new.max()
+        dict_files_new[str_path] = {
+            "size": stat_file.st_size,
+            "mtime_ns": stat_file.st_mtime_ns,
+            "last_time": None if dt64_last_time is None else str(dt64_last_time)
+        }
+    print("Loaded new data of", len(data_new), "data-sets")
+    return data_new, {"files": dict_files_new}
+
+
+def list_data_file_paths(dict_data_config):
+    """Returns paths of the data-files of a data-source, sorted by filename.
+
+    Raises
+    ----------
+    Exception
+        If the directory of the data-files does not exist.
+    """
+    str_data_path = dict_data_config["path"]
+    if "ID_column" in dict_data_config:
+        return [str_data_path]
+    if not os.path.isdir(str_data_path):
+        raise(Exception("Directory \"" + str_data_path +"\" does not exist!"))
+    return [str_data_path + str_file_path
+            for str_file_path in sorted(os.listdir(str_data_path))]
+
+
+def load_data_and_create_load_store(dict_data_config, dict_cache_config=None):
+    """Loads data from its load-store, writing the store first if needed.
+
+    Parameters
+    ----------
+    dict_data_config : dict
+        Structured dictionary as for load_data_and_create_timeseries, with
+        "store_path" set to the directory of the store.
+    dict_cache_config : dict, default=None
+        Configuration of cache of parsed files, see init.data_cache.
+
+    Returns
+    ----------
+    load_matrix : LoadMatrix
+        Load-points of the store, memory-mapped read-only.
 
+    Notes
+    ----------
+    The store is keyed by a fingerprint of the data-files and the config,
+    see data_cache.files_cache_key, saved next to it. A store whose key does
+    not match the current data-files, e.g. because one was added, edited or
+    removed, is written again. A single file grouped by ID is streamed
+    directly into the store, see load_data_grouped_by_ID.
+    """
+    str_store_path = dict_data_config["store_path"]
+    str_source_key = data_cache.files_cache_key(
+        list_data_file_paths(dict_data_config), dict_data_config,
+        dict_cache_config or {})
+    if load_store.load_store_exists(str_store_path, str_source_key):
+        print("Opening load-store", str_store_path + "...")
+        return load_store.open_load_store(str_store_path)
+
+    if load_store.load_store_exists(str_store_path):
+        print("Data-files have changed since load-store", str_store_path,
+              "was written")
+    if "ID_column" in dict_data_config:
+        load_data_grouped_by_ID(dict_data_config, str_store_path=str_store_path)
+    else:
+        load_store.write_load_store(
+            str_store_path,
+            load_data_and_create_timeseries(dict_data_config, dict_cache_config))
+    load_store.write_load_store_key(str_store_path, str_source_key)
+    return load_store.open_load_store(str_store_path)
 
-def load_network_from_directory(dict_network_config):
+
+def data_file_key(str_path, str_data_path):
+    """Returns the key a loaded data-file is stored under.
+    """
+    str_key_name, _temp = os.path.splitext(str_path.replace(str_data_path, ""))
+    return str_key_name
+
+
+def load_network_from_directory(dict_network_config, dict_cache_config=None):
     """Loads directory of MATPOWER-formatted csv-files to dictionary.
 
     Parameters
     ----------
     dict_network_config : dict
         Dictionary of file-configuration, including path.
+    dict_cache_config : dict, default=None
+        Configuration of cache of parsed files, see init.data_cache. No
+        caching if None.
 
     Returns
     ----------
     dict_network : dict
         Dictionary of network-information required to build graph-representation.
+
+    Notes
+    ----------
+    Columns are typed by objects.network.create_typed_network_table, ID's as
+    interned strings and all other columns as floats.
     """
     str_dir_path = dict_network_config["path"]
     str_separator = dict_network_config["separator"]
 
     list_paths_to_be_loaded = []
-    for str_file_path in os.listdir(str_dir_path):
+    for str_file_path in sorted(os.listdir(str_dir_path)):
         list_paths_to_be_loaded.append(str_dir_path + str_file_path)
 
+    if dict_cache_config is not None:
+        str_cache_key = data_cache.files_cache_key(
+            list_paths_to_be_loaded, dict_network_config, dict_cache_config)
+        dict_network = data_cache.load_cached_network(
+            dict_cache_config, str_cache_key)
+        if dict_network is not None:
+            print("Loaded network", str_dir_path, "from cache")
+            return dict_network
+
     dict_network = {}
     for str_path in list_paths_to_be_loaded:
         print("Loading", str_path + "...")
 
-        df_network_info = pd.read_csv(str_path, sep=str_separator, dtype=str)
-        dict_network_info = {}
-        for col in df_network_info:
-            dict_network_info[col] = np.array(df_network_info[col])
-
         str_data_filename, _str_data_filetype = os.path.splitext(str_path)
         str_key_name = str_data_filename.replace(str_dir_path, "")
-        dict_network[str_key_name] = dict_network_info
 
+        dict_dtypes = {str_column: str for str_column
+                       in network.DICT_ID_COLUMNS.get(str_key_name, [])}
+        df_network_info = pd.read_csv(str_path, sep=str_separator,
+                                      dtype=dict_dtypes)
+        dict_network_info = {}
+        for col in df_network_info:
+            dict_network_info[col] = df_network_info[col].to_numpy()
+        dict_network[str_key_name] = network.create_typed_network_table(
+            str_key_name, dict_network_info)
+
+    if dict_cache_config is not None:
+        data_cache.store_cached_network(
+            dict_cache_config, str_cache_key, dict_network)
     return dict_network
 
 
@@ -335,6 +969,18 @@ def initialize_config_and_data(str_config_path):
         Pairs of data-sources as strings and loaded datafiles on timeseries-format.
     dict_network : dict
         Dictionary of network-information required to build graph-representation.
+
+    Notes
+    ----------
+    A data-source with "store_path" set is written to a memory-mapped
+    load-store at that path the first time it is loaded, and read from the
+    store afterwards until its data-files change, see
+    load_data_and_create_load_store.
+
+    If the config has an [incremental]-section, only data added since the
+    checkpoint is loaded, and the updated record of ingested data-files is
+    keyed "ingested" in dict_data, see init.incremental. Load-stores are then
+    not used.
     """
     ## Loading config ###
     print("Preparing to load config-file:", str_config_path)
@@ -351,17 +997,32 @@ def initialize_config_and_data(str_config_path):
     ### Loading data ###
     print("Beginning to load data...")
     dict_data_config = dict_config["data"]
+    dict_cache_config = dict_config.get("cache", None)
     dict_data = {}
+    if "incremental" in dict_config:
+        dict_ingested = incremental.load_checkpoint_ingested(dict_config)
+        dict_data["ingested"] = {}
     for data_source in dict_data_config:
-        dict_data[data_source] = load_data_and_create_timeseries(
-            dict_data_config[data_source])
+        dict_source_config = dict_data_config[data_source]
+        str_store_path = dict_source_config.get("store_path", "")
+        if "incremental" in dict_config:
+            dict_data[data_source], dict_data["ingested"][data_source] = \
+                load_new_data_and_create_timeseries(
+                    dict_source_config, dict_ingested.get(data_source, {}),
+                    dict_cache_config)
+        elif str_store_path:
+            dict_data[data_source] = load_data_and_create_load_store(
+                dict_source_config, dict_cache_config)
+        else:
+            dict_data[data_source] = load_data_and_create_timeseries(
+                dict_source_config, dict_cache_config)
         print("Successfully loaded:", data_source)
 
     ### Loading network ###
     print("Beginning to load network...")
     dict_network_config = dict_config["network"]
     dict_network = load_network_from_directory(
-        dict_network_config)
+        dict_network_config, dict_cache_config)
 
     print("Successfully loaded all components")
     return dict_config, dict_data, dict_network
@@ -0,0 +1,423 @@
+"""Module for updating prepared load-points with newly measured data.
+
+Notes
+----------
+Configured by the optional [incremental]-section of config.toml:
+
+    [incremental]
+    checkpoint_path = "out_data/checkpoint/"   # Directory of the checkpoint
+
+Instead of loading, preprocessing and modelling the whole history on every
+run, only data added to the data-files since the last run is loaded, see
+data_loading.load_new_data_and_create_timeseries. What is needed to extend
+the preprocessing and modelling is kept in a checkpoint-directory containing
+
+    state.json      Configuration the checkpoint is valid for, and the
+                    ingested data-files.
+    state.npz       Running sums and counts of the daily normal temperature,
+                    the last days of temperature, the n-day average
+                    temperature, and running sums, counts and maxima of the
+                    corrected loads by day-type, month and hour.
+    raw/            Load-store of all ingested load-measurements.
+    corrected/      Load-store of the preprocessed load-measurements.
+
+The load-stores are extended in place, see load_store.extend_load_store_time,
+such that only columns of new or recorrected loads are written on an update.
+
+On every update
+    - the daily normal temperature is updated from its sums and counts,
+    - the n-day average temperature is extended from the last days,
+    - new loads are corrected, and earlier loads are corrected anew only on
+      the dates whose normal temperature changed,
+    - the statistics of the Tønne-model are recomputed only for months with
+      new or recorrected loads, and variation values are found from them,
+      see modelling.models.toenne.compute_variation_statistics.
+
+The result equals preparing the whole history with
+load_points.prepare_all_loads, up to rounding. A run without a checkpoint
+ingests all data and creates it. The checkpoint is only valid for the
+configuration it was created with, other than "last_date_iso", and must be
+deleted if the configuration changes. state.json is removed while updating,
+such that an interrupted update makes the next run ingest all data anew.
+"""
+import os
+import json
+import numpy as np
+from objects import timeseries as ts
+from objects import load_store
+from objects import load_points
+from objects.load_points import LoadMatrix
+from init import preprocessing
+from modelling import modelling
+from modelling.models import toenne
+import utilities
+
+INT_CHECKPOINT_FORMAT_VERSION = 1
+
+STR_STATE_JSON_FILENAME = "state.json"
+STR_STATE_NPZ_FILENAME = "state.npz"
+STR_RAW_DIRNAME = "raw"
+STR_CORRECTED_DIRNAME = "corrected"
+
+# Data-config fields which may change between updates
+LIST_IGNORED_DATA_CONFIG_FIELDS = [
+    "last_date_iso", "workers", "store_path", "chunk_rows"]
+
+
+def checkpoint_fingerprint(dict_config):
+    """Returns the parts of the configuration a checkpoint depends on.
+    """
+    dict_data_config = {}
+    for str_data_source, dict_source_config in dict_config["data"].items():
+        dict_data_config[str_data_source] = {
+            key: dict_source_config[key] for key in dict_source_config
+            if key not in LIST_IGNORED_DATA_CONFIG_FIELDS}
+    dict_fingerprint = {
+        "version": INT_CHECKPOINT_FORMAT_VERSION,
+        "data": dict_data_config,
+        "preprocessing": dict_config["preprocessing"],
+        "modelling": dict_config["modelling"]
+    }
+    # Round-trip, such that it compares equal to the stored fingerprint
+    return json.loads(json.dumps(dict_fingerprint, sort_keys=True, default=str))
+
+
+def load_checkpoint_ingested(dict_config):
+    """Returns record of data-files ingested by the checkpoint.
+
+    Returns
+    ----------
+    dict_ingested : dict
+        Record of every data-source, see
+        data_loading.load_new_data_and_create_timeseries. Empty if there is
+        no checkpoint.
+
+    Raises
+    ----------
+    Exception
+        If the checkpoint was created with another configuration.
+    """
+    str_checkpoint_path = dict_config["incremental"]["checkpoint_path"]
+    str_json_path = os.path.join(str_checkpoint_path, STR_STATE_JSON_FILENAME)
+    if not os.path.isfile(str_json_path):
+        print("No checkpoint at", str_checkpoint_path + ", ingesting all data")
+        return {}
+    with open(str_json_path, 'r') as fp:
+        dict_state = json.load(fp)
+    if dict_state["config"] != checkpoint_fingerprint(dict_config):
+        raise Exception("Checkpoint \"" + str_checkpoint_path + "\" was created "
+                        "with another configuration, delete it to prepare "
+                        "all data anew")
+    return dict_state["ingested"]
+
+
+def load_checkpoint_state(str_checkpoint_path):
+    """Returns running state of the checkpoint, or an empty state if none.
+
+    Returns
+    ----------
+    dict_state : dict
+        Arrays of state.npz.
+    """
+    str_json_path = os.path.join(str_checkpoint_path, STR_STATE_JSON_FILENAME)
+    if not os.path.isfile(str_json_path):
+        return {
+            "normal_sums": np.zeros(366),
+            "normal_counts": np.zeros(366, dtype=np.int64),
+            "temperature_tail_time": np.array([], dtype=ts.STR_TIME_DTYPE),
+            "temperature_tail_data": np.array([]),
+            "n_day_average_time": np.array([], dtype=ts.STR_TIME_DTYPE),
+            "n_day_average_data": np.array([]),
+            "variation_sums": np.zeros((0, toenne.INT_NUM_DAYTYPES, 12, 24)),
+            "variation_counts": np.zeros(
+                (0, toenne.INT_NUM_DAYTYPES, 12, 24), dtype=np.int64),
+            "variation_maxima": np.zeros((0, toenne.INT_NUM_DAYTYPES, 12, 24))
+        }
+    with np.load(os.path.join(str_checkpoint_path,
+                              STR_STATE_NPZ_FILENAME)) as npz_state:
+        dict_state = {str_name: npz_state[str_name] for str_name in npz_state.files}
+    return dict_state
+
+
+def begin_checkpoint_update(str_checkpoint_path):
+    """Marks checkpoint as being updated, creating empty load-stores if none.
+
+    Notes
+    ----------
+    state.json is removed before the load-stores are changed in place, such
+    that an interrupted update leaves no checkpoint, and the next run ingests
+    all data anew.
+    """
+    str_json_path = os.path.join(str_checkpoint_path, STR_STATE_JSON_FILENAME)
+    if os.path.isfile(str_json_path):
+        os.remove(str_json_path)
+        return
+    for str_dirname in (STR_RAW_DIRNAME, STR_CORRECTED_DIRNAME):
+        str_store_path = os.path.join(str_checkpoint_path, str_dirname)
+        load_store.create_load_store(
+            str_store_path, np.array([], dtype=ts.STR_TIME_DTYPE), 0)
+        load_store.complete_load_store(str_store_path, [])
+    return
+
+
+def write_checkpoint_state(str_checkpoint_path, dict_config, dict_ingested,
+                           dict_state):
+    """Writes running state of the checkpoint, completing the update.
+
+    Notes
+    ----------
+    state.json is written last, after the load-stores and state.npz, marking
+    the checkpoint as valid.
+    """
+    str_npz_path = os.path.join(str_checkpoint_path, STR_STATE_NPZ_FILENAME)
+    str_json_path = os.path.join(str_checkpoint_path, STR_STATE_JSON_FILENAME)
+    np.savez(str_npz_path + ".new.npz", **dict_state)
+    os.replace(str_npz_path + ".new.npz", str_npz_path)
+    with open(str_json_path + ".new", 'w') as fp:
+        json.dump({"config": checkpoint_fingerprint(dict_config),
+                   "ingested": dict_ingested}, fp, indent=1)
+    os.replace(str_json_path + ".new", str_json_path)
+    print("Wrote checkpoint to", str_checkpoint_path)
+    return
+
+
+def merge_new_loads(str_raw_path, str_corrected_path, data_new):
+    """Writes new loads to the raw load-store, extending both load-stores.
+
+    Parameters
+    ----------
+    str_raw_path, str_corrected_path : str
+        Directories of the raw and corrected load-stores of the checkpoint.
+    data_new : dict(timeseries) or LoadMatrix
+        New load-points, overwriting old datapoints at equal timestamps.
+
+    Returns
+    ----------
+    arr_time : np.array(datetime64)
+        Union of the time-axes of the old and new loads.
+    list_IDs : list(str)
+        Node-ID's of the old loads, followed by new node-ID's.
+    arr_new_columns : np.array(bool)
+        Whether each timestep has new datapoints.
+
+    Notes
+    ----------
+    Both stores are given the union time-axis, see
+    load_store.extend_load_store_time, and new load-points are given rows of
+    NaN. Only the new datapoints are written, and the corrected store is left
+    for the caller to fill.
+    """
+    if not isinstance(data_new, LoadMatrix):
+        data_new = LoadMatrix.from_timeseries(data_new)
+    arr_data_new = data_new.arr_data
+    arr_rows, arr_columns_new = np.nonzero(~np.isnan(arr_data_new))
+    arr_IDs = np.array(data_new.list_IDs, dtype=str)[arr_rows]
+    arr_time_points = data_new.arr_time[arr_columns_new]
+    arr_data_points = arr_data_new[arr_rows, arr_columns_new]
+    del data_new, arr_data_new
+
+    arr_time_new = np.unique(arr_time_points)
+    arr_time = np.union1d(np.load(os.path.join(
+        str_raw_path, load_store.STR_TIME_FILENAME)), arr_time_new)
+    load_store.extend_load_store_time(str_raw_path, arr_time)
+    load_store.extend_load_store_time(str_corrected_path, arr_time)
+
+    dict_rows = {str_ID: i for i, str_ID in enumerate(
+        load_store.open_load_store(str_raw_path).list_IDs)}
+    load_store.write_datapoints_to_load_store(
+        str_raw_path, dict_rows, arr_IDs,
+        np.searchsorted(arr_time, arr_time_points), arr_data_points)
+    list_IDs = list(dict_rows)
+    load_store.complete_load_store(str_raw_path, list_IDs)
+    load_store.complete_load_store(str_corrected_path, list_IDs)
+    arr_new_columns = np.isin(arr_time, arr_time_new, assume_unique=True)
+    return arr_time, list_IDs, arr_new_columns
+
+
+def update_temperature(dict_config, dict_state, ts_temperature_new):
+    """Updates normal and n-day average temperature of state in place.
+
+    Returns
+    ----------
+    arr_changed_days : np.array(int)
+        Days of a leap year whose normal temperature changed, see
+        preprocessing.day_of_leap_year.
+    """
+    dict_load_config = dict_config["data"]["load_measurements"]
+    arr_daily_normal_old = preprocessing.compute_daily_normal_from_sums(
+        dict_state["normal_sums"], dict_state["normal_counts"])
+    arr_sums_new, arr_counts_new = preprocessing.compute_daily_sums_and_counts(
+        ts_temperature_new)
+    dict_state["normal_sums"] = dict_state["normal_sums"] + arr_sums_new
+    dict_state["normal_counts"] = dict_state["normal_counts"] + arr_counts_new
+    arr_daily_normal = preprocessing.compute_daily_normal_from_sums(
+        dict_state["normal_sums"], dict_state["normal_counts"])
+    arr_changed_days = np.flatnonzero(
+        (arr_daily_normal != arr_daily_normal_old)
+        & ~(np.isnan(arr_daily_normal) & np.isnan(arr_daily_normal_old)))
+
+    # Averages only depend on earlier days, so existing ones are kept and
+    # new ones are found from the last days before them
+    ts_basis = ts.create_standard_time_series(
+        np.concatenate((dict_state["temperature_tail_time"],
+                        ts_temperature_new.arr_time)),
+        np.concatenate((dict_state["temperature_tail_data"],
+                        ts_temperature_new.arr_data)))
+    if len(dict_state["n_day_average_time"]):
+        date_start = (dict_state["n_day_average_time"][-1].astype("datetime64[D]")
+                      + np.timedelta64(1, 'D'))
+    else:
+        date_start = np.datetime64(dict_load_config["first_date_iso"], 'D')
+    date_end = np.datetime64(dict_load_config["last_date_iso"], 'D')
+    if date_start <= date_end:
+        ts_average_new = preprocessing.create_n_day_average_timeseries(
+            ts_basis, date_start, date_end,
+            load_points.INT_TEMPERATURE_AVERAGE_DAYS)
+        dict_state["n_day_average_time"] = np.concatenate(
+            (dict_state["n_day_average_time"], ts_average_new.arr_time))
+        dict_state["n_day_average_data"] = np.concatenate(
+            (dict_state["n_day_average_data"], ts_average_new.arr_data))
+        date_start = date_end + np.timedelta64(1, 'D')
+
+    int_tail_start = max(np.searchsorted(
+        ts_basis.arr_time.astype("datetime64[D]"), date_start)
+        - (load_points.INT_TEMPERATURE_AVERAGE_DAYS - 1), 0)
+    dict_state["temperature_tail_time"] = ts_basis.arr_time[int_tail_start:]
+    dict_state["temperature_tail_data"] = ts_basis.arr_data[int_tail_start:]
+    return arr_changed_days
+
+
+def update_all_loads(dict_config, dict_data):
+    """Prepares all load-points from the checkpoint and data added since.
+
+    Parameters
+    ----------
+    dict_config : dict
+        Configuration-file, including an [incremental]-section.
+    dict_data : dict
+        Data added since the checkpoint and the updated record of ingested
+        data-files keyed "ingested", as by
+        data_loading.initialize_config_and_data in incremental mode.
+
+    Returns
+    ----------
+    dict_loads_ts : LoadMatrix
+        Prepared load-points of the whole history, as by
+        load_points.prepare_all_loads.
+
+    Notes
+    ----------
+    Load-points are prepared as when not lazily loaded, regardless of
+    "lazy_load_points".
+    """
+    print("Updating all loads from checkpoint...")
+    str_checkpoint_path = dict_config["incremental"]["checkpoint_path"]
+    str_raw_path = os.path.join(str_checkpoint_path, STR_RAW_DIRNAME)
+    str_corrected_path = os.path.join(
+        str_checkpoint_path, STR_CORRECTED_DIRNAME)
+    dict_preprocessing_config = dict_config["preprocessing"]
+    dict_state = load_checkpoint_state(str_checkpoint_path)
+    begin_checkpoint_update(str_checkpoint_path)
+
+    arr_time, list_IDs, arr_columns_to_correct = merge_new_loads(
+        str_raw_path, str_corrected_path, dict_data["load_measurements"])
+    print("Loaded", np.count_nonzero(arr_columns_to_correct),
+          "new timesteps of", len(list_IDs), "load-points")
+
+    if dict_preprocessing_config["correct_for_temperature"]:
+        ts_temperature_new = utilities.get_first_value_of_dictionary(
+            dict_data["temperature_measurements"])
+        if ts_temperature_new is None:
+            ts_temperature_new = ts.create_standard_time_series([], [])
+        ts_temperature_new = preprocessing.remove_nan_and_none_datapoints(
+            ts_temperature_new)
+        arr_changed_days = update_temperature(
+            dict_config, dict_state, ts_temperature_new)
+        arr_columns_to_correct |= np.isin(
+            preprocessing.day_of_leap_year(arr_time), arr_changed_days)
+    arr_columns = np.flatnonzero(arr_columns_to_correct)
+    if dict_preprocessing_config["correct_for_temperature"]:
+        print("Correcting", len(arr_columns), "timesteps for temperature...")
+        arr_deviation = preprocessing.temperature_deviations(
+            arr_time[arr_columns],
+            preprocessing.compute_daily_normal_from_sums(
+                dict_state["normal_sums"], dict_state["normal_counts"]),
+            ts.create_standard_time_series(
+                dict_state["n_day_average_time"],
+                dict_state["n_day_average_data"]))
+        arr_factor = 1 + (
+            dict_preprocessing_config["k_temperature_coefficient"]
+            * dict_preprocessing_config["x_temperature_sensitivity"]
+            * arr_deviation)
+    else:
+        arr_factor = np.ones(len(arr_columns))
+
+    # Only the columns to correct are read and written, in blocks of rows
+    arr_raw = load_store.open_load_store_data(str_raw_path)
+    arr_corrected = load_store.open_load_store_data(str_corrected_path, "r+")
+    int_block_rows = max(
+        1, load_store.INT_BLOCK_VALUES // max(len(arr_columns), 1))
+    for int_row in range(0, len(list_IDs), int_block_rows):
+        arr_corrected[int_row:int_row + int_block_rows, arr_columns] = \
+            arr_raw[int_row:int_row + int_block_rows, arr_columns] * arr_factor
+    arr_corrected.flush()
+    del arr_raw
+
+    # Statistics of every month with changed loads are recomputed whole, as
+    # maxima may not be updated by removing datapoints
+    arr_month = toenne.calendar_indices(arr_time)[1]
+    arr_months_changed = np.unique(arr_month[arr_columns])
+    arr_columns_of_months = np.flatnonzero(
+        np.isin(arr_month, arr_months_changed))
+    print("Updating variation statistics of", len(arr_months_changed),
+          "months...")
+    int_num_IDs_old = len(dict_state["variation_sums"])
+    list_statistics = [("sum", "variation_sums", 0),
+                       ("count", "variation_counts", 0),
+                       ("max", "variation_maxima", np.nan)]
+    for str_statistic, str_state_key, fl_empty in list_statistics:
+        arr_statistic = np.full(
+            (len(list_IDs),) + dict_state[str_state_key].shape[1:], fl_empty,
+            dtype=dict_state[str_state_key].dtype)
+        arr_statistic[:int_num_IDs_old] = dict_state[str_state_key]
+        dict_state[str_state_key] = arr_statistic
+    if len(arr_months_changed):
+        int_block_rows = max(
+            1, load_store.INT_BLOCK_VALUES // len(arr_columns_of_months))
+        for int_row in range(0, len(list_IDs), int_block_rows):
+            dict_statistics_changed = toenne.compute_variation_statistics(
+                arr_time[arr_columns_of_months],
+                arr_corrected[int_row:int_row + int_block_rows,
+                              arr_columns_of_months])
+            for str_statistic, str_state_key, _ in list_statistics:
+                arr_statistic = dict_state[str_state_key]
+                arr_statistic[int_row:int_row + int_block_rows, :,
+                              arr_months_changed] = \
+                    dict_statistics_changed[str_statistic][
+                        :, :, arr_months_changed]
+    del arr_corrected
+
+    write_checkpoint_state(str_checkpoint_path, dict_config,
+                           dict_data["ingested"], dict_state)
+    load_matrix_corrected = load_store.open_load_store(str_corrected_path)
+    if not dict_config["modelling"]["perform_modelling"]:
+        dict_loads_ts = load_matrix_corrected
+    else:
+        # Modelling of every load-point
+        dict_models_ts = {}
+        for i, str_node_ID in enumerate(list_IDs):
+            print("--------------------")
+            print("Modelling based on dataset", str_node_ID + "...")
+            dict_node_ts = {
+                "load": load_matrix_corrected[str_node_ID],
+                "variation_statistics": {
+                    "sum": dict_state["variation_sums"][i],
+                    "count": dict_state["variation_counts"][i],
+                    "max": dict_state["variation_maxima"][i]}}
+            dict_model = modelling.model_load(
+                dict_config["modelling"], dict_node_ts)
+            dict_models_ts[str_node_ID] = dict_model["load"]
+        print("--------------------")
+        dict_loads_ts = LoadMatrix.from_timeseries(dict_models_ts)
+    print("Successfully prepared all load-points")
+    return dict_loads_ts
@@ -1,4 +1,11 @@
+import os
+import time
+import json
+import hashlib
+import tracemalloc
 import numpy as np
+from objects import timeseries as ts
+from init import data_cache
 
 
 def remove_nan_and_none_datapoints(ts_data):
@@ -6,31 +13,181 @@ def remove_nan_and_none_datapoints(ts_data):
 
     Parameters
     ----------
-    dict_data_ts : dict(timeseries)
-        Dictionary of all timeseries to remove NaN and None from.
+    ts_data : timeseries
+        Timeseries to remove NaN and None from.
 
     Returns
     ----------
-    dict_data_ts : dict(timeseries)
-        Dictionary of all timeseries without NaN and None-values.
+    ts_data : timeseries
+        Timeseries without NaN and None-values. The input itself if it has
+        none.
+
+    Notes
+    ----------
+    None is stored as NaN in the float data-values of a timeseries, and as
+    NaT in its time-axis.
     """
     print("Removing NaN and None datapoints...")
-    
-    list_good_indeces = []
-    for dp in ts_data:
-        dp = list(dp)
-        if (not None in dp) and (dp == dp):
-            list_good_indeces.append(True)
+    arr_valid = find_valid_datapoints(ts_data.arr_time, ts_data.arr_data)
+    if arr_valid.all():
+        return ts_data
+    return ts_data[arr_valid]
+
+
+def find_valid_datapoints(arr_time, arr_data):
+    """Returns mask of datapoints with neither NaN nor None.
+
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+        Time-axis of the data.
+    arr_data : np.array(float)
+        Data-values, the last axis being time. May be 2-D of shape
+        (load-points, timesteps).
+
+    Returns
+    ----------
+    arr_valid : np.array(bool)
+        True where a datapoint is valid, same shape as arr_data.
+    """
+    return ~np.isnan(arr_data) & ~np.isnat(arr_time)
+
+
+def remove_nan_and_none_datapoints_of_all_loads(
+        dict_loads_ts, bool_keep_masks=False):
+    """Removes datapoints containing NaN or None from all load-points at once.
+
+    Parameters
+    ----------
+    dict_loads_ts : LoadMatrix or dict(timeseries)
+        Load-points to remove NaN and None from.
+    bool_keep_masks : bool, default=False
+        Return masks of the valid datapoints instead of removing them, such
+        that all load-points keep their time-axes.
+
+    Returns
+    ----------
+    dict_loads_valid : LoadMatrix or dict(timeseries)
+        Load-points without NaN and None-values. The input itself if
+        bool_keep_masks is set.
+    dict_num_removed : dict(int)
+        Number of datapoints with NaN or None of every load-point.
+    dict_valid_masks : dict(np.array(bool)) or None
+        If bool_keep_masks is set, mask of the valid datapoints of every
+        load-point, aligned to its timeseries.
+
+    Notes
+    ----------
+    The datapoints of all load-points are checked in a single array-operation.
+    A LoadMatrix leaves out NaN when a load-point is read, and drops datapoints
+    with NaT-timestamps when load-points are inserted. It is therefore
+    returned as is, unless it was built from arrays whose time-axis contains
+    NaT, in which case those columns are removed. Its counts are the
+    datapoints dropped on insertion and the values on NaT-timestamps, not
+    the NaN padding a shared time-axis gives load-points with fewer
+    timestamps. Its masks are rows of one (load-points, timesteps)-mask over
+    the shared time-axis.
+    """
+    print("Removing NaN and None datapoints of all load-points...")
+    list_IDs = list(dict_loads_ts)
+
+    # Duck-typed, as objects.load_points imports this module
+    if hasattr(dict_loads_ts, "arr_data"):
+        arr_time_valid = ~np.isnat(dict_loads_ts.arr_time)
+        arr_num_removed = dict_loads_ts.num_dropped_datapoints(list_IDs)
+        if not arr_time_valid.all():
+            arr_num_removed += np.count_nonzero(~np.isnan(
+                dict_loads_ts.arr_data[:, ~arr_time_valid]), axis=1)
+        dict_num_removed = dict(zip(list_IDs, arr_num_removed.tolist()))
+        if bool_keep_masks:
+            arr_valid = find_valid_datapoints(
+                dict_loads_ts.arr_time, dict_loads_ts.arr_data)
+            return dict_loads_ts, dict_num_removed, dict(
+                zip(list_IDs, arr_valid))
+        if not arr_time_valid.all():
+            dict_loads_ts = type(dict_loads_ts).from_arrays(
+                dict_loads_ts.arr_time[arr_time_valid], list_IDs,
+                dict_loads_ts.arr_data[:, arr_time_valid])
+        return dict_loads_ts, dict_num_removed, None
+
+    if not list_IDs:
+        return dict_loads_ts, {}, ({} if bool_keep_masks else None)
+    list_ts = [dict_loads_ts[str_ID] for str_ID in list_IDs]
+    arr_offsets = np.cumsum([0] + [len(ts_i) for ts_i in list_ts])
+    arr_valid = find_valid_datapoints(
+        np.concatenate([ts_i.arr_time for ts_i in list_ts]),
+        np.concatenate([ts_i.arr_data for ts_i in list_ts]))
+    arr_valid_cumulative = np.concatenate(([0], np.cumsum(arr_valid)))
+    arr_num_removed = np.diff(arr_offsets) - np.diff(
+        arr_valid_cumulative[arr_offsets])
+    dict_num_removed = dict(zip(list_IDs, arr_num_removed.tolist()))
+
+    if bool_keep_masks:
+        dict_valid_masks = {
+            str_ID: arr_valid[arr_offsets[i]:arr_offsets[i + 1]]
+            for i, str_ID in enumerate(list_IDs)}
+        return dict_loads_ts, dict_num_removed, dict_valid_masks
+
+    dict_loads_valid = {}
+    for i, str_ID in enumerate(list_IDs):
+        if arr_num_removed[i] == 0:
+            dict_loads_valid[str_ID] = list_ts[i]
         else:
-            list_good_indeces.append(False)
-    ts_data = ts_data[list_good_indeces]
-    return ts_data
+            dict_loads_valid[str_ID] = list_ts[i][
+                arr_valid[arr_offsets[i]:arr_offsets[i + 1]]]
+    return dict_loads_valid, dict_num_removed, None
+
+
+# Day-of-year of 29th of February in a leap year, zero-indexed
+INT_LEAP_DAY_INDEX = 59
+
 
+def day_of_leap_year(arr_time):
+    """Returns zero-indexed day-of-year of timestamps, as if in a leap year.
 
-def datetime_to_yearless_iso_string(dt):
-    """Converts datetime-object to string of date without year on iso format.
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+
+    Returns
+    ----------
+    arr_day_index : np.array(int)
+        Index from 0 to 365, such that a calendar-date has the same index in
+        every year. 29th of February is INT_LEAP_DAY_INDEX, and dates after it
+        in non-leap years are shifted by one.
     """
-    return dt.isoformat()[5:10]
+    arr_days = np.asarray(arr_time).astype("datetime64[D]")
+    arr_years = arr_days.astype("datetime64[Y]")
+    arr_day_index = (arr_days - arr_years.astype("datetime64[D]")).astype(np.int64)
+    arr_year = arr_years.astype(np.int64) + 1970
+    arr_leap = (arr_year % 4 == 0) & ((arr_year % 100 != 0) | (arr_year % 400 == 0))
+    arr_day_index += (~arr_leap & (arr_day_index >= INT_LEAP_DAY_INDEX))
+    return arr_day_index
+
+
+def lookup_daily_normal(arr_daily_normal, arr_time):
+    """Returns daily normal value at every timestamp.
+
+    Parameters
+    ----------
+    arr_daily_normal : np.array(float)
+        Daily normal as given by compute_daily_historical_normal.
+    arr_time : np.array(datetime64)
+        Timestamps of any frequency.
+
+    Raises
+    ----------
+    Exception
+        If the normal is missing for any of the days, as no historical data
+        exists for that calendar-day.
+    """
+    arr_normal = arr_daily_normal[day_of_leap_year(arr_time)]
+    arr_missing = np.isnan(arr_normal)
+    if arr_missing.any():
+        raise(Exception("Daily normal missing for " + str(np.count_nonzero(
+            arr_missing)) + " timestamps, first at "
+            + str(np.asarray(arr_time)[arr_missing][0])))
+    return arr_normal
 
 
 def compute_daily_historical_normal(ts_daily_data_historical):
@@ -43,91 +200,159 @@ def compute_daily_historical_normal(ts_daily_data_historical):
 
     Returns
     ----------
-    dict_daily_average : dict
-        Dictionary of daily historical averages. Keys are yearless dates on
-        iso format. 
+    arr_daily_normal : np.array(float)
+        Daily historical averages of the 366 days of a leap year, indexed by
+        day_of_leap_year. Use lookup_daily_normal to find the normal at
+        given timestamps.
 
     Notes
     ----------
     Function assumes timeseries is at most of daily frequency.
 
-    The function does not guarantee the output dictionary is chronologically 
-    ordered.
-    Example: Datasets which begin at non-leapyears will have "02-29" as the 
-    last entry in the output dictionary.
-    """
-    dict_running_sum_and_count = {}
-    for i in range(len(ts_daily_data_historical)):
-        arr_cur_data = ts_daily_data_historical[i, :]
-        str_date_yearless = datetime_to_yearless_iso_string(arr_cur_data[0])
-        flt_cur_sum = dict_running_sum_and_count.get(
-            str_date_yearless, [0, 0])[0]
-        int_cur_count = dict_running_sum_and_count.get(
-            str_date_yearless, [0, 0])[1]
-        list_new_sum_and_count = [flt_cur_sum + arr_cur_data[1],
-                                  int_cur_count + 1]
-        dict_running_sum_and_count[str_date_yearless] = list_new_sum_and_count
-
-    dict_daily_average = {}
-    for key in dict_running_sum_and_count:
-        dict_daily_average[key] = dict_running_sum_and_count[key][0] / \
-            dict_running_sum_and_count[key][1]
-    return dict_daily_average
-
-
-def create_n_day_average_dict(ts_basis, date_start, date_end,  n):
-    """Computes backwards n-day average at every point of input timeseries.
+    Datapoints are grouped by calendar-date regardless of year, so 29th of
+    February is only averaged over leap years. If the data contains no 29th
+    of February, its normal is the mean of the normals of 28th of February
+    and 1st of March. Other dates without data are NaN.
+    """
+    return compute_daily_normal_from_sums(
+        *compute_daily_sums_and_counts(ts_daily_data_historical))
+
+
+def compute_daily_sums_and_counts(ts_daily_data):
+    """Computes sum and count of datapoints of every day of a leap year.
+
+    Returns
+    ----------
+    arr_sum : np.array(float)
+        Sum of the datapoints of each of the 366 days, see day_of_leap_year.
+    arr_count : np.array(int)
+        Number of datapoints of each day. NaN is left out.
+
+    Notes
+    ----------
+    Sums and counts of several timeseries may be added, such that the normal
+    is updated with new data without revisiting the old, see
+    compute_daily_normal_from_sums.
+    """
+    arr_valid = ~np.isnan(ts_daily_data.arr_data)
+    arr_day_index = day_of_leap_year(ts_daily_data.arr_time[arr_valid])
+    arr_sum = np.bincount(
+        arr_day_index, weights=ts_daily_data.arr_data[arr_valid],
+        minlength=366)
+    arr_count = np.bincount(arr_day_index, minlength=366)
+    return arr_sum, arr_count
+
+
+def compute_daily_normal_from_sums(arr_sum, arr_count):
+    """Returns daily normal of sums and counts by compute_daily_sums_and_counts.
+
+    Notes
+    ----------
+    See compute_daily_historical_normal.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        arr_daily_normal = arr_sum / arr_count
+    if arr_count[INT_LEAP_DAY_INDEX] == 0:
+        arr_daily_normal[INT_LEAP_DAY_INDEX] = (
+            arr_daily_normal[INT_LEAP_DAY_INDEX - 1]
+            + arr_daily_normal[INT_LEAP_DAY_INDEX + 1]) / 2
+    return arr_daily_normal
+
+
+def compute_n_day_averages(
+        ts_basis, date_start, date_end, list_n, bool_partial_edges=True):
+    """Computes backwards n-day averages of daily timeseries for several n.
 
     Parameters
     -----------
     ts_basis : timeseries
-        Timeseries to calculate average over daily datapoints.
-    dt_start : datetime
+        Sorted timeseries of daily datapoints to calculate averages over.
+    date_start : date
         First date to calculate from.
-    dt_end : datetime
+    date_end : date
         Last date to calculate to (inclusive)
-    n : int
-        Amount of days to take backwards average over.
+    list_n : list(int)
+        Amounts of days to take backwards average over.
+    bool_partial_edges : bool, default=True
+        Where fewer than n days precede a date in ts_basis, average over the
+        available days if True, else give NaN.
 
     Returns
     -----------
-    dict_averages : dict
-        n-day backwards averages, keyed by date.
+    arr_dates : np.array(datetime64)
+        Dates of ts_basis from date_start to date_end.
+    arr_averages : np.array(float)
+        Array of shape (len(list_n), len(arr_dates)), where arr_averages[i, j]
+        is the list_n[i]-day backwards average at arr_dates[j].
 
     Notes
     ----------
-    Contents of return will always be a chronologically sorted dict as long as
-    ts_basis is sorted.
+    The averages of all dates and all n are found from a single cumulative
+    sum of ts_basis, as the difference of the sums at the ends of each window.
+    Windows count datapoints, so ts_basis is assumed to have no missing days.
     """
-    int_starting_index = 0
-    while int_starting_index < len(ts_basis):
-        if ts_basis[int_starting_index][0].date() == date_start:
-            break
-        else:
-            int_starting_index += 1
+    arr_days = ts_basis.arr_time.astype("datetime64[D]")
+    int_start = np.searchsorted(arr_days, np.datetime64(date_start, 'D'))
+    int_end = np.searchsorted(arr_days, np.datetime64(date_end, 'D'))
+    if (int_start == len(arr_days)
+            or arr_days[int_start] != np.datetime64(date_start, 'D')):
+        raise(Exception("Start date missing from basis-timeseries"))
+    if (int_end == len(arr_days)
+            or arr_days[int_end] != np.datetime64(date_end, 'D')):
+        raise(Exception("End date missing from basis-timeseries"))
+
+    arr_cumulative_sum = np.concatenate(([0], np.cumsum(ts_basis.arr_data)))
+    arr_index = np.arange(int_start, int_end + 1)
+    arr_n = np.asarray(list_n, dtype=np.int64)[:, np.newaxis]
+    arr_first_index = arr_index - arr_n + 1
+    arr_window_start = np.maximum(arr_first_index, 0)
+    arr_averages = ((arr_cumulative_sum[arr_index + 1]
+                     - arr_cumulative_sum[arr_window_start])
+                    / (arr_index + 1 - arr_window_start))
+    if not bool_partial_edges:
+        arr_averages[arr_first_index < 0] = np.nan
+    return arr_days[int_start:int_end + 1], arr_averages
+
+
+def create_n_day_average_timeseries(ts_basis, date_start, date_end, n):
+    """Computes backwards n-day average at every date of input timeseries.
+
+    Returns
+    -----------
+    ts_averages : timeseries
+        Daily timeseries of n-day backwards averages from date_start to
+        date_end.
+
+    Notes
+    ----------
+    See compute_n_day_averages.
+    """
+    arr_dates, arr_averages = compute_n_day_averages(
+        ts_basis, date_start, date_end, [n])
+    return ts.create_standard_time_series(arr_dates, arr_averages[0])
 
-    dict_averages = {}
-    while int_starting_index < len(ts_basis):
-        fl_running_sum = 0
-        i = 0
-        while i < n:
-            fl_running_sum += ts_basis[int_starting_index - i][1]
-            i += 1
 
-        dt_cur_date = ts_basis[int_starting_index][0].date()
-        dict_averages[dt_cur_date] = fl_running_sum / n
+def lookup_daily_values(ts_daily, arr_time):
+    """Returns value of daily timeseries at the date of every timestamp.
 
-        if dt_cur_date == date_end:
-            return dict_averages
-        else:
-            int_starting_index += 1
-    raise(Exception("End date missing from basis-timeseries"))
+    Raises
+    ----------
+    Exception
+        If the date of any timestamp is missing from ts_daily.
+    """
+    arr_days = ts_daily.arr_time.astype("datetime64[D]")
+    arr_dates = np.asarray(arr_time).astype("datetime64[D]")
+    arr_index = np.searchsorted(arr_days, arr_dates)
+    arr_index_clipped = np.minimum(arr_index, len(arr_days) - 1)
+    if len(arr_days) == 0 or np.any(arr_days[arr_index_clipped] != arr_dates):
+        raise(Exception("Dates missing from daily timeseries"))
+    return ts_daily.arr_data[arr_index_clipped]
 
 
 def correct_load_for_temperature_deviations(
         ts_load, 
-        dict_daily_normal_temperature,
-        dict_temperature_n_day_average,
+        arr_daily_normal_temperature,
+        ts_temperature_n_day_average,
         k, x):
     """Performs temperature-correction of load-timeseries based on historical
     temperature measurements.
@@ -137,40 +362,365 @@ def correct_load_for_temperature_deviations(
 
     Parameters
     -----------
-    dict_data_ts : dict(timeseries)
-        Dictionary containing at least the timeseries of load, temperature-
-        measurements for the same period and historical temperature-measurements.
+    ts_load : timeseries
+        Load to correct.
+    arr_daily_normal_temperature : np.array(float)
+        Daily normal temperature, see compute_daily_historical_normal.
+    ts_temperature_n_day_average : timeseries
+        Daily n-day average temperature covering the dates of ts_load.
     k, x : float
         Parameters in temperature-correction, temperautre-coefficient and
         temperature-sensetivity.
 
     Returns
     -----------
-    dict_data_ts : dict(timeseries)
-        Input-dictionary backloaded with temperature-corrected load and 
-        calculated daily historical normal temperature.
+    ts_load_corrected : timeseries
+        Temperature-corrected load.
     """
     print("Performing temperature-correction of load-data...")
-    # Correction step
-    ts_load_corrected = np.zeros_like(ts_load)
-    for i in range(len(ts_load)):
-        arr_datapoint_i = ts_load[i]
-        dt_time_i = arr_datapoint_i[0]
-        fl_load_i = arr_datapoint_i[1]
-        # Removed, but should in theory be performed according to Tønne
-        # if 11 <= dt_time_i.month or dt_time_i.month <= 4:
-        if True:
-            Tn = dict_daily_normal_temperature[datetime_to_yearless_iso_string(
-                dt_time_i)]
-            Ti = dict_temperature_n_day_average[dt_time_i.date()]
-            fl_load_corrected_i = fl_load_i + fl_load_i*k*x*(Tn - Ti)
+    arr_load_corrected = correct_loads_for_temperature_deviations(
+        ts_load.arr_time, ts_load.arr_data,
+        arr_daily_normal_temperature, ts_temperature_n_day_average, k, x)
+    ts_load_corrected = ts.create_standard_time_series(
+        ts_load.arr_time, arr_load_corrected)
+    return ts_load_corrected
+
+
+def temperature_deviations(
+        arr_time, arr_daily_normal_temperature, ts_temperature_n_day_average):
+    """Returns normal minus n-day average temperature of every timestamp.
+
+    Parameters
+    -----------
+    arr_time : np.array(datetime64)
+        Timestamps to look up.
+    arr_daily_normal_temperature : np.array(float)
+        Daily normal temperature, see compute_daily_historical_normal.
+    ts_temperature_n_day_average : timeseries
+        Daily n-day average temperature covering the dates of arr_time.
+    """
+    arr_normal_temperature = lookup_daily_normal(
+        arr_daily_normal_temperature, arr_time)
+    arr_average_temperature = lookup_daily_values(
+        ts_temperature_n_day_average, arr_time)
+    # Should in theory only be performed from November to April according to
+    # Tønne, but is performed all year
+    return arr_normal_temperature - arr_average_temperature
+
+
+def correct_loads_for_temperature_deviations(
+        arr_time,
+        arr_loads,
+        arr_daily_normal_temperature,
+        ts_temperature_n_day_average,
+        k, x):
+    """Performs temperature-correction of many loads sharing a time-axis.
+
+    Parameters
+    -----------
+    arr_time : np.array(datetime64)
+        Time-axis of the loads.
+    arr_loads : np.array(float)
+        Loads of shape (timesteps,) or (load-points, timesteps).
+    arr_daily_normal_temperature : np.array(float)
+        Daily normal temperature, see compute_daily_historical_normal.
+    ts_temperature_n_day_average : timeseries
+        Daily n-day average temperature covering the dates of arr_time.
+    k, x : float or np.array(float)
+        Temperature-coefficient and -sensitivity, either common to all loads
+        or one value per load-point.
+
+    Returns
+    -----------
+    arr_loads_corrected : np.array(float)
+        Corrected loads, same shape as arr_loads. NaN is kept as NaN.
+
+    Notes
+    ----------
+    The normal and average temperature are looked up once per timestamp, and
+    all loads are corrected by a single broadcast expression,
+    load*(1 + k*x*(Tn - Ti)).
+    """
+    arr_deviation = temperature_deviations(
+        arr_time, arr_daily_normal_temperature, ts_temperature_n_day_average)
+
+    arr_loads = np.asarray(arr_loads, dtype=np.float64)
+    arr_kx = np.asarray(k, dtype=np.float64) * np.asarray(x, dtype=np.float64)
+    if arr_kx.ndim == 1 and arr_loads.ndim == 2:
+        arr_kx = arr_kx[:, np.newaxis]
+    arr_factor = 1 + arr_kx*arr_deviation
+    if arr_factor.shape == arr_loads.shape:
+        return np.multiply(arr_loads, arr_factor, out=arr_factor)
+    return arr_loads*arr_factor
+
+
+def step_remove_nan_and_none(dict_preprocessing_config, ts_load):
+    """Preprocessing-step of a single load-point, see LIST_PREPROCESSING_STEPS.
+    """
+    ts_load_valid = remove_nan_and_none_datapoints(ts_load)
+    return ts_load_valid, len(ts_load) - len(ts_load_valid)
+
+
+def step_remove_nan_and_none_of_all_loads(dict_preprocessing_config,
+                                          load_matrix):
+    """Preprocessing-step of all load-points, see LIST_PREPROCESSING_STEPS.
+    """
+    load_matrix, dict_num_removed, _masks = \
+        remove_nan_and_none_datapoints_of_all_loads(load_matrix)
+    print("Left out", sum(dict_num_removed.values()),
+          "datapoints without valid data")
+    return load_matrix, dict_num_removed
+
+
+def step_correct_for_temperature(
+        dict_preprocessing_config,
+        ts_load,
+        arr_daily_normal_temperature,
+        ts_temperature_n_day_average):
+    """Preprocessing-step of a single load-point, see LIST_PREPROCESSING_STEPS.
+    """
+    return (correct_load_for_temperature_deviations(
+        ts_load,
+        arr_daily_normal_temperature,
+        ts_temperature_n_day_average,
+        dict_preprocessing_config["k_temperature_coefficient"],
+        dict_preprocessing_config["x_temperature_sensitivity"]),)
+
+
+# Number of load-values temperature-corrected at a time
+INT_CORRECTION_BLOCK_VALUES = 2**22
+
+
+def step_correct_for_temperature_of_all_loads(
+        dict_preprocessing_config,
+        load_matrix,
+        arr_daily_normal_temperature,
+        ts_temperature_n_day_average):
+    """Preprocessing-step of all load-points, see LIST_PREPROCESSING_STEPS.
+
+    Notes
+    ----------
+    Loads are corrected in blocks of rows, such that a memory-mapped
+    LoadMatrix is read from disk a block at a time. The corrected loads are
+    held in memory.
+    """
+    print("Performing temperature-correction of load-data...")
+    arr_deviation = temperature_deviations(
+        load_matrix.arr_time, arr_daily_normal_temperature,
+        ts_temperature_n_day_average)
+    arr_factor = 1 + (dict_preprocessing_config["k_temperature_coefficient"]
+                      * dict_preprocessing_config["x_temperature_sensitivity"]
+                      * arr_deviation)
+    arr_loads = load_matrix.arr_data
+    arr_loads_corrected = np.empty(arr_loads.shape, dtype=np.float64)
+    int_block_rows = max(
+        1, INT_CORRECTION_BLOCK_VALUES // max(arr_loads.shape[1], 1))
+    for int_row in range(0, arr_loads.shape[0], int_block_rows):
+        np.multiply(arr_loads[int_row:int_row + int_block_rows], arr_factor,
+                    out=arr_loads_corrected[int_row:int_row + int_block_rows])
+    # Created through the type of the input, as objects.load_points
+    # imports this module
+    return (type(load_matrix).from_arrays(
+        load_matrix.arr_time, load_matrix.list_IDs, arr_loads_corrected),)
+
+
+# Registry of preprocessing-steps, performed in order. A step is performed if
+# the field "name" of the preprocessing-config is set. It reads the fields
+# "inputs" of dict_data_ts and the fields "parameters" of the config, and
+# writes its results to the fields "outputs". The field "load_output" holds
+# the load after the step. "function" works on the timeseries of a single
+# load-point, "function_all_loads" on a LoadMatrix of all load-points.
+# Results are only cached if "cached" is set, which is not worth it for steps
+# cheaper than hashing and storing their results.
+#
+# To add a step, write the two functions and append an entry here.
+LIST_PREPROCESSING_STEPS = [
+    {
+        "name": "remove_NaN_and_None",
+        "inputs": ["load_measurements"],
+        "outputs": ["load_measurements", "num_invalid_datapoints"],
+        "parameters": [],
+        "load_output": "load_measurements",
+        "cached": False,
+        "function": step_remove_nan_and_none,
+        "function_all_loads": step_remove_nan_and_none_of_all_loads
+    },
+    {
+        "name": "correct_for_temperature",
+        "inputs": ["load_measurements", "normal_temperature",
+                   "n-day_average_temperature"],
+        "outputs": ["load_temperature_corrected"],
+        "parameters": ["k_temperature_coefficient",
+                       "x_temperature_sensitivity"],
+        "load_output": "load_temperature_corrected",
+        "cached": True,
+        "function": step_correct_for_temperature,
+        "function_all_loads": step_correct_for_temperature_of_all_loads
+    }
+]
+
+
+def content_hash(value):
+    """Returns sha256-digest of the contents of a preprocessing-input.
+
+    Notes
+    ----------
+    Supports timeseries, LoadMatrix, arrays, dictionaries and scalars. A
+    LoadMatrix memory-mapped read-only from a load-store is identified by the
+    path, size and modification-time of its data-file, so that it is not read
+    from disk just to be hashed.
+    """
+    hash_value = hashlib.sha256()
+    if hasattr(value, "list_IDs"):
+        hash_value.update(json.dumps(value.list_IDs, default=str).encode())
+        hash_value.update(np.ascontiguousarray(value.arr_time).tobytes())
+        arr_data = value.arr_data
+        if (isinstance(arr_data, np.memmap) and arr_data.filename is not None
+                and arr_data.mode == "r"):
+            stat_file = os.stat(arr_data.filename)
+            hash_value.update(json.dumps([
+                arr_data.filename, arr_data.offset, arr_data.shape,
+                str(arr_data.dtype), stat_file.st_size,
+                stat_file.st_mtime_ns]).encode())
         else:
-            fl_load_corrected_i = fl_load_i
+            hash_value.update(np.ascontiguousarray(arr_data).tobytes())
+    elif hasattr(value, "arr_time"):
+        hash_value.update(np.ascontiguousarray(value.arr_time).tobytes())
+        hash_value.update(np.ascontiguousarray(value.arr_data).tobytes())
+    elif isinstance(value, np.ndarray):
+        hash_value.update(str(value.dtype).encode())
+        hash_value.update(np.ascontiguousarray(value).tobytes())
+    else:
+        hash_value.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return hash_value.hexdigest()
 
-        ts_load_corrected[i][0] = dt_time_i
-        ts_load_corrected[i][1] = fl_load_corrected_i
 
-    return ts_load_corrected
+def run_preprocessing_steps(
+        dict_preprocessing_config,
+        dict_data_ts,
+        bool_all_loads=False,
+        dict_cache_config=None):
+    """Performs the enabled steps of LIST_PREPROCESSING_STEPS.
+
+    Parameters
+    ----------
+    dict_preprocessing_config : dict
+        Dictionary of which preprocessing steps to perform.
+    dict_data_ts : dict
+        Data to preprocess or to use for preprocessing purposes.
+    bool_all_loads : bool, default=False
+        Whether "load_measurements" is a LoadMatrix of all load-points, or the
+        timeseries of a single load-point.
+    dict_cache_config : dict, default=None
+        Configuration of cache of step-results, see init.data_cache. No
+        caching if None.
+
+    Returns
+    ----------
+    dict_data_ts : dict
+        Input-dictionary with backloaded preprocessed data and biproducts.
+        "load" is the preprocessed load, and "preprocessing_log" holds the
+        name, wall-time in seconds, peak traced memory in bytes and whether
+        the result was cached, of every performed step. Peak memory is None
+        unless "trace_memory" is set in the preprocessing-config.
+
+    Notes
+    ----------
+    Results of steps marked "cached" are cached by a key of the step, its
+    parameters and the contents of its inputs. Inputs produced by earlier
+    cached steps are identified by the key of that step, so only the initial
+    inputs are hashed, and only when a cached step needs them. Changing a
+    parameter thus only performs the steps from the first step using it.
+
+    Memory is traced with tracemalloc only if "trace_memory" is set, as
+    tracing slows down all allocations made by the steps.
+    """
+    dict_hashes = {}
+    str_load_field = "load_measurements"
+    list_preprocessing_log = []
+    bool_trace_memory = bool(dict_preprocessing_config.get("trace_memory"))
+    for dict_step in LIST_PREPROCESSING_STEPS:
+        str_name = dict_step["name"]
+        if not dict_preprocessing_config.get(str_name):
+            continue
+
+        list_inputs = [dict_data_ts[str_field]
+                       for str_field in dict_step["inputs"]]
+        bool_cache_step = dict_cache_config is not None and dict_step["cached"]
+        if bool_cache_step:
+            for str_field in dict_step["inputs"]:
+                if str_field not in dict_hashes:
+                    dict_hashes[str_field] = content_hash(dict_data_ts[str_field])
+            str_step_key = content_hash({
+                "step": str_name,
+                "all_loads": bool_all_loads,
+                "parameters": {str_parameter: dict_preprocessing_config[str_parameter]
+                               for str_parameter in dict_step["parameters"]},
+                "inputs": [dict_hashes[str_field]
+                           for str_field in dict_step["inputs"]]})
+            tuple_outputs = data_cache.load_cached_object(
+                dict_cache_config, str_step_key)
+        else:
+            tuple_outputs = None
+
+        bool_cached = tuple_outputs is not None
+        if bool_trace_memory:
+            bool_tracing = tracemalloc.is_tracing()
+            if not bool_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            int_memory_start, _int_peak = tracemalloc.get_traced_memory()
+        fl_time_start = time.perf_counter()
+        if not bool_cached:
+            if bool_all_loads:
+                function_step = dict_step["function_all_loads"]
+            else:
+                function_step = dict_step["function"]
+            tuple_outputs = function_step(dict_preprocessing_config, *list_inputs)
+        fl_seconds = time.perf_counter() - fl_time_start
+        int_peak_memory = None
+        if bool_trace_memory:
+            _int_memory, int_peak = tracemalloc.get_traced_memory()
+            int_peak_memory = int_peak - int_memory_start
+            if not bool_tracing:
+                tracemalloc.stop()
+
+        if bool_cache_step and not bool_cached:
+            data_cache.store_cached_object(
+                dict_cache_config, str_step_key, tuple_outputs)
+        for str_field, output in zip(dict_step["outputs"], tuple_outputs):
+            if bool_cache_step:
+                dict_hashes[str_field] = str_step_key + str_field
+            elif output is not dict_data_ts.get(str_field):
+                # Hashed from its contents if a later step is cached
+                dict_hashes.pop(str_field, None)
+            dict_data_ts[str_field] = output
+        str_load_field = dict_step["load_output"]
+        list_preprocessing_log.append({
+            "step": str_name,
+            "seconds": fl_seconds,
+            "peak_memory_bytes": int_peak_memory,
+            "cached": bool_cached})
+
+    dict_data_ts["load"] = dict_data_ts[str_load_field]
+    dict_data_ts["preprocessing_log"] = list_preprocessing_log
+    return dict_data_ts
+
+
+def print_preprocessing_log(list_preprocessing_log):
+    """Prints wall-time and memory-usage of every performed preprocessing-step.
+    """
+    for dict_entry in list_preprocessing_log:
+        str_entry = "Step " + dict_entry["step"] + ": "
+        if dict_entry["cached"]:
+            str_entry += "cached"
+        else:
+            str_entry += str(round(dict_entry["seconds"], 3)) + " s"
+        if dict_entry["peak_memory_bytes"] is not None:
+            str_entry += ", " + str(round(
+                dict_entry["peak_memory_bytes"] / 2**20, 1)) + " MB"
+        print(str_entry)
+    return
 
 
 def preprocess_data(dict_preprocessing_config, dict_data_ts):
@@ -190,40 +740,47 @@ def preprocess_data(dict_preprocessing_config, dict_data_ts):
 
     Notes
     ----------
-    Main functionality of this module.
+    Main functionality of this module. Steps are declared in
+    LIST_PREPROCESSING_STEPS and performed by run_preprocessing_steps.
     """
     print("Preprocessing data...")
+    dict_data_ts = run_preprocessing_steps(
+        dict_preprocessing_config, dict_data_ts)
+    print("Successfully completed all preprocessing steps")
+    return dict_data_ts
 
-    list_preprocessing_log = []
 
-    if dict_preprocessing_config["remove_NaN_and_None"]:
-        dict_data_ts["load_measurements"] = remove_nan_and_none_datapoints(dict_data_ts["load_measurements"])
-        list_preprocessing_log.append("remove_nan_and_none")
-
-    if dict_preprocessing_config["correct_for_temperature"]:
-        ts_load = dict_data_ts["load_measurements"]
-        dict_daily_normal_temperature = dict_data_ts["normal_temperature"]
-        dict_temperature_3_day_average = dict_data_ts["n-day_average_temperature"]
-        k = dict_preprocessing_config["k_temperature_coefficient"]
-        x = dict_preprocessing_config["x_temperature_sensitivity"]
-
-        dict_data_ts["load_temperature_corrected"] = correct_load_for_temperature_deviations(
-            ts_load, 
-            dict_daily_normal_temperature,
-            dict_temperature_3_day_average,
-            k, x)
-        list_preprocessing_log.append("correct_for_temperature")
-
-    # Format allows for simple pipelining of additional preprocessing steps.
-    # if dict_preprocessing_config["example"]:
-    #   dict_data_ts["field"] = example_preprocessing_step(dict_preprocessing_config, dict_data_ts["other_field"])
-    # if dict_preprocessing_config["another"]:
-    #   dict_data_ts["other_field"] = another_preprocessing_step(dict_preprocessing_config, dict_data_ts["yet_another_field"])
-
-    if "correct_for_temperature" in list_preprocessing_log:
-        dict_data_ts["load"] = dict_data_ts["load_temperature_corrected"]
-    else:
-        dict_data_ts["load"] = dict_data_ts["load_measurements"]
+def preprocess_data_of_all_loads(
+        dict_preprocessing_config, dict_data_ts, dict_cache_config=None):
+    """Performs preprocessing on all load-points at once based on configuration.
+
+    Parameters
+    ----------
+    dict_preprocessing_config : dict
+        Dictionary of which preprocessing steps to perform.
+    dict_data_ts : dict
+        As for preprocess_data, except "load_measurements" is a LoadMatrix of
+        all load-points.
+    dict_cache_config : dict, default=None
+        Configuration of cache of step-results, see init.data_cache. No
+        caching if None.
 
+    Returns
+    ----------
+    dict_data_ts : dict
+        Input-dictionary with backloaded preprocessed LoadMatrix "load" and
+        biproducts.
+
+    Notes
+    ----------
+    Equivalent to preprocess_data of every load-point, but every step is a
+    single array-operation over the node-by-time array of the LoadMatrix.
+    The temperature-data is thus only looked up once for all load-points.
+    """
+    print("Preprocessing data of all load-points...")
+    dict_data_ts = run_preprocessing_steps(
+        dict_preprocessing_config, dict_data_ts, bool_all_loads=True,
+        dict_cache_config=dict_cache_config)
+    print_preprocessing_log(dict_data_ts["preprocessing_log"])
     print("Successfully completed all preprocessing steps")
     return dict_data_ts
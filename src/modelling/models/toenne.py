@@ -6,18 +6,135 @@ Notes
 Requires load-measurements to be temperature-corrected.
 """
 import numpy as np
+from objects import timeseries as ts
 
+# Day-types of variation values, workdays and weekends
+INT_NUM_DAYTYPES = 2
 
-def calculate_variation_values(
-        ts_measured_load,
+
+def calendar_indices(arr_time):
+    """Returns day-type, month and hour of timestamps as integer arrays.
+
+    Returns
+    ----------
+    arr_daytype : np.array(int)
+        0 for workdays (monday to friday), 1 for weekends.
+    arr_month : np.array(int)
+        Zero-indexed month.
+    arr_hour : np.array(int)
+        Hour of day.
+    """
+    arr_seconds = np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE).astype(np.int64)
+    arr_days = arr_seconds // 86400
+    arr_hour = (arr_seconds - arr_days*86400) // 3600
+    if not len(arr_days):
+        return arr_days, arr_days, arr_hour
+    # Day-type and month are found per day spanned, and looked up per
+    # timestamp
+    int_first_day = arr_days.min()
+    arr_days_spanned = np.arange(int_first_day, arr_days.max() + 1)
+    arr_days -= int_first_day
+    # 1st of January 1970 was a thursday, weekday 3
+    arr_daytype_of_day = ((arr_days_spanned + 3) % 7 >= 5).astype(np.int64)
+    arr_month_of_day = arr_days_spanned.astype("datetime64[D]").astype(
+        "datetime64[M]").astype(np.int64) % 12
+    return arr_daytype_of_day[arr_days], arr_month_of_day[arr_days], arr_hour
+
+
+def calendar_categories(arr_time):
+    """Returns flat index of day-type, month and hour of timestamps.
+
+    Notes
+    ----------
+    Indexes the flattened (day-type, month, hour) tensors of
+    compute_variation_statistics, see calendar_indices.
+    """
+    arr_daytype, arr_month, arr_hour = calendar_indices(arr_time)
+    return (arr_daytype*12 + arr_month)*24 + arr_hour
+
+
+def compute_variation_statistics(arr_time, arr_loads, arr_category=None):
+    """Computes sum, count and max of loads by day-type, month and hour.
+
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+        Time-axis of the loads.
+    arr_loads : np.array(float)
+        Temperature-corrected loads of shape (timesteps,) or
+        (load-points, timesteps). NaN is left out.
+    arr_category : np.array(int), default=None
+        calendar_categories of arr_time, if already computed.
+
+    Returns
+    ----------
+    dict_statistics : dict(np.array)
+        "sum", "count" and "max" of shape arr_loads.shape[:-1] + (2, 12, 24),
+        indexed by day-type, month and hour, see calendar_indices. "max" is
+        NaN where there are no datapoints.
+
+    Notes
+    ----------
+    Statistics of disjoint sets of timesteps may be combined, such that
+    variation values are updated without revisiting old data, see
+    variation_values_from_statistics. Every statistic is a single grouped
+    reduction, by np.bincount and np.fmax.at, over the flat index of
+    load-point and category.
+    """
+    arr_loads = np.asarray(arr_loads, dtype=np.float64)
+    if arr_category is None:
+        arr_category = calendar_categories(arr_time)
+    int_num_categories = INT_NUM_DAYTYPES*12*24
+    int_num_loads = int(np.prod(arr_loads.shape[:-1], dtype=np.int64))
+
+    arr_index = (np.arange(int_num_loads)[:, np.newaxis]*int_num_categories
+                 + arr_category).ravel()
+    arr_values = arr_loads.ravel()
+    arr_valid = ~np.isnan(arr_values)
+    if not arr_valid.all():
+        arr_index = arr_index[arr_valid]
+        arr_values = arr_values[arr_valid]
+    int_length = int_num_loads*int_num_categories
+    arr_sum = np.bincount(arr_index, weights=arr_values, minlength=int_length)
+    arr_count = np.bincount(arr_index, minlength=int_length)
+    arr_max = np.full(int_length, np.nan)
+    np.fmax.at(arr_max, arr_index, arr_values)
+
+    tuple_shape = arr_loads.shape[:-1] + (INT_NUM_DAYTYPES, 12, 24)
+    return {"sum": arr_sum.reshape(tuple_shape),
+            "count": arr_count.reshape(tuple_shape),
+            "max": arr_max.reshape(tuple_shape)}
+
+
+def reduce_variation_statistics(dict_statistics, str_max_or_average_variation,
+                                tuple_axes=None):
+    """Reduces statistics of compute_variation_statistics over given axes.
+
+    Notes
+    ----------
+    As in calculate_variation_values, "max" gives the average and "average"
+    the max of the datapoints.
+    """
+    if str.lower(str_max_or_average_variation) == "max":
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (np.sum(dict_statistics["sum"], axis=tuple_axes)
+                    / np.sum(dict_statistics["count"], axis=tuple_axes))
+    elif str.lower(str_max_or_average_variation) == "average":
+        return np.fmax.reduce(dict_statistics["max"], axis=tuple_axes)
+    else:
+        raise Exception("Unsupported method for calculating variation")
+
+
+def variation_values_from_statistics(
+        dict_statistics,
         str_max_or_average_variation,
         str_variation_value_alternative):
-    """Calculates load variation values.
+    """Calculates load variation values from statistics of the load.
 
     Parameters
     ----------
-    ts_measured_load : timeseries
-        Timeseries of temperature-corrected load.
+    dict_statistics : dict(np.array)
+        Statistics of a single load-point, see compute_variation_statistics.
     str_max_or_average_variation : str
         Choice-variable of whether to calculate "max" or "average" values.
     str_variation_value_alternative : str
@@ -29,87 +146,112 @@ def calculate_variation_values(
     fl_normalization_baseline : float
         Either max or average of all datapoints, depending on choice.
     dict_variation_values : dict
-        Dictionary of variation values keyed based on alternative chosen.
+        Dictionary of variation values keyed based on alternative chosen, as
+        by calculate_variation_values.
     """
-    # Initialization of empty data containers
+    fl_normalization_baseline = reduce_variation_statistics(
+        dict_statistics, str_max_or_average_variation)
+
     if str.lower(str_variation_value_alternative) == "a":
+        arr_monthly = reduce_variation_statistics(
+            dict_statistics, str_max_or_average_variation, (0, 2))
+        arr_hourly = reduce_variation_statistics(
+            dict_statistics, str_max_or_average_variation, (1,))
         dict_variation_values = {
-            "monthly": [[] for _ in range(12)],
-            "workday_hourly": [[] for _ in range(24)],
-            "weekend_hourly": [[] for _ in range(24)]
+            "monthly": arr_monthly / fl_normalization_baseline,
+            "workday_hourly": arr_hourly[0] / fl_normalization_baseline,
+            "weekend_hourly": arr_hourly[1] / fl_normalization_baseline
         }
     elif str.lower(str_variation_value_alternative) == "b":
+        arr_monthly_hourly = reduce_variation_statistics(
+            dict_statistics, str_max_or_average_variation, ())
         dict_variation_values = {
-            "workday_monthly": [[[] for _ in range(24)] for _ in range(12)],
-            "weekend_monthly": [[[] for _ in range(24)] for _ in range(12)]
+            "workday_monthly": arr_monthly_hourly[0] / fl_normalization_baseline,
+            "weekend_monthly": arr_monthly_hourly[1] / fl_normalization_baseline
         }
     else:
         raise Exception("Unsupported variation value alternative")
 
-    # Step 2a, categorize
-    # For every datapoint, append it to the category(/ies) it will be used as
-    # basis for calculation.
-    for i in range(len(ts_measured_load)):
-        dt_time_i = ts_measured_load[i, 0]
-        fl_load_i = ts_measured_load[i, 1]
-        int_month_i = dt_time_i.month
-        int_hour_i = dt_time_i.hour
-        bool_date_is_workday = (dt_time_i.weekday() < 5)
-
-        if str.lower(str_variation_value_alternative) == "a":
-            dict_variation_values["monthly"][int_month_i - 1].append(fl_load_i)
-            if bool_date_is_workday:
-                dict_variation_values["workday_hourly"][int_hour_i].append(
-                    fl_load_i)
-            else:
-                dict_variation_values["weekend_hourly"][int_hour_i].append(
-                    fl_load_i)
-
-        elif str.lower(str_variation_value_alternative) == "b":
-            if bool_date_is_workday:
-                dict_variation_values["workday_monthly"][int_month_i -
-                                                         1][int_hour_i].append(fl_load_i)
-            else:
-                dict_variation_values["weekend_monthly"][int_month_i -
-                                                         1][int_hour_i].append(fl_load_i)
+    for category in dict_variation_values:
+        dict_variation_values[category] = dict_variation_values[category].tolist()
+    return fl_normalization_baseline, dict_variation_values
 
-        else:
-            raise Exception("Unsupported variation value alternative")
+
+def calculate_variation_values(
+        ts_measured_load,
+        str_max_or_average_variation,
+        str_variation_value_alternative):
+    """Calculates load variation values.
+
+    Parameters
+    ----------
+    ts_measured_load : timeseries
+        Timeseries of temperature-corrected load.
+    str_max_or_average_variation : str
+        Choice-variable of whether to calculate "max" or "average" values.
+    str_variation_value_alternative : str
+        Choice-variable of whether to use alternative "A" or "B", as described
+        in Tønne.
+
+    Returns
+    ----------
+    fl_normalization_baseline : float
+        Either max or average of all datapoints, depending on choice.
+    dict_variation_values : dict
+        Dictionary of variation values keyed based on alternative chosen.
+
+    Notes
+    ----------
+    Datapoints are reduced once into sums, counts and maxima by day-type,
+    month and hour, see compute_variation_statistics. Both alternatives are
+    reductions of these, see variation_values_from_statistics. Categories
+    without datapoints have NaN as variation value.
+    """
+    # Step 2a, categorize and reduce every category
+    dict_statistics = compute_variation_statistics(
+        ts_measured_load.arr_time, ts_measured_load.arr_data)
 
     # Step 2b, calculate variation
-    # Each category (list of datapoints) is replaced by the chosen function
-    # value (average or max) of that list, normalized.
-    if str.lower(str_max_or_average_variation) == "max":
-        fn_variation_baseline = np.average
-    elif str.lower(str_max_or_average_variation) == "average":
-        fn_variation_baseline = np.max
-    else:
-        raise Exception("Unsupported method for calculating variation")
+    # Each category is replaced by the chosen function value (average or max)
+    # of its datapoints, normalized.
+    return variation_values_from_statistics(
+        dict_statistics, str_max_or_average_variation,
+        str_variation_value_alternative)
 
-    fl_normalization_baseline = fn_variation_baseline(ts_measured_load[:, 1])
 
+def deterministic_load_tensor(
+        dict_variation_values,
+        fl_normalization_baseline,
+        str_variation_value_alternative):
+    """Returns modelled load of every day-type, month and hour.
+
+    Returns
+    ----------
+    arr_load_tensor : np.array(float)
+        Deterministic load of shape (2, 12, 24), indexed as the statistics of
+        compute_variation_statistics.
+    """
     if str.lower(str_variation_value_alternative) == "a":
-        for category in dict_variation_values:
-            dict_variation_values[category] = list(
-                map(lambda arr: fn_variation_baseline(arr) / fl_normalization_baseline, 
-                    dict_variation_values[category]))
+        arr_hourly = np.array([dict_variation_values["workday_hourly"],
+                               dict_variation_values["weekend_hourly"]])
+        arr_monthly = (fl_normalization_baseline
+                       * np.asarray(dict_variation_values["monthly"]))
+        return arr_monthly[np.newaxis, :, np.newaxis] * arr_hourly[:, np.newaxis, :]
     elif str.lower(str_variation_value_alternative) == "b":
-        for category in dict_variation_values:
-            for month in range(12):
-                dict_variation_values[category][month] = list(
-                    map(lambda arr: fn_variation_baseline(arr) / fl_normalization_baseline,
-                        dict_variation_values[category][month]))
+        return fl_normalization_baseline * np.array(
+            [dict_variation_values["workday_monthly"],
+             dict_variation_values["weekend_monthly"]])
     else:
         raise Exception("Unsupported variation value alternative")
 
-    return fl_normalization_baseline, dict_variation_values
-
 
 def generate_deterministic_model(
         ts_measured_load,
         dict_variation_values,
         fl_normalization_baseline,
-        str_variation_value_alternative):
+        str_variation_value_alternative,
+        arr_time=None,
+        arr_category=None):
     """Use variation values to calculate estimate load (no stochasticity).
 
     Parameters
@@ -123,37 +265,31 @@ def generate_deterministic_model(
     str_variation_value_alternative : string
         Choice-variable of whether to use alternative "A" or "B", as described
         in Tønne.
+    arr_time : np.array(datetime64), default=None
+        Time-axis to model, e.g. of a future year. The time-axis of
+        ts_measured_load if None.
+    arr_category : np.array(int), default=None
+        calendar_categories of the modelled time-axis, if already computed.
 
     Returns
     ----------
     ts_load_deterministic_model : timeseries
         Timeseries of deterministic load-model.
-    """
-    ts_load_deterministic_model = np.zeros_like(ts_measured_load)
-    for i in range(len(ts_measured_load)):
-        dt_time_i = ts_measured_load[i, 0]
-        int_month_i = dt_time_i.month
-        int_hour_i = dt_time_i.hour
-        bool_date_is_workday = (dt_time_i.weekday() < 5)
-
-        fl_modelled_load_i = fl_normalization_baseline
-        if str.lower(str_variation_value_alternative) == "a":
-            fl_modelled_load_i *= dict_variation_values["monthly"][int_month_i - 1]
-            if bool_date_is_workday:
-                fl_modelled_load_i *= dict_variation_values["workday_hourly"][int_hour_i]
-            else:
-                fl_modelled_load_i *= dict_variation_values["weekend_hourly"][int_hour_i]
-
-        elif str.lower(str_variation_value_alternative) == "b":
-            if bool_date_is_workday:
-                fl_modelled_load_i *= dict_variation_values["workday_monthly"][int_month_i - 1][int_hour_i]
-            else:
-                fl_modelled_load_i *= dict_variation_values["weekend_monthly"][int_month_i - 1][int_hour_i]
-        else:
-            raise Exception("Unsupported variation value alternative")
 
-        ts_load_deterministic_model[i, :] = [dt_time_i, fl_modelled_load_i]
-        ts_load_deterministic_model = np.array(ts_load_deterministic_model)
+    Notes
+    ----------
+    The load of every timestep is gathered from deterministic_load_tensor
+    by its calendar-category, as a single indexing operation.
+    """
+    if arr_time is None:
+        arr_time = ts_measured_load.arr_time
+    if arr_category is None:
+        arr_category = calendar_categories(arr_time)
+    arr_load_tensor = deterministic_load_tensor(
+        dict_variation_values, fl_normalization_baseline,
+        str_variation_value_alternative)
+    ts_load_deterministic_model = ts.create_standard_time_series(
+        arr_time, arr_load_tensor.ravel()[arr_category])
     return ts_load_deterministic_model
 
 
@@ -189,9 +325,8 @@ def generate_stochastic_model(
         # See https://stackoverflow.com/a/37616966 for potential implementation
         raise Exception("Not yet implemented")
 
-    ts_stochastic_model = np.zeros_like(ts_deterministic_model)
+    arr_stochastic_model = np.zeros(len(ts_deterministic_model))
     for i in range(len(ts_deterministic_model)):
-        dt_time_i = ts_deterministic_model[i, 0]
         fl_load_baseline_i = ts_deterministic_model[i, 1]
 
         # Draw random number from chosen source of stochasticity
@@ -202,9 +337,9 @@ def generate_stochastic_model(
             raise Exception("Not yet implemented")
         else:
             raise Exception("Unsupported stochastic source")
-        ts_stochastic_model[i, :] = [dt_time_i,
-                                     fl_load_baseline_i*(1 + fl_random_value)]
-    ts_stochastic_model = np.array(ts_stochastic_model)
+        arr_stochastic_model[i] = fl_load_baseline_i*(1 + fl_random_value)
+    ts_stochastic_model = ts.create_standard_time_series(
+        ts_deterministic_model.arr_time, arr_stochastic_model)
     return ts_stochastic_model
 
 
@@ -215,7 +350,9 @@ def create_toenne_load_model(dict_data_ts, dict_parameters):
     ----------
     dict_data_ts : dict(timeseries)
         Dictionary containing at least temperature-corrected load-measurements
-        keyed under "load".
+        keyed under "load". Variation values are calculated from
+        "variation_statistics" instead if given, see
+        compute_variation_statistics.
     dict_parameters : dict
         Parameters used within modelling.
 
@@ -231,25 +368,35 @@ def create_toenne_load_model(dict_data_ts, dict_parameters):
     str_max_or_average_variation = dict_parameters["max_or_average_variation_calculation"]
     str_variation_value_alternative = dict_parameters["variation_values_alternative"]
 
+    # Calendar-categories are shared by step 2 and 3
+    arr_category = calendar_categories(ts_measured_load.arr_time)
+
     # Step 2 of Tønne
-    fl_normalization_baseline, dict_variation_values = calculate_variation_values(
-        ts_measured_load, str_max_or_average_variation, str_variation_value_alternative)
+    if "variation_statistics" in dict_data_ts:
+        dict_statistics = dict_data_ts["variation_statistics"]
+    else:
+        dict_statistics = compute_variation_statistics(
+            ts_measured_load.arr_time, ts_measured_load.arr_data, arr_category)
+    fl_normalization_baseline, dict_variation_values = \
+        variation_values_from_statistics(
+            dict_statistics,
+            str_max_or_average_variation, str_variation_value_alternative)
 
     # Step 3 of Tønne
     ts_load_deterministic_model = generate_deterministic_model(
         ts_measured_load,           dict_variation_values,
-        fl_normalization_baseline,  str_variation_value_alternative)
+        fl_normalization_baseline,  str_variation_value_alternative,
+        arr_category=arr_category)
 
     # Step 4 of Tønne
-    ts_relative_model_error = np.zeros_like(ts_measured_load)
+    arr_relative_model_error = np.zeros(len(ts_measured_load))
     for i in range(len(ts_measured_load)):
-        dt_time_i = ts_measured_load[i, 0]
         fl_actual_load_i = ts_measured_load[i, 1]
         fl_modelled_load_i = ts_load_deterministic_model[i, 1]
-        fl_relative_error_i = (
+        arr_relative_model_error[i] = (
             fl_actual_load_i - fl_modelled_load_i) / fl_modelled_load_i
-        ts_relative_model_error[i, :] = [dt_time_i, fl_relative_error_i]
-    ts_relative_model_error = np.array(ts_relative_model_error)
+    ts_relative_model_error = ts.create_standard_time_series(
+        ts_measured_load.arr_time, arr_relative_model_error)
 
     # Step 5 of Tønne
     # Todo: different periods for the histograms
@@ -10,21 +10,413 @@ change code outside this module.
 
 The unit of the load is implicitly kW (KiloWatt), but changing this will not affect calculations.
 
+Load-points are stored in a LoadMatrix, a dictionary-like container backed by
+a single node-by-time array, such that network-wide analyses may be performed
+as array-operations over contiguous memory.
+
+Alternatively, load-points may be prepared on demand by LazyLoadPoints, such
+that only the load-points actually analysed are preprocessed and modelled.
+
 """
 import datetime as dt
+import json
+from collections.abc import MutableMapping
+import numpy as np
 import init.preprocessing as preprocessing
+import init.data_cache as data_cache
 import modelling.modelling as modelling
+import objects.timeseries as ts
+import objects.resampling as resampling
 import utilities
 import plotting
 
 
-def prepare_all_loads(dict_config, dict_data):
-    """Prepares nodes based on input data and config.
-    Parameters
+class LoadMatrix(MutableMapping):
+    """Node-by-time store of load-timeseries sharing one time-axis.
+
+    Attributes
     ----------
-    dict_config : dict
-        Configuration-file.
-    dict_data : dictionary of measured loads and temperature.
+    arr_time : np.array(datetime64)
+        Time-axis shared by all load-points.
+
+    Notes
+    ----------
+    Behaves like a dictionary of timeseries keyed by node-ID. Each load-point
+    occupies a row of a dense 2-D float-array, where datapoints missing from
+    the load-point are stored as NaN and left out when the load-point is read.
+    Datapoints without timestamp (NaT) or value (NaN) are dropped when
+    load-points are inserted, so the time-axis never contains NaT. Their
+    number is kept, see num_dropped_datapoints.
+
+    Assigning or removing a load-point never overwrites a row in place.
+    Replacing or removing a load-point retires its row, and retired rows are
+    dropped whenever the array is reallocated, which happens with doubling
+    capacity. Only write_datapoints writes rows in place.
+
+    A load-point without missing datapoints is read as a read-only view of
+    its row, which stays valid without being copied and sees later writes of
+    write_datapoints. A load-point with missing datapoints is read as a copy.
+
+    Assigning a load-point with timestamps outside the time-axis reallocates
+    the whole array. Create LoadMatrix's of many load-points with
+    from_timeseries instead.
+    """
+
+    INT_MIN_CAPACITY = 16
+
+    def __init__(self, arr_time=None, dtype=np.float64):
+        if arr_time is None:
+            arr_time = []
+        self.arr_time = np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE)
+        self._arr_data = np.full((0, len(self.arr_time)), np.nan, dtype=dtype)
+        self._int_rows_used = 0
+        self._dict_rows = {}
+        self._dict_num_dropped = {}
+
+    @classmethod
+    def from_arrays(cls, arr_time, list_IDs, arr_data):
+        """Wraps existing node-by-time array without copying it.
+
+        Parameters
+        ----------
+        arr_time : np.array(datetime64)
+            Time-axis, one element per column of arr_data.
+        list_IDs : list(str)
+            Node-IDs, one per row of arr_data.
+        arr_data : np.array
+            2-D array of loads, NaN where datapoints are missing.
+        """
+        load_matrix = cls(arr_time, dtype=arr_data.dtype)
+        if arr_data.shape != (len(list_IDs), len(load_matrix.arr_time)):
+            raise Exception("Shape of load-array does not match IDs and time")
+        load_matrix._arr_data = arr_data
+        load_matrix._int_rows_used = len(list_IDs)
+        load_matrix._dict_rows = {
+            str_ID: i for i, str_ID in enumerate(list_IDs)}
+        return load_matrix
+
+    @classmethod
+    def from_timeseries(cls, dict_loads_ts, dtype=np.float64):
+        """Creates LoadMatrix of many timeseries, allocating the array once.
+
+        Parameters
+        ----------
+        dict_loads_ts : dict(timeseries)
+            Load-points keyed by node-ID.
+        dtype : np.dtype, default=np.float64
+            Float-type of the array.
+
+        Notes
+        ----------
+        The time-axis is the union of the time-axes of all timeseries, found
+        before any load-point is written. Assigning load-points one by one
+        instead reallocates the whole array every time the time-axis grows,
+        which is quadratic in the number of load-points when they have
+        different time-axes.
+        """
+        list_IDs = list(dict_loads_ts)
+        list_ts = [dict_loads_ts[str_ID] for str_ID in list_IDs]
+        list_datapoints = [cls._valid_datapoints(ts_load)
+                           for ts_load in list_ts]
+        arr_time = np.unique(np.concatenate(
+            [np.array([], dtype=ts.STR_TIME_DTYPE)]
+            + [arr_time_load for arr_time_load, _ in list_datapoints]))
+        arr_data = np.full((len(list_IDs), len(arr_time)), np.nan, dtype=dtype)
+        for i, (arr_time_load, arr_data_load) in enumerate(list_datapoints):
+            arr_data[i, np.searchsorted(arr_time, arr_time_load)] = \
+                arr_data_load
+        load_matrix = cls.from_arrays(arr_time, list_IDs, arr_data)
+        load_matrix._dict_num_dropped = {
+            str_ID: len(ts_load) - len(arr_time_load)
+            for str_ID, ts_load, (arr_time_load, _) in zip(
+                list_IDs, list_ts, list_datapoints)}
+        return load_matrix
+
+    # Dictionary-interface
+
+    def __getitem__(self, str_ID):
+        arr_row = self._arr_data[self._dict_rows[str_ID]]
+        arr_valid = ~np.isnan(arr_row)
+        if arr_valid.all():
+            arr_row = arr_row.view()
+            arr_row.setflags(write=False)
+            arr_time = self.arr_time.view()
+            arr_time.setflags(write=False)
+            return ts.create_standard_time_series(
+                arr_time, arr_row, dtype=arr_row.dtype)
+        return ts.create_standard_time_series(
+            self.arr_time[arr_valid], arr_row[arr_valid], dtype=arr_row.dtype)
+
+    def __setitem__(self, str_ID, ts_load):
+        arr_time_load, arr_data_load = self._valid_datapoints(ts_load)
+        # The time-axis of the load-point may hold duplicate timestamps
+        if not np.isin(arr_time_load, self.arr_time).all():
+            self._reallocate(
+                max(len(self._dict_rows) + 1, self._arr_data.shape[0]),
+                np.union1d(self.arr_time, arr_time_load))
+        int_row = self._append_empty_row()
+        arr_columns = np.searchsorted(self.arr_time, arr_time_load)
+        self._arr_data[int_row, arr_columns] = arr_data_load
+        self._dict_rows[str_ID] = int_row
+        self._dict_num_dropped[str_ID] = len(ts_load) - len(arr_time_load)
+
+    def __delitem__(self, str_ID):
+        del self._dict_rows[str_ID]
+        self._dict_num_dropped.pop(str_ID, None)
+
+    def __iter__(self):
+        return iter(self._dict_rows)
+
+    def __len__(self):
+        return len(self._dict_rows)
+
+    def __repr__(self):
+        return ("LoadMatrix of " + str(len(self)) + " load-points and "
+                + str(len(self.arr_time)) + " timesteps")
+
+    # Array-interface
+
+    @property
+    def list_IDs(self):
+        """Node-IDs, ordered as the rows of arr_data.
+        """
+        return list(self._dict_rows)
+
+    @property
+    def arr_data(self):
+        """Dense node-by-time array of all load-points, NaN where missing.
+
+        Notes
+        ----------
+        Ordered as list_IDs. The array is compacted first if load-points have
+        been replaced or removed since last access.
+        """
+        int_num_rows = len(self._dict_rows)
+        if list(self._dict_rows.values()) != list(range(int_num_rows)):
+            self._reallocate(self._arr_data.shape[0])
+        return self._arr_data[:int_num_rows]
+
+    def num_dropped_datapoints(self, list_IDs):
+        """Returns number of datapoints without timestamp or value that were
+        dropped when each of the given load-points was assigned.
+
+        Notes
+        ----------
+        Zero for load-points created by from_arrays or write_datapoints, where
+        NaN only means missing.
+        """
+        return np.array([self._dict_num_dropped.get(str_ID, 0)
+                         for str_ID in list_IDs], dtype=np.int64)
+
+    def rows_of(self, list_IDs):
+        """Returns row-indices in the underlying array of the given node-IDs.
+        """
+        return np.array([self._dict_rows[str_ID] for str_ID in list_IDs],
+                        dtype=np.int64)
+
+    def sum_of_loads(self, list_IDs):
+        """Returns the summed load of the given node-IDs as a timeseries.
+
+        Notes
+        ----------
+        Missing datapoints count as zero, and timesteps where every given
+        load-point is missing are left out. Equivalent to an outer join of
+        the corresponding timeseries.
+        """
+        if not list_IDs:
+            return ts.create_standard_time_series([], [])
+        arr_loads = self._arr_data[self.rows_of(list_IDs)]
+        arr_present = ~np.all(np.isnan(arr_loads), axis=0)
+        arr_sum = np.nansum(arr_loads, axis=0, dtype=np.float64)
+        return ts.create_standard_time_series(
+            self.arr_time[arr_present], arr_sum[arr_present])
+
+    def write_datapoints(self, arr_IDs, arr_time, arr_data):
+        """Writes datapoints of many load-points in place.
+
+        Parameters
+        ----------
+        arr_IDs : np.array(str)
+            Node-ID of every datapoint. Missing load-points are created.
+        arr_time : np.array(datetime64)
+            Timestamp of every datapoint, must be on the time-axis.
+        arr_data : np.array(float)
+            Value of every datapoint.
+
+        Notes
+        ----------
+        Intended for bulk ingestion of data, where datapoints of a load-point
+        arrive in several parts. Unlike assignment of whole load-points the
+        rows are written in place, so timeseries previously read from the
+        container will see the change.
+        """
+        arr_columns = np.searchsorted(self.arr_time, arr_time)
+        if (np.any(arr_columns >= len(self.arr_time))
+                or np.any(self.arr_time[np.minimum(
+                    arr_columns, len(self.arr_time) - 1)] != arr_time)):
+            raise Exception("Datapoints written to LoadMatrix must be on its "
+                            "time-axis")
+        arr_unique_IDs, arr_inverse = np.unique(arr_IDs, return_inverse=True)
+        for str_ID in arr_unique_IDs:
+            if str_ID not in self._dict_rows:
+                self._dict_rows[str_ID] = self._append_empty_row()
+        arr_unique_rows = self.rows_of(arr_unique_IDs)
+        self._arr_data[arr_unique_rows[arr_inverse], arr_columns] = arr_data
+        return
+
+    @staticmethod
+    def _valid_datapoints(ts_load):
+        """Returns time and data of datapoints with both timestamp and value.
+        """
+        arr_time = np.asarray(ts_load.arr_time, dtype=ts.STR_TIME_DTYPE)
+        arr_data = np.asarray(ts_load.arr_data)
+        arr_valid = ~(np.isnat(arr_time) | np.isnan(arr_data))
+        if arr_valid.all():
+            return arr_time, arr_data
+        return arr_time[arr_valid], arr_data[arr_valid]
+
+    def _append_empty_row(self):
+        """Returns index of a new row of NaN, growing the array if full.
+        """
+        if self._int_rows_used == self._arr_data.shape[0]:
+            self._reallocate(
+                max(2 * (len(self._dict_rows) + 1), self.INT_MIN_CAPACITY))
+        int_row = self._int_rows_used
+        self._arr_data[int_row] = np.nan
+        self._int_rows_used += 1
+        return int_row
+
+    def _reallocate(self, int_capacity, arr_time_new=None):
+        """Moves all live rows to a new, compacted array.
+        """
+        if arr_time_new is None:
+            arr_time_new = self.arr_time
+        arr_columns = np.searchsorted(arr_time_new, self.arr_time)
+        arr_data_new = np.full((int_capacity, len(arr_time_new)), np.nan,
+                               dtype=self._arr_data.dtype)
+        int_num_rows = len(self._dict_rows)
+        arr_data_new[:int_num_rows, arr_columns] = self._arr_data[
+            list(self._dict_rows.values())]
+
+        self.arr_time = arr_time_new
+        self._arr_data = arr_data_new
+        self._int_rows_used = int_num_rows
+        self._dict_rows = {
+            str_ID: i for i, str_ID in enumerate(self._dict_rows)}
+        return
+
+
+class LazyLoadPoints(MutableMapping):
+    """Load-points which are preprocessed and modelled on first access.
+
+    Notes
+    ----------
+    Behaves like a dictionary of timeseries keyed by node-ID, holding the
+    measured loads and the configuration. A load-point is prepared by
+    prepare_load the first time it is read, and memoized afterwards. The
+    shared temperature-data is prepared once, on the first preparation.
+
+    If dict_cache_config is given, prepared load-points are also stored in
+    the cache of init.data_cache, keyed by the configuration, the measured
+    load and the temperature-data, such that later runs do not prepare them
+    again. Note that cached stochastic models are thus reused between runs.
+
+    Membership-tests and iteration only use the node-ID's, and never
+    prepare any load-points.
+    """
+
+    def __init__(self, dict_config, dict_data, dict_cache_config=None):
+        self._dict_config = dict_config
+        self._dict_data = dict_data
+        self._dict_cache_config = dict_cache_config
+        self._dict_common = None
+        self._str_fingerprint = None
+        self._dict_IDs = dict.fromkeys(dict_data["load_measurements"])
+        self._dict_prepared = {}
+
+    def __getitem__(self, str_ID):
+        if str_ID in self._dict_prepared:
+            return self._dict_prepared[str_ID]
+        if str_ID not in self._dict_IDs:
+            raise KeyError(str_ID)
+        ts_load = self._prepare(str_ID)
+        self._dict_prepared[str_ID] = ts_load
+        return ts_load
+
+    def __setitem__(self, str_ID, ts_load):
+        self._dict_IDs[str_ID] = None
+        self._dict_prepared[str_ID] = ts_load
+
+    def __delitem__(self, str_ID):
+        del self._dict_IDs[str_ID]
+        self._dict_prepared.pop(str_ID, None)
+
+    def __contains__(self, str_ID):
+        return str_ID in self._dict_IDs
+
+    def __iter__(self):
+        return iter(self._dict_IDs)
+
+    def __len__(self):
+        return len(self._dict_IDs)
+
+    def __repr__(self):
+        return ("LazyLoadPoints of " + str(len(self)) + " load-points, "
+                + str(len(self._dict_prepared)) + " prepared")
+
+    def _prepare(self, str_ID):
+        ts_load_measurements = self._dict_data["load_measurements"][str_ID]
+        if self._dict_cache_config is not None:
+            str_cache_key = data_cache.derived_timeseries_cache_key(
+                self._fingerprint() + str_ID, [ts_load_measurements])
+            ts_load = data_cache.load_cached_timeseries(
+                self._dict_cache_config, str_cache_key)
+            if ts_load is not None:
+                return ts_load
+
+        if self._dict_common is None:
+            self._dict_common = prepare_common_data(
+                self._dict_config, self._dict_data)
+        ts_load = prepare_load(self._dict_config, self._dict_common,
+                               str_ID, ts_load_measurements)
+
+        if self._dict_cache_config is not None:
+            data_cache.store_cached_timeseries(
+                self._dict_cache_config, str_cache_key, ts_load)
+        return ts_load
+
+    def _fingerprint(self):
+        """Returns string identifying everything a load-point depends on,
+        except its own measurements.
+        """
+        if self._str_fingerprint is None:
+            dict_config = self._dict_config
+            ts_temperature = utilities.get_first_value_of_dictionary(
+                self._dict_data["temperature_measurements"])
+            dict_fingerprint = {
+                "preprocessing": dict_config["preprocessing"],
+                "modelling": dict_config["modelling"],
+                "load_measurements": dict_config["data"]["load_measurements"],
+                "temperature": data_cache.derived_timeseries_cache_key(
+                    "", [ts_temperature])
+            }
+            self._str_fingerprint = json.dumps(
+                dict_fingerprint, sort_keys=True, default=str)
+        return self._str_fingerprint
+
+
+# Days of the backwards average temperature used in temperature-correction
+INT_TEMPERATURE_AVERAGE_DAYS = 3
+
+
+def prepare_common_data(dict_config, dict_data):
+    """Prepares data shared by all load-points.
+
+    Returns
+    ----------
+    dict_common : dict
+        Daily normal and n-day average temperature, keyed as in the
+        dictionaries given to preprocessing.preprocess_data.
     """
     print("Preparing common data...")
     date_start = dt.date.fromisoformat(
@@ -36,39 +428,144 @@ def prepare_all_loads(dict_config, dict_data):
         dict_data["temperature_measurements"])
     ts_temperature_historical = preprocessing.remove_nan_and_none_datapoints(
         ts_temperature_historical)
-    dict_daily_normal_temperature = preprocessing.compute_daily_historical_normal(
+    arr_daily_normal_temperature = preprocessing.compute_daily_historical_normal(
         ts_temperature_historical)
-    dict_temperature_n_day_average = preprocessing.create_n_day_average_dict(
+    ts_temperature_n_day_average = preprocessing.create_n_day_average_timeseries(
         ts_temperature_historical,
-        date_start, date_end,  n=3)
+        date_start, date_end, n=INT_TEMPERATURE_AVERAGE_DAYS)
+
+    dict_common = {}
+    dict_common["normal_temperature"] = arr_daily_normal_temperature
+    dict_common["n-day_average_temperature"] = ts_temperature_n_day_average
+    return dict_common
+
+
+def prepare_load(dict_config, dict_common, str_node_ID, ts_load_measurements):
+    """Preprocesses and potentially models a single load-point.
+
+    Returns
+    ----------
+    ts_load : timeseries
+        Prepared load of the load-point.
+    """
+    print("--------------------")
+    print("Preparing load-point", str_node_ID + "...")
+
+    dict_node_ts = dict(dict_common)
+    dict_node_ts["load_measurements"] = ts_load_measurements
+
+    print("Preprocessing", str_node_ID + "...")
+    dict_node_ts = preprocessing.preprocess_data(
+        dict_config["preprocessing"], dict_node_ts)
+
+    if dict_config["modelling"]["perform_modelling"]:
+        print("Modelling based on dataset", str_node_ID + "...")
+        dict_model = modelling.model_load(
+            dict_config["modelling"], dict_node_ts)
+        return dict_model["load"]
+    return dict_node_ts["load"]
+
+
+def prepare_all_loads(dict_config, dict_data):
+    """Prepares nodes based on input data and config.
+    Parameters
+    ----------
+    dict_config : dict
+        Configuration-file.
+    dict_data : dictionary of measured loads and temperature.
+
+    Notes
+    ----------
+    All load-points are preprocessed at once as a LoadMatrix, see
+    preprocessing.preprocess_data_of_all_loads, while modelling is performed
+    per load-point. If the measured loads are already a LoadMatrix, e.g. a
+    memory-mapped load-store, and neither temperature-correction nor
+    modelling is enabled, it is used directly without copying any data. This
+    is the only path that does not copy a load-store into memory.
+    Temperature-correction reads the store a block of rows at a time, but
+    holds all corrected loads in memory, as does modelling.
+    Otherwise datapoints with missing timestamp or value are dropped as the
+    LoadMatrix is built, so NaT never becomes part of its time-axis. Results
+    of every preprocessing-step are cached if the config has a
+    [cache]-section.
+
+    If "lazy_load_points" is set in the preprocessing-config, a
+    LazyLoadPoints is returned instead, preparing each load-point when it is
+    first used. Prepared load-points are cached if the config has a
+    [cache]-section.
+    """
+    if dict_config["preprocessing"].get("lazy_load_points", False):
+        print("Load-points will be prepared when first used")
+        return LazyLoadPoints(dict_config, dict_data, dict_config.get("cache"))
 
     print("Preparing all loads in network...")
-    # Preprocessing and potential modelling of every load-point
-    dict_loads_ts = {}
-    for str_node_ID in dict_data["load_measurements"]:
+    load_matrix = dict_data["load_measurements"]
+    if not isinstance(load_matrix, LoadMatrix):
+        load_matrix = LoadMatrix.from_timeseries(load_matrix)
+
+    if dict_config["preprocessing"]["correct_for_temperature"]:
+        dict_all_ts = prepare_common_data(dict_config, dict_data)
+    else:
+        dict_all_ts = {}
+    dict_all_ts["load_measurements"] = load_matrix
+    dict_all_ts = preprocessing.preprocess_data_of_all_loads(
+        dict_config["preprocessing"], dict_all_ts, dict_config.get("cache"))
+    if "cache" in dict_config:
+        data_cache.evict_cache(dict_config["cache"])
+    if not dict_config["modelling"]["perform_modelling"]:
+        print("Successfully prepared all load-points")
+        return dict_all_ts["load"]
+
+    # Modelling of every load-point
+    dict_models_ts = {}
+    for str_node_ID in dict_all_ts["load"]:
         print("--------------------")
-        print("Preparing load-point", str_node_ID + "...")
-
-        dict_node_ts = {}
-        dict_node_ts["load_measurements"] = dict_data["load_measurements"][str_node_ID]
-        dict_node_ts["normal_temperature"] = dict_daily_normal_temperature
-        dict_node_ts["n-day_average_temperature"] = dict_temperature_n_day_average
-
-        print("Preprocessing", str_node_ID + "...")
-        dict_node_ts = preprocessing.preprocess_data(
-            dict_config["preprocessing"], dict_node_ts)
-
-        if dict_config["modelling"]["perform_modelling"]:
-            print("Modelling based on dataset", str_node_ID + "...")
-            dict_model = modelling.model_load(
-                dict_config["modelling"], dict_node_ts)
-            dict_loads_ts[str_node_ID] = dict_model["load"]
-        else:
-            dict_loads_ts[str_node_ID] = dict_node_ts["load"]
+        print("Modelling based on dataset", str_node_ID + "...")
+        dict_node_ts = {"load": dict_all_ts["load"][str_node_ID]}
+        dict_model = modelling.model_load(
+            dict_config["modelling"], dict_node_ts)
+        dict_models_ts[str_node_ID] = dict_model["load"]
 
     print("--------------------")
     print("Successfully prepared all load-points")
-    return dict_loads_ts
+    return LoadMatrix.from_timeseries(dict_models_ts)
+
+
+def aggregate_loads(dict_loads_ts, list_IDs):
+    """Returns the summed load of the given load-points as a timeseries.
+
+    Notes
+    ----------
+    Sums directly over the node-by-time array when loads are stored in a
+    LoadMatrix, otherwise aligns the timeseries individually.
+    """
+    if isinstance(dict_loads_ts, LoadMatrix):
+        return dict_loads_ts.sum_of_loads(list_IDs)
+    return ts.sum_timeseries([dict_loads_ts[str_ID] for str_ID in list_IDs])
+
+
+def resample_all_loads(dict_loads_ts, str_frequency, str_method="mean"):
+    """Resamples every load-point to a new frequency in one operation.
+
+    Parameters
+    ----------
+    dict_loads_ts : LoadMatrix
+        Load-points to resample.
+    str_frequency : str
+        New frequency, "15min", "h" or "D".
+    str_method : str, default="mean"
+        Method of resampling, see objects.resampling.
+
+    Returns
+    ----------
+    dict_loads_resampled : LoadMatrix
+        New container of resampled load-points.
+    """
+    arr_time_new, arr_data_new = resampling.resample_arrays(
+        dict_loads_ts.arr_time, dict_loads_ts.arr_data,
+        str_frequency, str_method)
+    return LoadMatrix.from_arrays(
+        arr_time_new, dict_loads_ts.list_IDs, arr_data_new)
 
 
 def add_new_load(dict_loads_ts, str_new_load_ID, ts_new_load_data):
@@ -0,0 +1,392 @@
+"""Module for storing load-points on disk as memory-mapped arrays.
+
+Notes
+----------
+A load-store is a directory containing
+
+    time.npy    Time-axis shared by all load-points, datetime64.
+    ids.json    Node-ID of every row of data.npy.
+    data.npy    Float-array of shape (nodes, timesteps), NaN where missing.
+                May have spare columns of NaN after the time-axis.
+    key.txt     Optional key of the data-files the store was written from.
+
+Every load-point thus has a fixed-size row at a known offset of data.npy.
+Opening a store memory-maps data.npy instead of reading it, such that the
+operating system pages load-points in and out of memory as they are used.
+This allows analysing more load-points than fit in memory.
+
+A store is written by create_load_store, filled through the memory-map of
+data.npy, and marked as complete by complete_load_store writing ids.json.
+Stores of an unknown number of load-points grow while being filled, see
+write_datapoints_to_load_store, and complete stores may be given a longer
+time-axis, see extend_load_store_time.
+"""
+import io
+import os
+import json
+import shutil
+import numpy as np
+import objects.timeseries as ts
+from objects import resampling
+from objects.load_points import LoadMatrix
+
+STR_TIME_FILENAME = "time.npy"
+STR_IDS_FILENAME = "ids.json"
+STR_DATA_FILENAME = "data.npy"
+STR_KEY_FILENAME = "key.txt"
+
+# Minimum number of rows of a growing store
+INT_MIN_ROWS = 16
+# Number of values copied or resampled at a time
+INT_BLOCK_VALUES = 2**22
+
+
+def load_store_exists(str_dir_path, str_source_key=None):
+    """Returns whether a complete load-store exists at the given directory.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory of the store.
+    str_source_key : str, default=None
+        If given, the store must also have been written from data-files of
+        this key, see write_load_store_key.
+    """
+    if not os.path.isfile(os.path.join(str_dir_path, STR_IDS_FILENAME)):
+        return False
+    if str_source_key is None:
+        return True
+    try:
+        with open(os.path.join(str_dir_path, STR_KEY_FILENAME), 'r') as fp:
+            return fp.read().strip() == str_source_key
+    except FileNotFoundError:
+        return False
+
+
+def write_load_store_key(str_dir_path, str_source_key):
+    """Saves key of the data-files a complete load-store was written from.
+    """
+    with open(os.path.join(str_dir_path, STR_KEY_FILENAME), 'w') as fp:
+        fp.write(str_source_key)
+    return
+
+
+def write_load_store(str_dir_path, dict_loads_ts, dtype=np.float64):
+    """Writes load-points to a load-store.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory to write the store to.
+    dict_loads_ts : LoadMatrix or dict(timeseries)
+        Load-points to store.
+    dtype : np.dtype, default=np.float64
+        Float-type of the stored data.
+
+    Notes
+    ----------
+    Load-points are written one row at a time, such that only a single
+    load-point is held in memory in addition to the input. The list of ID's is
+    written last, marking the store as complete.
+    """
+    print("Writing load-store to", str_dir_path + "...")
+    list_IDs = list(dict_loads_ts)
+    if isinstance(dict_loads_ts, LoadMatrix):
+        arr_time = dict_loads_ts.arr_time
+    else:
+        arr_time = np.asarray([], dtype=ts.STR_TIME_DTYPE)
+        for str_ID in list_IDs:
+            arr_time_i = dict_loads_ts[str_ID].arr_time
+            if not np.array_equal(arr_time_i, arr_time):
+                arr_time = np.union1d(arr_time, arr_time_i)
+    create_load_store(str_dir_path, arr_time, len(list_IDs), dtype)
+
+    arr_data = open_load_store_data(str_dir_path, "r+")
+    for i, str_ID in enumerate(list_IDs):
+        ts_load = dict_loads_ts[str_ID]
+        arr_columns = np.searchsorted(arr_time, ts_load.arr_time)
+        arr_data[i, arr_columns] = ts_load.arr_data
+    arr_data.flush()
+    del arr_data
+
+    complete_load_store(str_dir_path, list_IDs)
+    print("Successfully wrote", len(list_IDs), "load-points to load-store")
+    return
+
+
+def create_load_store(str_dir_path, arr_time, int_num_rows, dtype=np.float64):
+    """Creates an incomplete load-store of rows of NaN.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory to write the store to. An existing store is overwritten.
+    arr_time : np.array(datetime64)
+        Time-axis of the store.
+    int_num_rows : int
+        Number of rows of data.npy.
+    dtype : np.dtype, default=np.float64
+        Float-type of the stored data.
+    """
+    if not os.path.exists(str_dir_path):
+        os.makedirs(str_dir_path)
+    for str_filename in (STR_IDS_FILENAME, STR_KEY_FILENAME):
+        str_file_path = os.path.join(str_dir_path, str_filename)
+        if os.path.exists(str_file_path):
+            os.remove(str_file_path)
+    np.save(os.path.join(str_dir_path, STR_TIME_FILENAME),
+            np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE))
+    arr_data = np.lib.format.open_memmap(
+        os.path.join(str_dir_path, STR_DATA_FILENAME), mode="w+",
+        dtype=dtype, shape=(int_num_rows, len(arr_time)))
+    arr_data[:] = np.nan
+    arr_data.flush()
+    del arr_data
+    return
+
+
+def open_load_store_data(str_dir_path, str_mode="r"):
+    """Memory-maps data.npy of a load-store, which may be incomplete.
+    """
+    return np.load(os.path.join(str_dir_path, STR_DATA_FILENAME),
+                   mmap_mode=str_mode)
+
+
+def resize_load_store(str_dir_path, int_num_rows):
+    """Changes the number of rows of data.npy of an incomplete load-store.
+
+    Notes
+    ----------
+    The header of data.npy is rewritten and the file is truncated or extended
+    in place, such that no rows are copied. If the header of the new shape
+    has another length, which older versions of numpy may give, the rows are
+    instead copied block by block to a new file. Added rows are NaN.
+    """
+    str_data_path = os.path.join(str_dir_path, STR_DATA_FILENAME)
+    arr_data = open_load_store_data(str_dir_path)
+    int_num_rows_old, int_num_timesteps = arr_data.shape
+    dtype = arr_data.dtype
+    int_header_bytes = arr_data.offset
+    del arr_data
+
+    file_header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(file_header, {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (int_num_rows, int_num_timesteps)})
+    if len(file_header.getvalue()) == int_header_bytes:
+        with open(str_data_path, "r+b") as fp:
+            fp.write(file_header.getvalue())
+            fp.truncate(int_header_bytes
+                        + int_num_rows * int_num_timesteps * dtype.itemsize)
+    else:
+        str_new_path = str_data_path + ".new"
+        arr_data = open_load_store_data(str_dir_path)
+        arr_data_new = np.lib.format.open_memmap(
+            str_new_path, mode="w+", dtype=dtype,
+            shape=(int_num_rows, int_num_timesteps))
+        int_block_rows = max(1, INT_BLOCK_VALUES // max(int_num_timesteps, 1))
+        for int_row in range(0, min(int_num_rows, int_num_rows_old),
+                             int_block_rows):
+            int_row_end = min(int_row + int_block_rows, int_num_rows,
+                              int_num_rows_old)
+            arr_data_new[int_row:int_row_end] = arr_data[int_row:int_row_end]
+        arr_data_new.flush()
+        del arr_data, arr_data_new
+        os.replace(str_new_path, str_data_path)
+
+    if int_num_rows > int_num_rows_old:
+        arr_data = open_load_store_data(str_dir_path, "r+")
+        arr_data[int_num_rows_old:] = np.nan
+        arr_data.flush()
+        del arr_data
+    return
+
+
+def write_datapoints_to_load_store(
+        str_dir_path, dict_rows, arr_IDs, arr_columns, arr_data):
+    """Writes datapoints of many load-points to an incomplete load-store.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory of the store.
+    dict_rows : dict(int)
+        Row of every node-ID written so far. Missing node-IDs are given the
+        next free row, in sorted order.
+    arr_IDs : np.array(str)
+        Node-ID of every datapoint.
+    arr_columns : np.array(int)
+        Index on the time-axis of every datapoint.
+    arr_data : np.array(float)
+        Value of every datapoint.
+
+    Notes
+    ----------
+    data.npy is doubled in rows whenever it is full, see resize_load_store,
+    and is only memory-mapped while writing, such that the store can be
+    filled from a file of more load-points than fit in memory. Trim the
+    store to the rows used with complete_load_store.
+    """
+    arr_unique_IDs, arr_inverse = np.unique(arr_IDs, return_inverse=True)
+    for str_ID in arr_unique_IDs:
+        if str_ID not in dict_rows:
+            dict_rows[str_ID] = len(dict_rows)
+    arr_unique_rows = np.array(
+        [dict_rows[str_ID] for str_ID in arr_unique_IDs], dtype=np.int64)
+
+    arr_data_store = open_load_store_data(str_dir_path)
+    int_num_rows = arr_data_store.shape[0]
+    del arr_data_store
+    if len(dict_rows) > int_num_rows:
+        resize_load_store(str_dir_path, max(
+            2 * int_num_rows, len(dict_rows), INT_MIN_ROWS))
+
+    arr_data_store = open_load_store_data(str_dir_path, "r+")
+    arr_data_store[arr_unique_rows[arr_inverse], arr_columns] = arr_data
+    arr_data_store.flush()
+    del arr_data_store
+    return
+
+
+def extend_load_store_time(str_dir_path, arr_time_new):
+    """Gives a load-store a time-axis containing its current one.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory of the store.
+    arr_time_new : np.array(datetime64)
+        Sorted new time-axis, containing every timestamp of the current one.
+        Timestamps added are NaN for all load-points.
+
+    Notes
+    ----------
+    If the timestamps are added after the current ones, and data.npy has
+    enough spare columns, only time.npy is written and no data is moved.
+    Otherwise the rows are moved block by block to a new data.npy with twice
+    the number of columns it had, or as many as needed if more. Appending
+    timestamps thus rewrites the store a number of times logarithmic in the
+    length of the time-axis.
+    """
+    str_time_path = os.path.join(str_dir_path, STR_TIME_FILENAME)
+    str_data_path = os.path.join(str_dir_path, STR_DATA_FILENAME)
+    arr_time = np.load(str_time_path)
+    arr_time_new = np.asarray(arr_time_new, dtype=ts.STR_TIME_DTYPE)
+    arr_data = open_load_store_data(str_dir_path)
+    int_num_rows, int_num_columns = arr_data.shape
+    dtype = arr_data.dtype
+    del arr_data
+    if (len(arr_time_new) <= int_num_columns
+            and np.array_equal(arr_time_new[:len(arr_time)], arr_time)):
+        np.save(str_time_path, arr_time_new)
+        return
+
+    int_num_columns_new = max(2 * int_num_columns, len(arr_time_new))
+    str_new_path = str_data_path + ".new"
+    arr_data = open_load_store_data(str_dir_path)
+    arr_data_new = np.lib.format.open_memmap(
+        str_new_path, mode="w+", dtype=dtype,
+        shape=(int_num_rows, int_num_columns_new))
+    arr_columns = np.searchsorted(arr_time_new, arr_time)
+    int_block_rows = max(1, INT_BLOCK_VALUES // max(int_num_columns_new, 1))
+    for int_row in range(0, int_num_rows, int_block_rows):
+        arr_block = np.full((min(int_block_rows, int_num_rows - int_row),
+                             int_num_columns_new), np.nan, dtype=dtype)
+        arr_block[:, arr_columns] = \
+            arr_data[int_row:int_row + int_block_rows, :len(arr_time)]
+        arr_data_new[int_row:int_row + int_block_rows] = arr_block
+    arr_data_new.flush()
+    del arr_data, arr_data_new
+    os.replace(str_new_path, str_data_path)
+    np.save(str_time_path, arr_time_new)
+    return
+
+
+def complete_load_store(str_dir_path, list_IDs):
+    """Trims data.npy to the rows of the given node-ID's, and writes ids.json.
+
+    Notes
+    ----------
+    The list of ID's is written last, marking the store as complete.
+    """
+    arr_data = open_load_store_data(str_dir_path)
+    int_num_rows = arr_data.shape[0]
+    del arr_data
+    if int_num_rows != len(list_IDs):
+        resize_load_store(str_dir_path, len(list_IDs))
+    with open(os.path.join(str_dir_path, STR_IDS_FILENAME), 'w') as fp:
+        json.dump(list(list_IDs), fp)
+    return
+
+
+def resample_load_store(str_dir_path, str_frequency, str_method="mean"):
+    """Resamples all load-points of a complete load-store, replacing it.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory of the store.
+    str_frequency : str
+        New frequency, "15min", "h" or "D".
+    str_method : str, default="mean"
+        Method of resampling, see objects.resampling.
+
+    Notes
+    ----------
+    Rows are resampled in blocks into a new store next to the old one, which
+    then replaces it. Memory usage is thus bounded by the size of a block.
+    """
+    load_matrix = open_load_store(str_dir_path)
+    list_IDs = load_matrix.list_IDs
+    arr_data = load_matrix.arr_data
+    str_new_path = os.path.normpath(str_dir_path) + ".new"
+    int_block_rows = max(1, INT_BLOCK_VALUES // max(len(load_matrix.arr_time), 1))
+    # Resamples at least one, possibly empty, block to find the new time-axis
+    for int_row in range(0, max(len(list_IDs), 1), int_block_rows):
+        arr_time_new, arr_block = resampling.resample_arrays(
+            load_matrix.arr_time, arr_data[int_row:int_row + int_block_rows],
+            str_frequency, str_method)
+        if int_row == 0:
+            create_load_store(str_new_path, arr_time_new, len(list_IDs),
+                              arr_data.dtype)
+        arr_data_new = open_load_store_data(str_new_path, "r+")
+        arr_data_new[int_row:int_row + len(arr_block)] = arr_block
+        arr_data_new.flush()
+        del arr_data_new
+    complete_load_store(str_new_path, list_IDs)
+
+    del load_matrix, arr_data
+    shutil.rmtree(str_dir_path)
+    os.replace(str_new_path, str_dir_path)
+    return
+
+
+def open_load_store(str_dir_path, str_mode="r"):
+    """Opens a load-store as a LoadMatrix backed by a memory-mapped array.
+
+    Parameters
+    ----------
+    str_dir_path : str
+        Directory of the store.
+    str_mode : str, default="r"
+        Memory-map mode, "r" for read-only or "r+" to write through to disk.
+
+    Returns
+    ----------
+    load_matrix : LoadMatrix
+        Load-points of the store. Reading load-points does not copy data.
+
+    Notes
+    ----------
+    Adding load-points to the returned LoadMatrix makes it move its rows
+    into memory once its capacity is exceeded. The store itself is unchanged.
+    """
+    with open(os.path.join(str_dir_path, STR_IDS_FILENAME), 'r') as fp:
+        list_IDs = json.load(fp)
+    arr_time = np.load(os.path.join(str_dir_path, STR_TIME_FILENAME))
+    arr_data = np.load(os.path.join(str_dir_path, STR_DATA_FILENAME),
+                       mmap_mode=str_mode)
+    if arr_data.shape[1] != len(arr_time):
+        arr_data = arr_data[:, :len(arr_time)]
+    return LoadMatrix.from_arrays(arr_time, list_IDs, arr_data)
@@ -3,10 +3,17 @@ import objects.load_points as load_points
 import objects.timeseries as ts
 import modelling.modelling as modelling
 import numpy as np
-import copy
 import utilities
 
 
+def create_dummy_load():
+    """Returns placeholder-load for not yet implemented ways of generating loads.
+    """
+    arr_time = np.arange(
+        "2000-01-01T01", "2000-01-01T04", dtype="datetime64[h]")
+    return ts.create_standard_time_series(arr_time, [200, 300, 400])
+
+
 def add_new_load_to_net(str_new_load_ID, ts_new_load_data, str_parent_node_ID, dict_loads_ts, g_network):
     """Adds a node to both the network and node-container.
     """
@@ -48,7 +55,8 @@ def interactively_copy_existing_load(dict_loads_ts):
 
     print("Input ID of node you want to copy")
     str_ID = load_points.input_until_node_in_load_points_appears(dict_loads_ts)
-    ts_new_load_data = copy.deepcopy(dict_loads_ts[str_ID])
+    # Timeseries are never modified in place, so sharing the data is safe
+    ts_new_load_data = dict_loads_ts[str_ID]
 
     return ts_new_load_data
 
@@ -59,7 +67,7 @@ def interactively_model_based_on_existing_load(dict_loads_ts, dict_modelling_con
 
     print("Input ID of node you want to model based on")
     str_ID = load_points.input_until_node_in_load_points_appears(dict_loads_ts)
-    ts_modelling_baseline = copy.deepcopy(dict_loads_ts[str_ID])
+    ts_modelling_baseline = dict_loads_ts[str_ID]
 
     dict_data_ts = {"load": ts_modelling_baseline}
     dict_model = modelling.model_load(dict_modelling_config, dict_data_ts)
@@ -92,11 +100,11 @@ def interactively_add_new_loads_to_net(dict_config, dict_loads_ts, g_network):
             elif str_choice == '3':
                 #ts_new_load_data = interactively_model_based_on_max_power(dict_loads_ts)
                 print("Warning: Not yet implemented! Returning dummy-load")
-                ts_new_load_data = np.array([[1, 200], [2, 300], [3, 400]])
+                ts_new_load_data = create_dummy_load()
             elif str_choice == '4':
                 #ts_new_load_data = interactively_model_based_on_categorization(dict_loads_ts)
                 print("Warning: Not yet implemented! Returning dummy-load")
-                ts_new_load_data = np.array([[1, 200], [2, 300], [3, 400]])
+                ts_new_load_data = create_dummy_load()
             elif str_choice == '9':
                 print("Aborting adding new loads to network!")
                 return dict_loads_ts, g_network
@@ -105,7 +113,7 @@ def interactively_add_new_loads_to_net(dict_config, dict_loads_ts, g_network):
                 continue
 
             # Scaling
-            fl_old_max_load = np.max(ts_new_load_data[:, 1])
+            fl_old_max_load = ts_new_load_data.max()
             print("The generated new load has max-load:", fl_old_max_load)
             print(
                 "Input wanted new max-load as to scale the generated load (leave blank for no scaling)")
@@ -221,10 +229,9 @@ def interactively_increase_loads_in_net(dict_loads_ts):
             str_choice = utilities.input_until_acceptable_response(["y", "n"])
             bool_correct_new_load = (str_choice == "y")
 
-            if not bool_correct_new_load:
-                ts_new_load = ts.offset_timeseries(
-                    dict_loads_ts[str_ID], -fl_increase)
-                
+            if bool_correct_new_load:
+                dict_loads_ts[str_ID] = ts_new_load
+            else:
                 print("Retry increasing load or abort?")
                 str_choice = utilities.input_until_acceptable_response(["r", "a"])
                 if str_choice == "r":
@@ -8,17 +8,90 @@ MATPOWER-struct names and columns in these structs.
 Beware that rates in MATPOWER are given in MegaWatt, while
 the load-timeseries are implicitly in KiloWatt.
 
+Columns holding node-ID's are stored as object-arrays of interned strings,
+while all other columns of the MATPOWER-structs are stored as float-arrays.
+
 The point of isolating network-related operations is such that the
 chosen graph-representation may be changed at will, without needing to
 change code outside this module.
 
 """
+import sys
 import pandapower as pp
 import networkx as nx
 import matplotlib.pyplot as plt
 import numpy as np
 import utilities
 
+# Columns of each MATPOWER-struct holding node-ID's, all others are numeric
+DICT_ID_COLUMNS = {
+    "bus": ["BUS_I"],
+    "branch": ["F_BUS", "T_BUS"],
+    "gen": ["GEN_BUS"]
+}
+
+# Standard values of added buses and branches, effectively assuming no
+# impedance and high capacity of the new lines
+DICT_NEW_BUS_VALUES = {
+    "BUS_TYPE": 1, "PD": 0, "QD": 0, "GS": 0, "BS": 0, "BUS_AREA": 1,
+    "VM": 0, "VA": 0, "BASE_KV": 0, "ZONE": 1, "VMAX": 1.04, "VMIN": 0.96
+}
+DICT_NEW_BRANCH_VALUES = {
+    "BR_R": 0, "BR_X": 0, "BR_B": 0, "RATE_A": 1000, "RATE_B": 1000,
+    "RATE_C": 1000, "TAP": 1, "SHIFT": 0, "BR_STATUS": 1, "ANGMIN": 0,
+    "ANGMAX": 0, "PF": 0, "QF": 0, "PT": 0, "QT": 0, "MU_SF": 0, "MU_ST": 0,
+    "MU_ANGMIN": 0, "MU_ANGMAX": 0
+}
+
+
+def create_ID_array(arr_IDs):
+    """Returns object-array of node-ID's as interned strings.
+
+    Notes
+    ----------
+    Interning makes every occurrence of an ID the same string-object, such
+    that ID's repeated throughout the network are only stored once.
+    """
+    return np.array([sys.intern(str(str_ID)) for str_ID in arr_IDs],
+                    dtype=object)
+
+
+def create_typed_network_table(str_table, dict_columns):
+    """Converts columns of a MATPOWER-struct to their types.
+
+    Parameters
+    ----------
+    str_table : str
+        Name of the struct, e.g. "bus" or "branch".
+    dict_columns : dict(np.array)
+        Columns of the struct, keyed by column-name.
+
+    Returns
+    ----------
+    dict_table : dict(np.array)
+        ID-columns as interned strings, other columns as floats.
+
+    Notes
+    ----------
+    For structs missing from DICT_ID_COLUMNS, columns which are not fully
+    numeric are kept as interned strings.
+    """
+    list_ID_columns = DICT_ID_COLUMNS.get(str_table)
+    dict_table = {}
+    for str_column, arr_column in dict_columns.items():
+        if list_ID_columns is not None:
+            if str_column in list_ID_columns:
+                dict_table[str_column] = create_ID_array(arr_column)
+            else:
+                dict_table[str_column] = np.asarray(arr_column,
+                                                    dtype=np.float64)
+            continue
+        try:
+            dict_table[str_column] = np.asarray(arr_column, dtype=np.float64)
+        except ValueError:
+            dict_table[str_column] = create_ID_array(arr_column)
+    return dict_table
+
 
 def plot_network(dict_network):
     """
@@ -81,9 +154,9 @@ def convert_network_dictionary_to_pp(dict_network):
     """
     ppc = {}
     for filename in dict_network:
-        list_columns = [dict_network[filename][key] for key in dict_network[filename]]
-        tup_columns = tuple(list_columns)
-        ppc[filename] = (np.column_stack(tup_columns)).astype(np.float64)
+        list_columns = [np.asarray(dict_network[filename][key], dtype=np.float64)
+                        for key in dict_network[filename]]
+        ppc[filename] = np.column_stack(list_columns)
     ppc["baseMVA"] = 125    # Hard-coded, needs flexibility
     pp_network = pp.converter.from_ppc(ppc, f_hz=50, validate_conversion=False)
     print("Successfully converted MATPOWER-formatted array to pandapower format")
@@ -120,45 +193,21 @@ def add_node(dict_network, n_node, n_parent_node):
     dict_bus = dict_network['bus']
 
     # Adding the node to the dictionary of buses
-    dict_bus['BUS_I'] = np.append(dict_bus['BUS_I'],n_node)
-    dict_bus['BUS_TYPE'] = np.append(dict_bus['BUS_TYPE'],'1')
-    dict_bus['PD'] = np.append(dict_bus['PD'],'0')
-    dict_bus['QD'] = np.append(dict_bus['QD'],'0')
-    dict_bus['GS'] = np.append(dict_bus['GS'],'0')
-    dict_bus['BS'] = np.append(dict_bus['BS'],'0')
-    dict_bus['BUS_AREA'] = np.append(dict_bus['BUS_AREA'],'1')
-    dict_bus['VM'] = np.append(dict_bus['VM'],'0')
-    dict_bus['VA'] = np.append(dict_bus['VA'],'0')
-    dict_bus['BASE_KV'] = np.append(dict_bus['BASE_KV'],'0')
-    dict_bus['ZONE'] = np.append(dict_bus['ZONE'],'1')
-    dict_bus['VMAX'] = np.append(dict_bus['VMAX'],'1.04')
-    dict_bus['VMIN'] = np.append(dict_bus['VMIN'],'0.96')
+    dict_bus['BUS_I'] = np.append(dict_bus['BUS_I'],
+                                  create_ID_array([n_node]))
+    for str_column, fl_value in DICT_NEW_BUS_VALUES.items():
+        dict_bus[str_column] = np.append(dict_bus[str_column], fl_value)
 
     dict_branch = dict_network['branch']
 
     # Adding the branch to the dictionary of branches
-    dict_branch['F_BUS'] = np.append(dict_branch['F_BUS'], n_parent_node)
-    dict_branch['T_BUS'] = np.append(dict_branch['T_BUS'], n_node)
-    dict_branch['BR_R'] = np.append(dict_branch['BR_R'], '0')
-    dict_branch['BR_X'] = np.append(dict_branch['BR_X'], '0')
-    dict_branch['BR_B'] = np.append(dict_branch['BR_B'], '0')
-    dict_branch['RATE_A'] = np.append(dict_branch['RATE_A'], '1000')
-    dict_branch['RATE_B'] = np.append(dict_branch['RATE_B'], '1000')
-    dict_branch['RATE_C'] = np.append(dict_branch['RATE_C'], '1000')
-    dict_branch['TAP'] = np.append(dict_branch['TAP'], '1')
-    dict_branch['SHIFT'] = np.append(dict_branch['SHIFT'], '0')
-    dict_branch['BR_STATUS'] = np.append(dict_branch['BR_STATUS'], '1')
-    dict_branch['ANGMIN'] = np.append(dict_branch['ANGMIN'], '0')
-    dict_branch['ANGMAX'] = np.append(dict_branch['ANGMAX'], '0')
-    dict_branch['PF'] = np.append(dict_branch['PF'], '0')
-    dict_branch['QF'] = np.append(dict_branch['QF'], '0')
-    dict_branch['PT'] = np.append(dict_branch['PT'], '0')
-    dict_branch['QT'] = np.append(dict_branch['QT'], '0')
-    dict_branch['MU_SF'] = np.append(dict_branch['MU_SF'], '0')
-    dict_branch['MU_ST'] = np.append(dict_branch['MU_ST'], '0')
-    dict_branch['MU_ANGMIN'] = np.append(dict_branch['MU_ANGMIN'], '0')
-    dict_branch['MU_ANGMAX'] = np.append(dict_branch['MU_ANGMAX'], '0')
-    
+    dict_branch['F_BUS'] = np.append(dict_branch['F_BUS'],
+                                     create_ID_array([n_parent_node]))
+    dict_branch['T_BUS'] = np.append(dict_branch['T_BUS'],
+                                     create_ID_array([n_node]))
+    for str_column, fl_value in DICT_NEW_BRANCH_VALUES.items():
+        dict_branch[str_column] = np.append(dict_branch[str_column], fl_value)
+
     return dict_network
 
 
@@ -0,0 +1,204 @@
+"""Module for changing the time-resolution of timeseries.
+
+Notes
+----------
+All resampling is done on 2-D arrays of shape (series, timesteps) sharing a
+single time-axis, such that every load-point of a network is resampled at once.
+Missing datapoints are represented as NaN.
+
+Supported methods when downsampling (e.g. 15-minute to hourly) are "mean",
+"max", "min" and "sum". When upsampling (e.g. daily to hourly), "mean" holds
+each value over its interval, "sum" splits each value evenly over its
+interval and "linear" interpolates between datapoints. "mean" is energy-
+preserving for power-values (kW), while "sum" is energy-preserving for
+energy-values (kWh) in both directions.
+"""
+import numpy as np
+from objects import timeseries as ts
+
+DICT_FREQUENCY_SECONDS = {
+    "15min": 15 * 60,
+    "h": 60 * 60,
+    "D": 24 * 60 * 60
+}
+
+
+def frequency_to_seconds(str_frequency):
+    """Converts frequency-string to length of timestep in seconds.
+    """
+    if str_frequency not in DICT_FREQUENCY_SECONDS:
+        raise Exception("Unsupported frequency \"" + str_frequency + "\"")
+    return DICT_FREQUENCY_SECONDS[str_frequency]
+
+
+def find_timestep_seconds(arr_time):
+    """Returns the typical timestep of a time-axis in seconds.
+
+    Notes
+    ----------
+    Uses the most frequent distance between timestamps, such that occasional
+    missing datapoints do not affect the result.
+    """
+    if len(arr_time) < 2:
+        raise Exception("Cannot find timestep of less than two timestamps")
+    arr_time_int = np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE).view(np.int64)
+    arr_steps, arr_counts = np.unique(np.diff(arr_time_int), return_counts=True)
+    return int(arr_steps[np.argmax(arr_counts)])
+
+
+def downsample_arrays(arr_time, arr_data, int_step, str_method="mean"):
+    """Aggregates datapoints into longer timesteps.
+
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+        Sorted time-axis shared by all rows of arr_data.
+    arr_data : np.array
+        2-D array of shape (series, timesteps).
+    int_step : int
+        New timestep in seconds.
+    str_method : str, default="mean"
+        "mean", "max", "min" or "sum" of the datapoints within each timestep.
+
+    Returns
+    ----------
+    arr_time_new : np.array(datetime64)
+        Start of every new timestep containing at least one datapoint.
+    arr_data_new : np.array
+        2-D array of resampled data, NaN where all datapoints are missing.
+    """
+    arr_time_int = np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE).view(np.int64)
+    arr_bins = arr_time_int // int_step
+    arr_starts = np.flatnonzero(
+        np.concatenate(([True], arr_bins[1:] != arr_bins[:-1])))
+    arr_time_new = (arr_bins[arr_starts] * int_step).astype(ts.STR_TIME_DTYPE)
+
+    arr_valid = ~np.isnan(arr_data)
+    arr_count = np.add.reduceat(arr_valid, arr_starts, axis=1, dtype=np.int64)
+    if str_method in ("mean", "sum"):
+        arr_sum = np.add.reduceat(
+            np.where(arr_valid, arr_data, 0), arr_starts, axis=1)
+        if str_method == "mean":
+            with np.errstate(invalid="ignore", divide="ignore"):
+                arr_data_new = arr_sum / arr_count
+        else:
+            arr_data_new = arr_sum
+    elif str_method == "max":
+        arr_data_new = np.fmax.reduceat(arr_data, arr_starts, axis=1)
+    elif str_method == "min":
+        arr_data_new = np.fmin.reduceat(arr_data, arr_starts, axis=1)
+    else:
+        raise Exception("Unsupported downsampling method \"" + str_method + "\"")
+    arr_data_new[arr_count == 0] = np.nan
+    return arr_time_new, arr_data_new
+
+
+def upsample_arrays(arr_time, arr_data, int_step, str_method="mean"):
+    """Distributes datapoints over shorter timesteps.
+
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+        Sorted time-axis shared by all rows of arr_data.
+    arr_data : np.array
+        2-D array of shape (series, timesteps).
+    int_step : int
+        New timestep in seconds.
+    str_method : str, default="mean"
+        "mean" to hold, "sum" to split evenly or "linear" to interpolate.
+
+    Returns
+    ----------
+    arr_time_new : np.array(datetime64)
+        Regular time-axis from the first datapoint to the end of the interval
+        of the last datapoint.
+    arr_data_new : np.array
+        2-D array of resampled data. Timesteps within gaps of the original
+        time-axis are NaN, except when interpolating.
+    """
+    arr_time_int = np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE).view(np.int64)
+    int_step_old = find_timestep_seconds(arr_time)
+    arr_time_new_int = np.arange(
+        arr_time_int[0], arr_time_int[-1] + int_step_old, int_step)
+    arr_time_new = arr_time_new_int.astype(ts.STR_TIME_DTYPE)
+
+    arr_index = np.searchsorted(arr_time_int, arr_time_new_int, side="right") - 1
+    if str_method == "linear":
+        arr_index = np.clip(arr_index, 0, len(arr_time_int) - 2)
+        arr_fraction = np.clip(
+            (arr_time_new_int - arr_time_int[arr_index])
+            / (arr_time_int[arr_index + 1] - arr_time_int[arr_index]), 0, 1)
+        arr_data_new = (arr_data[:, arr_index] * (1 - arr_fraction)
+                        + arr_data[:, arr_index + 1] * arr_fraction)
+        return arr_time_new, arr_data_new
+
+    if str_method == "mean":
+        arr_data_new = arr_data[:, arr_index]
+    elif str_method == "sum":
+        arr_data_new = arr_data[:, arr_index] / (int_step_old / int_step)
+    else:
+        raise Exception("Unsupported upsampling method \"" + str_method + "\"")
+    arr_in_gap = (arr_time_new_int - arr_time_int[arr_index]) >= int_step_old
+    arr_data_new[:, arr_in_gap] = np.nan
+    return arr_time_new, arr_data_new
+
+
+def resample_arrays(arr_time, arr_data, str_frequency, str_method="mean"):
+    """Resamples 2-D array of series sharing a time-axis to a new frequency.
+
+    Parameters
+    ----------
+    arr_time : np.array(datetime64)
+        Sorted time-axis shared by all rows of arr_data.
+    arr_data : np.array
+        2-D array of shape (series, timesteps).
+    str_frequency : str
+        New frequency, "15min", "h" or "D".
+    str_method : str, default="mean"
+        Method of resampling, see module notes.
+
+    Returns
+    ----------
+    arr_time_new : np.array(datetime64)
+    arr_data_new : np.array
+
+    Notes
+    ----------
+    A time-axis of less than two timestamps has no timestep to resample from,
+    and is returned unchanged.
+    """
+    int_step = frequency_to_seconds(str_frequency)
+    if len(arr_time) < 2:
+        return np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE), arr_data
+    int_step_old = find_timestep_seconds(arr_time)
+    if int_step_old < int_step:
+        return downsample_arrays(arr_time, arr_data, int_step, str_method)
+    elif int_step_old > int_step:
+        return upsample_arrays(arr_time, arr_data, int_step, str_method)
+    return np.asarray(arr_time, dtype=ts.STR_TIME_DTYPE), arr_data
+
+
+def resample_timeseries(ts_data, str_frequency, str_method="mean"):
+    """Resamples timeseries to a new frequency.
+
+    Parameters
+    ----------
+    ts_data : timeseries
+        Timeseries to resample.
+    str_frequency : str
+        New frequency, "15min", "h" or "D".
+    str_method : str, default="mean"
+        Method of resampling, see module notes.
+
+    Returns
+    ----------
+    ts_resampled : timeseries
+        Resampled timeseries, datapoints without data are left out.
+    """
+    arr_time_new, arr_data_new = resample_arrays(
+        ts_data.arr_time, ts_data.arr_data[np.newaxis, :],
+        str_frequency, str_method)
+    arr_valid = ~np.isnan(arr_data_new[0])
+    return ts.create_standard_time_series(
+        arr_time_new[arr_valid], arr_data_new[0, arr_valid],
+        dtype=ts_data.arr_data.dtype)
@@ -1,35 +1,210 @@
+"""Module for the timeseries-format used throughout the code platform.
+
+Notes
+----------
+A timeseries is stored columnar, as a datetime64 time-axis and a contiguous
+float-array of data-values. Vectorized code should use the attributes arr_time
+and arr_data directly.
+
+Timeseries are treated as immutable. Scaling and offsetting return a new
+timeseries sharing the data of the original, where the affine transform is
+only applied once the data-values are accessed.
+
+For compatibility with code written against the old 2-column object-array
+format, a timeseries may still be indexed as ts[i], ts[i, 0], ts[:, 0],
+ts[:, 1] or ts[i:j, :]. Indexing the time-column this way returns python
+datetimes, which is slow and should be avoided in performance-critical code.
+"""
 import numpy as np
-import utilities
 
-def create_standard_time_series(arr_time_dt, arr_data):
+STR_TIME_DTYPE = "datetime64[s]"
+
+
+class Timeseries:
+    """Columnar timeseries of timestamps and associated data-values.
+
+    Attributes
+    ----------
+    arr_time : np.array(datetime64)
+        Time-axis of the timeseries.
+    arr_data : np.array(float)
+        Data-values, arr_data[i] is associated to arr_time[i].
+
+    Notes
+    ----------
+    The data-values are stored as a base-array and an affine transform,
+    fl_scale * base + fl_offset, which is materialized and memoized on first
+    access of arr_data.
+    """
+
+    def __init__(self, arr_time, arr_data, dtype=np.float64,
+                 fl_scale=1.0, fl_offset=0.0):
+        self.arr_time = np.asarray(arr_time, dtype=STR_TIME_DTYPE)
+        self._arr_data_base = np.ascontiguousarray(arr_data, dtype=dtype)
+        self._fl_scale = fl_scale
+        self._fl_offset = fl_offset
+        if fl_scale == 1 and fl_offset == 0:
+            self._arr_data = self._arr_data_base
+        else:
+            self._arr_data = None
+        if self.arr_time.shape != self._arr_data_base.shape:
+            raise Exception("Time-axis and data of timeseries differ in length")
+
+    # Fast accessors
+
+    @property
+    def arr_data(self):
+        if self._arr_data is None:
+            self._arr_data = (self._fl_scale * self._arr_data_base
+                              + self._fl_offset)
+        return self._arr_data
+
+    @property
+    def arr_time_int(self):
+        """Time-axis as int64 seconds since epoch, without copying.
+        """
+        return self.arr_time.view(np.int64)
+
+    @property
+    def shape(self):
+        return (len(self.arr_time), 2)
+
+    @property
+    def size(self):
+        return 2 * len(self.arr_time)
+
+    @property
+    def ndim(self):
+        return 2
+
+    def __len__(self):
+        return len(self.arr_time)
+
+    def max(self):
+        """Returns max data-value, without materializing any transform.
+        """
+        if self._arr_data is not None:
+            return np.max(self._arr_data)
+        if self._fl_scale >= 0:
+            return self._fl_scale * np.max(self._arr_data_base) + self._fl_offset
+        return self._fl_scale * np.min(self._arr_data_base) + self._fl_offset
+
+    def transformed(self, fl_scale=1.0, fl_offset=0.0):
+        """Returns a lazily scaled and offset view of the timeseries.
+
+        Parameters
+        ----------
+        fl_scale, fl_offset : float
+            New data-values become fl_scale * data + fl_offset.
+
+        Returns
+        ----------
+        ts_transformed : Timeseries
+            Timeseries sharing time-axis and base-data with this timeseries.
+        """
+        return Timeseries(
+            self.arr_time, self._arr_data_base,
+            dtype=self._arr_data_base.dtype,
+            fl_scale=fl_scale * self._fl_scale,
+            fl_offset=fl_scale * self._fl_offset + fl_offset)
+
+    def __repr__(self):
+        return "Timeseries of length " + str(len(self))
+
+    # Compatibility with 2-column object-arrays
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, col = key
+            if isinstance(col, slice) and col == slice(None):
+                return self._get_rows(rows)
+            elif col == 0:
+                return _datetime64_to_datetime(self.arr_time[rows])
+            elif col == 1:
+                return self.arr_data[rows]
+            raise IndexError("Timeseries only has two columns")
+        return self._get_rows(key)
+
+    def __setitem__(self, key, value):
+        # Copy on write, as arrays may be shared with other timeseries
+        if not isinstance(key, tuple):
+            raise IndexError("Only single columns of a timeseries may be set")
+        rows, col = key
+        if col == 0:
+            arr_time = self.arr_time.copy()
+            arr_time[rows] = np.asarray(value, dtype=STR_TIME_DTYPE)
+            self.arr_time = arr_time
+        elif col == 1:
+            arr_data = self.arr_data.copy()
+            arr_data[rows] = value
+            self._arr_data_base = self._arr_data = arr_data
+            self._fl_scale, self._fl_offset = 1.0, 0.0
+        else:
+            raise IndexError("Timeseries only has two columns")
+
+    def __iter__(self):
+        return zip(self[:, 0], self.arr_data)
+
+    def __array__(self, dtype=None, copy=None):
+        arr = np.empty((len(self), 2), dtype=object)
+        arr[:, 0] = self[:, 0]
+        arr[:, 1] = self.arr_data
+        return arr if dtype is None else arr.astype(dtype)
+
+    def _get_rows(self, rows):
+        if isinstance(rows, (int, np.integer)):
+            return (self.arr_time[rows].item(), self.arr_data[rows])
+        return Timeseries(self.arr_time[rows], self._arr_data_base[rows],
+                          dtype=self._arr_data_base.dtype,
+                          fl_scale=self._fl_scale, fl_offset=self._fl_offset)
+
+
+def _datetime64_to_datetime(time):
+    """Converts datetime64-array or -scalar to python datetime(s).
+    """
+    if isinstance(time, np.ndarray):
+        return time.astype(object)
+    return time.item()
+
+
+def create_standard_time_series(arr_time_dt, arr_data, dtype=np.float64):
     """Returns timeseries on standardized format
 
     Parameters
     ----------
     arr_time_dt : np.array
-        Array of timestamps.
+        Array of timestamps, datetime or datetime64.
     arr_data : np.arrary
         Array of data associated to the timestamps.
+    dtype : np.dtype, default=np.float64
+        Float-type the data is stored as, np.float32 halves memory usage.
 
     Returns
     ----------
-    timeseries = np.array([datetime, float])
-        Timeseries-array.
+    timeseries : Timeseries
+        Timeseries with datetime64 time-axis and float data.
 
     Notes
     ----------
-    "Standardized" here means that the timeseries is formatted vertically, 
+    "Standardized" here means that the timeseries is formatted vertically,
     such that array[i] accesses the ith datapoint.
     """
-    return np.transpose(np.array([arr_time_dt, arr_data]))
+    return Timeseries(arr_time_dt, arr_data, dtype=dtype)
 
 
-def add_timeseries(ts_a, ts_b):
-    """Returns the sum of data-values in two timeseries
+def sum_timeseries(list_ts, str_join="outer", fl_fill_value=0.0):
+    """Returns the timestamp-aligned sum of data-values in many timeseries
 
     Parameters:
     ----------
-    ts_a, ts_b : timeseries
+    list_ts : list(timeseries)
+        Timeseries to sum, each sorted by time.
+    str_join : str, default="outer"
+        "outer" keeps the union of all timestamps, "inner" only keeps
+        timestamps present in every timeseries.
+    fl_fill_value : float, default=0.0
+        Value used in place of missing datapoints when str_join is "outer".
+        Using np.nan makes the sum undefined wherever any timeseries is missing.
 
     Returns:
     ----------
@@ -38,59 +213,93 @@ def add_timeseries(ts_a, ts_b):
 
     Notes:
     ----------
-    This function will cause skewing if both datasets contain similar amount of
-    missing datapoints.
+    All timeseries are aligned in one pass, by finding the position of every
+    timestamp in the sorted union of timestamps through binary search.
+    Timeseries sharing an identical time-axis are added directly.
+    """
+    list_ts = [ts for ts in list_ts if len(ts) > 0]
+    if not list_ts:
+        return create_standard_time_series([], [])
+    if str_join not in ("outer", "inner"):
+        raise Exception("Unsupported join \"" + str_join + "\"")
 
-    The function will amend non-equally sized timeseries by searching for
-    matching timestamps.
+    arr_time_first = list_ts[0].arr_time
+    if all(np.array_equal(ts.arr_time, arr_time_first) for ts in list_ts[1:]):
+        arr_sum = np.sum([ts.arr_data for ts in list_ts], axis=0,
+                         dtype=np.float64)
+        return create_standard_time_series(arr_time_first, arr_sum)
 
-    """
-    if not ts_a.size > 0:
-        return ts_b
-    if not ts_b.size > 0:
-        return ts_a
+    int_num_ts = len(list_ts)
+    arr_time_union = np.unique(np.concatenate([ts.arr_time for ts in list_ts]))
+    arr_sum = np.zeros(len(arr_time_union))
+    arr_count = np.zeros(len(arr_time_union), dtype=np.int64)
+    for ts_i in list_ts:
+        arr_index = np.searchsorted(arr_time_union, ts_i.arr_time)
+        arr_sum += np.bincount(arr_index, weights=ts_i.arr_data,
+                               minlength=len(arr_time_union))
+        arr_count += np.bincount(arr_index, minlength=len(arr_time_union))
 
-    if len(ts_a) != len(ts_b):
-        print("Warning: Mismatching length when adding timeseries!")
+    if str_join == "inner":
+        arr_complete = (arr_count >= int_num_ts)
+        return create_standard_time_series(
+            arr_time_union[arr_complete], arr_sum[arr_complete])
+
+    if fl_fill_value != 0:
+        arr_missing = (arr_count < int_num_ts)
+        arr_sum[arr_missing] += ((int_num_ts - arr_count[arr_missing])
+                                 * fl_fill_value)
+    return create_standard_time_series(arr_time_union, arr_sum)
 
-        if len(ts_a[:, 0]) < len(ts_b[:, 0]):
-            ts_shortest, ts_longest = ts_a, ts_b
-        else:
-            ts_shortest, ts_longest = ts_b, ts_a
-        int_first_index = utilities.first_matching_index(
-            ts_longest[:, 0],
-            lambda dt: dt == ts_shortest[0, 0])
-        ts_first_part_of_sum = ts_longest[:int_first_index, :]
-        ts_second_part_of_sum = add_timeseries(
-            ts_shortest,
-            ts_longest[int_first_index:, :])
-        ts_sum = np.concatenate((ts_first_part_of_sum,
-                                ts_second_part_of_sum),
-                                axis=0)
-
-    else:
-        arr_time = ts_a[:, 0]
-        arr_data = ts_a[:, 1] + ts_b[:, 1]
-        ts_sum = np.transpose(np.array([arr_time, arr_data]))
-    return ts_sum
+
+def add_timeseries(ts_a, ts_b, str_join="outer", fl_fill_value=0.0):
+    """Returns the timestamp-aligned sum of data-values in two timeseries
+
+    Parameters:
+    ----------
+    ts_a, ts_b : timeseries
+    str_join : str, default="outer"
+        "outer" for union of timestamps, "inner" for intersection.
+    fl_fill_value : float, default=0.0
+        Value used in place of missing datapoints when str_join is "outer".
+
+    Returns:
+    ----------
+    ts_sum : timeseries
+        Sum of input timeseries.
+
+    Notes:
+    ----------
+    See sum_timeseries.
+    """
+    return sum_timeseries([ts_a, ts_b], str_join, fl_fill_value)
 
 
 def offset_timeseries(ts, fl):
-    """Offsets all datapoints in a timeseries by some number.
+    """Returns timeseries with all datapoints offset by some number.
+
+    Notes
+    ----------
+    The input is left unchanged, and no data is copied until the data-values
+    of the returned timeseries are accessed.
     """
-    ts[:, 1] += fl
-    return ts
+    return ts.transformed(fl_offset=fl)
 
 
 def scale_timeseries(ts, fl):
-    """Scales all datapoints in a timeseries by some number.
+    """Returns timeseries with all datapoints scaled by some number.
+
+    Notes
+    ----------
+    The input is left unchanged, and no data is copied until the data-values
+    of the returned timeseries are accessed.
     """
-    ts[:,1] *= fl
-    return ts
+    return ts.transformed(fl_scale=fl)
 
 
 def normalize_timeseries(ts, new_max=1):
-    old_max = np.max(ts[:,1])
+    """Returns timeseries scaled such that its max datapoint equals new_max.
+    """
+    old_max = ts.max()
     scale = new_max/old_max
     ts = scale_timeseries(ts, scale)
-    return ts
\ No newline at end of file
+    return ts
@@ -1,5 +1,6 @@
 import numpy as np
 import datetime as dt
+from collections.abc import Mapping
 
 # Dictionary utility
 
@@ -16,7 +17,7 @@ def print_dictionary_recursive(dictionary, depth=0):
     for key in dictionary:
         print(depth*"\t", key, end=': ')
         value = dictionary[key]
-        if isinstance(value, dict):
+        if isinstance(value, Mapping):
             print()
             print_dictionary_recursive(value, depth + 1)
         else:
@@ -94,7 +95,7 @@ def interactively_traverse_nested_dictionary(dict_choices):
             print("Could not find key, try again")
         else:
             bool_successful_input = True
-    if type(dict_choices[str_key]) == dict:
+    if isinstance(dict_choices[str_key], Mapping):
         str_final_key, data = interactively_traverse_nested_dictionary(
             dict_choices[str_key])
     else:
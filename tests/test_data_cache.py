@@ -0,0 +1,104 @@
+"""Checks that cache-keys change exactly when the cached result may change.
+"""
+import os
+import sys
+import numpy as np
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from objects import timeseries as ts  # noqa: E402
+from objects import load_store  # noqa: E402
+from objects.load_points import LoadMatrix  # noqa: E402
+from init import data_cache  # noqa: E402
+from init import preprocessing  # noqa: E402
+
+DICT_DATA_CONFIG = {
+    "path": "data/",
+    "date_format": ["%Y-%m-%d %H:%M"],
+    "first_date_iso": "2020-01-01",
+    "last_date_iso": "2020-12-31",
+    "separator": ";",
+    "workers": 1
+}
+
+
+def create_data_file(tmp_path):
+    str_path = str(tmp_path / "load.csv")
+    with open(str_path, 'w') as fp:
+        fp.write("2020-01-01 00:00;1.0\n")
+    return str_path
+
+
+def test_cache_key_depends_on_parsing_config(tmp_path):
+    str_path = create_data_file(tmp_path)
+    str_key = data_cache.cache_key(str_path, DICT_DATA_CONFIG, {})
+
+    for str_field, value in [("last_date_iso", "2021-12-31"),
+                             ("path", "other/"), ("workers", 4)]:
+        dict_data_config = dict(DICT_DATA_CONFIG, **{str_field: value})
+        assert data_cache.cache_key(str_path, dict_data_config, {}) == str_key
+    for str_field, value in [("date_format", ["%d.%m.%Y %H:%M"]),
+                             ("separator", ","), ("decimal", ",")]:
+        dict_data_config = dict(DICT_DATA_CONFIG, **{str_field: value})
+        assert data_cache.cache_key(str_path, dict_data_config, {}) != str_key
+
+
+def test_cache_key_depends_on_file(tmp_path):
+    str_path = create_data_file(tmp_path)
+    str_key = data_cache.cache_key(str_path, DICT_DATA_CONFIG, {})
+    stat_file = os.stat(str_path)
+
+    os.utime(str_path, ns=(stat_file.st_atime_ns,
+                           stat_file.st_mtime_ns + 10**9))
+    assert data_cache.cache_key(str_path, DICT_DATA_CONFIG, {}) != str_key
+
+    # Contents of equal size and modification-time are only told apart when
+    # hashing contents
+    stat_file = os.stat(str_path)
+    dict_cache_config = {"hash_contents": True}
+    str_key = data_cache.cache_key(str_path, DICT_DATA_CONFIG, {})
+    str_key_hashed = data_cache.cache_key(
+        str_path, DICT_DATA_CONFIG, dict_cache_config)
+    with open(str_path, 'w') as fp:
+        fp.write("2020-01-01 00:00;2.0\n")
+    os.utime(str_path, ns=(stat_file.st_atime_ns, stat_file.st_mtime_ns))
+    assert data_cache.cache_key(str_path, DICT_DATA_CONFIG, {}) == str_key
+    assert data_cache.cache_key(
+        str_path, DICT_DATA_CONFIG, dict_cache_config) != str_key_hashed
+
+
+def test_derived_key_depends_on_timeseries():
+    arr_time = np.array(["2020-01-01T00", "2020-01-01T01"],
+                        dtype=ts.STR_TIME_DTYPE)
+    ts_a = ts.create_standard_time_series(arr_time, [1.0, 2.0])
+    ts_b = ts.create_standard_time_series(arr_time, [1.0, 3.0])
+    str_key = data_cache.derived_timeseries_cache_key("step", [ts_a])
+
+    assert data_cache.derived_timeseries_cache_key("step", [ts_a]) == str_key
+    assert data_cache.derived_timeseries_cache_key("step", [ts_b]) != str_key
+    assert data_cache.derived_timeseries_cache_key("other", [ts_a]) != str_key
+
+
+def test_content_hash_of_load_store_changes_when_written(tmp_path):
+    str_store_path = str(tmp_path / "store")
+    arr_time = np.array(["2020-01-01T00", "2020-01-01T01"],
+                        dtype=ts.STR_TIME_DTYPE)
+    load_store.write_load_store(str_store_path, LoadMatrix.from_arrays(
+        arr_time, ["a"], np.array([[1.0, 2.0]])))
+    load_matrix = load_store.open_load_store(str_store_path)
+    str_hash = preprocessing.content_hash(load_matrix)
+    del load_matrix
+
+    assert preprocessing.content_hash(
+        load_store.open_load_store(str_store_path)) == str_hash
+    str_data_path = os.path.join(str_store_path, load_store.STR_DATA_FILENAME)
+    stat_file = os.stat(str_data_path)
+    arr_data = load_store.open_load_store_data(str_store_path, "r+")
+    arr_data[0, 0] = 5.0
+    arr_data.flush()
+    del arr_data
+    os.utime(str_data_path, ns=(stat_file.st_atime_ns,
+                                stat_file.st_mtime_ns + 10**9))
+    assert preprocessing.content_hash(
+        load_store.open_load_store(str_store_path)) != str_hash
@@ -0,0 +1,33 @@
+"""Checks that the example configuration loads its example data.
+
+Notes
+----------
+The example data is not part of the repository, so the checks are skipped
+where it is missing.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from init import data_loading  # noqa: E402
+
+STR_CONFIG_PATH = "in_data/example_data/example_config.toml"
+
+
+@pytest.mark.skipif(
+    not os.path.isfile(os.path.join(STR_ROOT_PATH, STR_CONFIG_PATH)),
+    reason="Example data not present")
+def test_example_load_measurements_have_valid_timestamps(monkeypatch):
+    monkeypatch.chdir(STR_ROOT_PATH)
+    dict_config = data_loading.load_config(STR_CONFIG_PATH)
+    dict_loads_ts = data_loading.load_data_and_create_timeseries(
+        dict_config["data"]["load_measurements"])
+    assert len(dict_loads_ts) > 0
+    for ts_load in dict_loads_ts.values():
+        assert len(ts_load) == 8760
+        assert not np.isnat(ts_load.arr_time).any()
+        assert ts_load.arr_time[0] == np.datetime64("2020-01-01T01:00:00")
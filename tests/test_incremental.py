@@ -0,0 +1,145 @@
+"""Checks that incremental updates extend the checkpoint in place, and equal
+preparing the whole history at once.
+"""
+import os
+import sys
+import numpy as np
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from objects import timeseries as ts  # noqa: E402
+from objects import load_store  # noqa: E402
+from init import incremental  # noqa: E402
+from objects import load_points  # noqa: E402
+from modelling.models import toenne  # noqa: E402
+
+
+def create_config(str_checkpoint_path):
+    return {
+        "data": {"load_measurements": {"first_date_iso": "2020-01-01",
+                                       "last_date_iso": "2020-01-31"}},
+        "preprocessing": {"remove_NaN_and_None": True,
+                          "correct_for_temperature": False},
+        "modelling": {"perform_modelling": False},
+        "incremental": {"checkpoint_path": str_checkpoint_path}
+    }
+
+
+def create_data(list_IDs, str_start, int_hours):
+    arr_time = (np.datetime64(str_start, 'h')
+                + np.arange(int_hours)).astype(ts.STR_TIME_DTYPE)
+    dict_loads_ts = {}
+    for i, str_ID in enumerate(list_IDs):
+        dict_loads_ts[str_ID] = ts.create_standard_time_series(
+            arr_time, np.arange(int_hours) + 1000.0*(i + 1))
+    return {"load_measurements": dict_loads_ts,
+            "temperature_measurements": {},
+            "ingested": {}}
+
+
+def test_update_leaves_old_columns_untouched(tmp_path):
+    str_checkpoint_path = str(tmp_path / "checkpoint")
+    dict_config = create_config(str_checkpoint_path)
+    str_raw_path = os.path.join(
+        str_checkpoint_path, incremental.STR_RAW_DIRNAME)
+    str_data_path = os.path.join(str_raw_path, load_store.STR_DATA_FILENAME)
+
+    incremental.update_all_loads(
+        dict_config, create_data(["a", "b"], "2020-01-01", 14*24))
+    load_matrix_raw = load_store.open_load_store(str_raw_path)
+    arr_raw_old = np.array(load_matrix_raw.arr_data)
+    arr_time_old = load_matrix_raw.arr_time
+    del load_matrix_raw
+
+    # Outgrows the spare columns, so the store is laid out anew
+    incremental.update_all_loads(
+        dict_config, create_data(["a", "b", "c"], "2020-01-15", 2*24))
+    load_matrix_raw = load_store.open_load_store(str_raw_path)
+    assert load_matrix_raw.list_IDs == ["a", "b", "c"]
+    assert np.array_equal(
+        load_matrix_raw.arr_time[:len(arr_time_old)], arr_time_old)
+    assert np.array_equal(
+        load_matrix_raw.arr_data[:2, :len(arr_time_old)], arr_raw_old)
+    assert np.isnan(load_matrix_raw.arr_data[2, :len(arr_time_old)]).all()
+    arr_raw_old = np.array(load_matrix_raw.arr_data)
+    del load_matrix_raw
+    int_inode = os.stat(str_data_path).st_ino
+
+    # Fits the spare columns, so only the new columns are written
+    dict_loads_ts = incremental.update_all_loads(
+        dict_config, create_data(["a", "b", "c"], "2020-01-17", 24))
+    assert os.stat(str_data_path).st_ino == int_inode
+    load_matrix_raw = load_store.open_load_store(str_raw_path)
+    assert np.array_equal(
+        load_matrix_raw.arr_data[:, :arr_raw_old.shape[1]], arr_raw_old,
+        equal_nan=True)
+    assert np.array_equal(dict_loads_ts.arr_data, load_matrix_raw.arr_data,
+                          equal_nan=True)
+    assert len(dict_loads_ts["a"]) == 17*24
+
+
+def test_updates_equal_preparing_whole_history(tmp_path):
+    # Loads of more than a year, such that new temperature-measurements
+    # change the normal temperature of dates with earlier loads
+    arr_time_loads = (np.datetime64("2019-01-10T00", 'h')
+                      + np.arange(390*24)).astype(ts.STR_TIME_DTYPE)
+    arr_time_temperature = (np.datetime64("2018-12-01", 'D')
+                            + np.arange(430)).astype(ts.STR_TIME_DTYPE)
+    random_generator = np.random.default_rng(0)
+    dict_loads_ts = {
+        str_ID: ts.create_standard_time_series(
+            arr_time_loads, 10 + random_generator.random(len(arr_time_loads)))
+        for str_ID in ["a", "b", "c"]}
+    ts_temperature = ts.create_standard_time_series(
+        arr_time_temperature,
+        -5 + 10*random_generator.random(len(arr_time_temperature)))
+    dict_config = create_config(str(tmp_path / "checkpoint"))
+    dict_config["data"]["load_measurements"]["first_date_iso"] = "2019-01-10"
+    dict_config["preprocessing"].update({
+        "correct_for_temperature": True,
+        "k_temperature_coefficient": 0.03,
+        "x_temperature_sensitivity": 0.5})
+
+    date_split = np.datetime64("2020-01-15", 'D')
+    for str_last_date_iso, bool_old in [("2020-01-14", True),
+                                         ("2020-02-03", False)]:
+        dict_config["data"]["load_measurements"]["last_date_iso"] = \
+            str_last_date_iso
+        arr_part = ((arr_time_loads.astype("datetime64[D]") < date_split)
+                    == bool_old)
+        arr_part_temperature = (
+            (arr_time_temperature.astype("datetime64[D]") < date_split)
+            == bool_old)
+        dict_data = {
+            "load_measurements": {
+                str_ID: ts.create_standard_time_series(
+                    ts_load.arr_time[arr_part], ts_load.arr_data[arr_part])
+                for str_ID, ts_load in dict_loads_ts.items()},
+            "temperature_measurements": {
+                "temperature": ts.create_standard_time_series(
+                    arr_time_temperature[arr_part_temperature],
+                    ts_temperature.arr_data[arr_part_temperature])},
+            "ingested": {}}
+        dict_loads_ts_updated = incremental.update_all_loads(
+            dict_config, dict_data)
+
+    dict_loads_ts_full = load_points.prepare_all_loads(dict_config, {
+        "load_measurements": dict_loads_ts,
+        "temperature_measurements": {"temperature": ts_temperature}})
+    assert dict_loads_ts_updated.list_IDs == dict_loads_ts_full.list_IDs
+    assert np.array_equal(
+        dict_loads_ts_updated.arr_time, dict_loads_ts_full.arr_time)
+    assert np.allclose(dict_loads_ts_updated.arr_data,
+                       dict_loads_ts_full.arr_data, rtol=1e-12)
+
+    dict_state = incremental.load_checkpoint_state(
+        dict_config["incremental"]["checkpoint_path"])
+    dict_statistics = toenne.compute_variation_statistics(
+        dict_loads_ts_full.arr_time, dict_loads_ts_full.arr_data)
+    assert np.array_equal(dict_state["variation_counts"],
+                          dict_statistics["count"])
+    assert np.allclose(dict_state["variation_sums"], dict_statistics["sum"],
+                       rtol=1e-12)
+    assert np.allclose(dict_state["variation_maxima"], dict_statistics["max"],
+                       rtol=1e-12, equal_nan=True)
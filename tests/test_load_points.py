@@ -0,0 +1,109 @@
+"""Checks insertion, reallocation and view-semantics of LoadMatrix.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from objects import timeseries as ts  # noqa: E402
+from objects.load_points import LoadMatrix  # noqa: E402
+
+
+def create_hourly_timeseries(str_start, arr_data):
+    arr_time = (np.datetime64(str_start, 'h')
+                + np.arange(len(arr_data))).astype(ts.STR_TIME_DTYPE)
+    return ts.create_standard_time_series(arr_time, arr_data)
+
+
+def test_from_timeseries_drops_missing_datapoints():
+    ts_a = create_hourly_timeseries("2020-01-01T00", [1.0, np.nan, 3.0])
+    ts_b = ts.create_standard_time_series(
+        np.array(["2020-01-01T01", "NaT", "2020-01-01T03"],
+                 dtype=ts.STR_TIME_DTYPE), [2.0, 5.0, 4.0])
+    load_matrix = LoadMatrix.from_timeseries({"a": ts_a, "b": ts_b})
+
+    assert not np.isnat(load_matrix.arr_time).any()
+    assert len(load_matrix.arr_time) == 4
+    assert list(load_matrix.num_dropped_datapoints(["a", "b"])) == [1, 1]
+    assert np.array_equal(load_matrix["a"].arr_data, [1.0, 3.0])
+    assert np.array_equal(load_matrix["b"].arr_data, [2.0, 4.0])
+    assert np.array_equal(load_matrix.arr_data, [[1.0, np.nan, 3.0, np.nan],
+                                                 [np.nan, 2.0, np.nan, 4.0]],
+                          equal_nan=True)
+
+
+def test_insert_beyond_capacity_and_time_axis_keeps_loads():
+    load_matrix = LoadMatrix()
+    dict_loads_ts = {}
+    for i in range(2 * LoadMatrix.INT_MIN_CAPACITY + 1):
+        # Every load-point extends the time-axis by an hour
+        dict_loads_ts[str(i)] = create_hourly_timeseries(
+            "2020-01-01T00", np.arange(i + 1) + 100.0*i)
+        load_matrix[str(i)] = dict_loads_ts[str(i)]
+
+    assert load_matrix.list_IDs == list(dict_loads_ts)
+    assert len(load_matrix.arr_time) == len(dict_loads_ts)
+    for str_ID, ts_load in dict_loads_ts.items():
+        assert np.array_equal(load_matrix[str_ID].arr_time, ts_load.arr_time)
+        assert np.array_equal(load_matrix[str_ID].arr_data, ts_load.arr_data)
+
+
+def test_replace_and_remove_compact_rows():
+    load_matrix = LoadMatrix.from_timeseries({
+        str_ID: create_hourly_timeseries("2020-01-01T00", [fl_value] * 3)
+        for str_ID, fl_value in [("a", 1.0), ("b", 2.0), ("c", 3.0)]})
+    ts_b_old = load_matrix["b"]
+    load_matrix["b"] = create_hourly_timeseries("2020-01-01T00", [4.0] * 3)
+    del load_matrix["a"]
+
+    assert load_matrix.list_IDs == ["b", "c"]
+    assert np.array_equal(load_matrix.arr_data, [[4.0] * 3, [3.0] * 3])
+    assert list(load_matrix.rows_of(["b", "c"])) == [0, 1]
+    # Rows are retired rather than overwritten
+    assert np.array_equal(ts_b_old.arr_data, [2.0] * 3)
+
+
+def test_complete_rows_are_read_only_views():
+    load_matrix = LoadMatrix.from_timeseries({
+        "a": create_hourly_timeseries("2020-01-01T00", [1.0, 2.0, 3.0]),
+        "b": create_hourly_timeseries("2020-01-01T01", [5.0, 6.0])})
+    ts_a = load_matrix["a"]
+    ts_b = load_matrix["b"]
+
+    assert np.shares_memory(ts_a.arr_data, load_matrix.arr_data)
+    assert not ts_a.arr_data.flags.writeable
+    assert not ts_a.arr_time.flags.writeable
+    with pytest.raises(ValueError):
+        ts_a.arr_data[0] = 0.0
+    # Rows with missing datapoints are read as copies
+    assert not np.shares_memory(ts_b.arr_data, load_matrix.arr_data)
+
+    load_matrix.write_datapoints(
+        np.array(["a", "b"]),
+        np.array(["2020-01-01T00", "2020-01-01T00"], dtype=ts.STR_TIME_DTYPE),
+        np.array([7.0, 8.0]))
+    assert ts_a.arr_data[0] == 7.0
+    assert np.array_equal(ts_b.arr_data, [5.0, 6.0])
+    assert np.array_equal(load_matrix["b"].arr_data, [8.0, 5.0, 6.0])
+
+
+def test_write_datapoints_creates_rows_and_rejects_other_timestamps():
+    load_matrix = LoadMatrix(np.array(
+        ["2020-01-01T00", "2020-01-01T01"], dtype=ts.STR_TIME_DTYPE))
+    load_matrix.write_datapoints(
+        np.array(["b", "a", "b"]),
+        np.array(["2020-01-01T00", "2020-01-01T01", "2020-01-01T01"],
+                 dtype=ts.STR_TIME_DTYPE),
+        np.array([1.0, 2.0, 3.0]))
+
+    assert sorted(load_matrix.list_IDs) == ["a", "b"]
+    assert np.array_equal(load_matrix["a"].arr_data, [2.0])
+    assert np.array_equal(load_matrix["b"].arr_data, [1.0, 3.0])
+    with pytest.raises(Exception):
+        load_matrix.write_datapoints(
+            np.array(["a"]),
+            np.array(["2020-01-01T02"], dtype=ts.STR_TIME_DTYPE),
+            np.array([4.0]))
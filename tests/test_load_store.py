@@ -0,0 +1,73 @@
+"""Checks writing, growing and extending memory-mapped load-stores.
+"""
+import os
+import sys
+import numpy as np
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from objects import timeseries as ts  # noqa: E402
+from objects import load_store  # noqa: E402
+
+
+def create_time_axis(str_start, int_num_steps):
+    return (np.datetime64(str_start, 'h')
+            + np.arange(int_num_steps)).astype(ts.STR_TIME_DTYPE)
+
+
+def test_store_grows_while_written(tmp_path):
+    str_store_path = str(tmp_path / "store")
+    arr_time = create_time_axis("2020-01-01T00", 3)
+    load_store.create_load_store(str_store_path, arr_time, 0)
+    assert not load_store.load_store_exists(str_store_path)
+
+    dict_rows = {}
+    list_IDs = [str(i) for i in range(load_store.INT_MIN_ROWS + 1)]
+    for i, str_ID in enumerate(list_IDs):
+        load_store.write_datapoints_to_load_store(
+            str_store_path, dict_rows, np.array([str_ID] * 3),
+            np.arange(3), np.arange(3) + 10.0*i)
+    load_store.complete_load_store(str_store_path, list(dict_rows))
+
+    assert load_store.load_store_exists(str_store_path)
+    load_matrix = load_store.open_load_store(str_store_path)
+    assert load_matrix.list_IDs == list_IDs
+    assert np.array_equal(load_matrix.arr_time, arr_time)
+    arr_data = np.arange(3) + 10.0*np.arange(len(list_IDs))[:, np.newaxis]
+    assert np.array_equal(load_matrix.arr_data, arr_data)
+
+
+def test_extend_time_axis(tmp_path):
+    str_store_path = str(tmp_path / "store")
+    str_data_path = os.path.join(str_store_path, load_store.STR_DATA_FILENAME)
+    arr_time = create_time_axis("2020-01-01T01", 2)
+    arr_data = np.array([[1.0, 2.0], [3.0, np.nan]])
+    load_store.create_load_store(str_store_path, arr_time, 2)
+    load_store.write_datapoints_to_load_store(
+        str_store_path, {"a": 0, "b": 1}, np.array(["a", "a", "b"]),
+        np.array([0, 1, 0]), np.array([1.0, 2.0, 3.0]))
+    load_store.complete_load_store(str_store_path, ["a", "b"])
+
+    # Timestamps before the time-axis move the data into spare columns
+    arr_time = create_time_axis("2020-01-01T00", 3)
+    load_store.extend_load_store_time(str_store_path, arr_time)
+    load_matrix = load_store.open_load_store(str_store_path)
+    assert np.array_equal(load_matrix.arr_time, arr_time)
+    assert np.array_equal(load_matrix.arr_data[:, 1:], arr_data,
+                          equal_nan=True)
+    assert np.isnan(load_matrix.arr_data[:, 0]).all()
+    int_num_columns = load_store.open_load_store_data(str_store_path).shape[1]
+    assert int_num_columns > len(arr_time)
+    del load_matrix
+
+    # Timestamps after the time-axis fill the spare columns in place
+    int_inode = os.stat(str_data_path).st_ino
+    arr_time = create_time_axis("2020-01-01T00", int_num_columns)
+    load_store.extend_load_store_time(str_store_path, arr_time)
+    assert os.stat(str_data_path).st_ino == int_inode
+    load_matrix = load_store.open_load_store(str_store_path)
+    assert np.array_equal(load_matrix.arr_time, arr_time)
+    assert np.array_equal(load_matrix.arr_data[:, 1:3], arr_data,
+                          equal_nan=True)
+    assert np.isnan(load_matrix.arr_data[:, 3:]).all()
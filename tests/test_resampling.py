@@ -0,0 +1,86 @@
+"""Checks up- and downsampling of series sharing a time-axis.
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+STR_ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(STR_ROOT_PATH, "src"))
+
+from objects import timeseries as ts  # noqa: E402
+from objects import resampling  # noqa: E402
+
+
+def create_time_axis(str_start, int_num_steps, str_unit):
+    return (np.datetime64(str_start, str_unit)
+            + np.arange(int_num_steps)).astype(ts.STR_TIME_DTYPE)
+
+
+def test_downsample_aggregates_within_timesteps():
+    arr_time = (np.datetime64("2020-01-01T00:00", 'm')
+                + 15*np.arange(8)).astype(ts.STR_TIME_DTYPE)
+    arr_data = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, np.nan, np.nan, 7.0],
+                         [np.nan] * 4 + [1.0] * 4])
+
+    arr_time_new, arr_mean = resampling.resample_arrays(
+        arr_time, arr_data, "h", "mean")
+    assert np.array_equal(
+        arr_time_new, create_time_axis("2020-01-01T00", 2, 'h'))
+    assert np.array_equal(arr_mean, [[2.5, 6.0], [np.nan, 1.0]],
+                          equal_nan=True)
+    _, arr_sum = resampling.resample_arrays(arr_time, arr_data, "h", "sum")
+    assert np.array_equal(arr_sum, [[10.0, 12.0], [np.nan, 4.0]],
+                          equal_nan=True)
+    _, arr_max = resampling.resample_arrays(arr_time, arr_data, "h", "max")
+    assert np.array_equal(arr_max, [[4.0, 7.0], [np.nan, 1.0]], equal_nan=True)
+
+
+def test_upsample_holds_splits_and_interpolates():
+    arr_time = create_time_axis("2020-01-01", 2, 'D')
+    arr_data = np.array([[24.0, 48.0]])
+
+    arr_time_new, arr_mean = resampling.resample_arrays(
+        arr_time, arr_data, "h", "mean")
+    assert np.array_equal(
+        arr_time_new, create_time_axis("2020-01-01T00", 48, 'h'))
+    assert np.array_equal(arr_mean[0], [24.0] * 24 + [48.0] * 24)
+    _, arr_sum = resampling.resample_arrays(arr_time, arr_data, "h", "sum")
+    assert np.array_equal(arr_sum[0], [1.0] * 24 + [2.0] * 24)
+    _, arr_linear = resampling.resample_arrays(
+        arr_time, arr_data, "h", "linear")
+    assert np.allclose(arr_linear[0, :25], 24.0 + np.arange(25))
+    assert np.allclose(arr_linear[0, 24:], 48.0)
+
+
+def test_upsample_leaves_gaps_missing():
+    arr_time = np.array(["2020-01-01T00", "2020-01-01T01", "2020-01-01T03"],
+                        dtype=ts.STR_TIME_DTYPE)
+    arr_data = np.array([[1.0, 2.0, 4.0]])
+
+    arr_time_new, arr_data_new = resampling.resample_arrays(
+        arr_time, arr_data, "15min", "mean")
+    assert len(arr_time_new) == 16
+    assert np.array_equal(arr_data_new[0], [1.0] * 4 + [2.0] * 4
+                          + [np.nan] * 4 + [4.0] * 4, equal_nan=True)
+
+
+def test_resampling_preserves_energy():
+    arr_time = create_time_axis("2020-01-01T00", 48, 'h')
+    arr_data = np.random.default_rng(0).random((3, 48))
+
+    _, arr_daily = resampling.resample_arrays(arr_time, arr_data, "D", "sum")
+    _, arr_hourly = resampling.resample_arrays(
+        create_time_axis("2020-01-01", 2, 'D'), arr_daily, "h", "sum")
+    assert np.allclose(arr_daily.sum(axis=1), arr_data.sum(axis=1))
+    assert np.allclose(arr_hourly.sum(axis=1), arr_data.sum(axis=1))
+
+
+def test_short_series_are_returned_unchanged():
+    ts_data = ts.create_standard_time_series(
+        create_time_axis("2020-01-01T00", 1, 'h'), [3.0])
+    ts_resampled = resampling.resample_timeseries(ts_data, "D")
+    assert np.array_equal(ts_resampled.arr_time, ts_data.arr_time)
+    assert np.array_equal(ts_resampled.arr_data, ts_data.arr_data)
+    with pytest.raises(Exception):
+        resampling.resample_timeseries(ts_data, "2h")